@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Offline stand-ins for the AWS APIs used by the handlers.
+
+boto3 clients are answered from a ``before-call`` event handler, the same hook the
+botocore Stubber uses, so parameter validation, serialization and client events still
+run. PynamoDB bypasses botocore's request path, so its ``_make_api_call`` is replaced
+with an in-memory table that serves fixture items. Writes are accepted and discarded,
+so every invocation of a benchmark sees the same state.
+"""
+
+from collections import Counter
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class FakeError(Exception):
+    """
+    Raised by a responder to return an AWS error response
+    """
+
+    def __init__(self, code: str, message: str = "", status_code: int = 400) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+class FakeDynamoDB:
+    """
+    Fixture items by table, looked up by their key attributes
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, Any]]) -> None:
+        self.tables = tables
+        self.items: Dict[str, List[Dict[str, Any]]] = {name: [] for name in tables}
+
+    def put(self, table_name: str, item: Dict[str, Any]) -> None:
+        self.items[table_name].append(item)
+
+    def _key_names(self, table_name: str) -> List[str]:
+        return [key["AttributeName"] for key in self.tables[table_name]["KeySchema"]]
+
+    def _find(self, table_name: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        for item in self.items[table_name]:
+            if all(item.get(name) == value for name, value in key.items()):
+                return item
+        return None
+
+    def __call__(self, operation_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        table_name = params.get("TableName")
+
+        if operation_name == "DescribeTable":
+            table = dict(self.tables[table_name], TableName=table_name)
+            return {"Table": dict(table, TableStatus="ACTIVE")}
+
+        if operation_name == "GetItem":
+            item = self._find(table_name, params["Key"])
+            return {"Item": item} if item else {}
+
+        if operation_name == "UpdateItem":
+            item = self._find(table_name, params["Key"]) or params["Key"]
+            return {"Attributes": item}
+
+        if operation_name in ("Query", "Scan"):
+            # key conditions are not evaluated, an item matches on any expression value
+            values = list(params.get("ExpressionAttributeValues", {}).values())
+            names = self._key_names(table_name)
+            items = [
+                item
+                for item in self.items[table_name]
+                if not values or any(item.get(name) in values for name in names)
+            ]
+            if "Segment" in params:
+                items = items[params["Segment"] :: params["TotalSegments"]]
+            return {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+
+        # writes of whole items are kept, so a later invocation reads them back
+        if operation_name == "PutItem":
+            self._replace(table_name, params["Item"])
+        elif operation_name == "DeleteItem":
+            self._remove(table_name, params["Key"])
+        elif operation_name == "BatchWriteItem":
+            for name, requests in params["RequestItems"].items():
+                for request in requests:
+                    if "PutRequest" in request:
+                        self._replace(name, request["PutRequest"]["Item"])
+                    else:
+                        self._remove(name, request["DeleteRequest"]["Key"])
+            return {"UnprocessedItems": {}}
+
+        # UpdateItem and TransactWriteItems are not applied
+        return {}
+
+    def _remove(self, table_name: str, key: Dict[str, Any]) -> None:
+        item = self._find(table_name, key)
+        if item is not None:
+            self.items[table_name].remove(item)
+
+    def _replace(self, table_name: str, item: Dict[str, Any]) -> None:
+        self._remove(
+            table_name, {name: item[name] for name in self._key_names(table_name)}
+        )
+        self.items[table_name].append(item)
+
+
+class FakeAWS:
+    """
+    Answer AWS API calls from responders keyed by (service, operation) and count them
+    """
+
+    def __init__(
+        self,
+        responders: Dict[Tuple[str, str], Any],
+        dynamodb: Optional[FakeDynamoDB] = None,
+    ) -> None:
+        self.responders = responders
+        self.dynamodb = dynamodb
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = Counter()
+
+    def respond(
+        self,
+        service_name: str,
+        operation_name: str,
+        params: Dict[str, Any],
+        region: str,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            self.calls[f"{service_name}:{operation_name}"] += 1
+
+        if service_name == "dynamodb" and self.dynamodb:
+            return self.dynamodb(operation_name, params)
+
+        responder = self.responders.get((service_name, operation_name))
+        if responder is None:
+            raise FakeError(
+                "NotStubbed", f"No response for {service_name}:{operation_name}"
+            )
+        if callable(responder):
+            return responder(params, region)
+        return responder
+
+    def install(self) -> None:
+        """
+        Route every botocore client and PynamoDB connection created from now on to this
+        fake backend
+        """
+        import botocore.session
+        from botocore.awsrequest import AWSResponse
+        from pynamodb.connection.base import Connection
+        from pynamodb.exceptions import VerboseClientError
+
+        fake = self
+
+        def before_call(model, params, **kwargs) -> Tuple[AWSResponse, Dict[str, Any]]:
+            service_name = model.service_model.service_name
+            region = kwargs["context"].get("client_region")
+            # params is the serialized request, JSON protocol parameters are decoded back
+            if model.service_model.protocol == "json" and params.get("body"):
+                params = json.loads(params["body"])
+            try:
+                parsed = fake.respond(service_name, model.name, params, region)
+                return AWSResponse(None, 200, {}, None), parsed
+            except FakeError as error:
+                parsed = {"Error": {"Code": error.code, "Message": error.message}}
+                return AWSResponse(None, error.status_code, {}, None), parsed
+
+        create_client = botocore.session.Session.create_client
+
+        def create_fake_client(self, service_name, *args, **kwargs):
+            client = create_client(self, service_name, *args, **kwargs)
+            region = client.meta.region_name
+
+            def handler(**handler_kwargs):
+                handler_kwargs["context"]["client_region"] = region
+                return before_call(**handler_kwargs)
+
+            client.meta.events.register("before-call.*.*", handler)
+            return client
+
+        botocore.session.Session.create_client = create_fake_client
+
+        def make_api_call(self, operation_name, operation_kwargs):
+            try:
+                data = fake.respond(
+                    "dynamodb", operation_name, operation_kwargs, self.region
+                )
+            except FakeError as error:
+                raise VerboseClientError(
+                    {"Error": {"Code": error.code, "Message": error.message}},
+                    operation_name,
+                )
+            # PynamoDB reads the raw JSON response, so round trip it like the wire would
+            return json.loads(json.dumps(data))
+
+        Connection._make_api_call = make_api_call
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Run a single benchmark scenario in a fresh interpreter and write its results as JSON.
+
+Usage: harness.py <scenario> <iterations> <output>
+"""
+
+from datetime import datetime, timezone
+import importlib
+import json
+import os
+import resource
+import sys
+import time
+from typing import Any, Dict, List
+
+from scenarios import ENVIRONMENT, ROOT, SCENARIOS
+
+
+class Context:
+    function_name = "benchmark"
+    function_version = "$LATEST"
+    invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:benchmark"
+    memory_limit_in_mb = 256
+    aws_request_id = "00000000-0000-0000-0000-000000000000"
+    log_group_name = "/aws/lambda/benchmark"
+    log_stream_name = "benchmark"
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 300000
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def invoke(handler, event: Dict[str, Any], expected: str) -> Any:
+    try:
+        return handler(event, Context())
+    except Exception as error:
+        if type(error).__name__ != expected:
+            raise
+    return None
+
+
+def main(name: str, iterations: int, output: str) -> None:
+    scenario = SCENARIOS[name]
+    os.environ.update(ENVIRONMENT)
+
+    path = os.path.join(ROOT, scenario["path"])
+    sys.path[:0] = [path, os.path.join(ROOT, "dependencies")]
+    os.chdir(path)
+
+    fake = scenario["fake"](datetime.now(timezone.utc))
+
+    started = time.perf_counter()
+    fake.install()
+    module = importlib.import_module(scenario["module"])
+    import_ms = (time.perf_counter() - started) * 1000
+    handler = getattr(module, scenario["handler"])
+
+    expected = scenario.get("raises", "")
+    # scenarios cycling through several events count the calls of their first cycle as
+    # cold calls, as each event may initialize something, and run whole warm cycles, so
+    # the figures do not depend on the iterations
+    events = scenario.get("events") or [scenario["event"]]
+    iterations = -(-iterations // len(events)) * len(events)
+
+    # handlers print metrics to stdout, which is not part of the results
+    sys.stdout = open(os.devnull, "w")
+
+    started = time.perf_counter()
+    response = invoke(handler, events[0](), expected)
+    cold_ms = (time.perf_counter() - started) * 1000
+
+    # a benchmark that takes an error path measures the wrong thing
+    if "status" in scenario and response["statusCode"] != scenario["status"]:
+        raise Exception(f"{name} returned {response}")
+    if "result" in scenario and response["status"] != scenario["result"]:
+        raise Exception(f"{name} returned {response}")
+    for event in events[1:]:
+        invoke(handler, event(), expected)
+    cold_calls = dict(fake.calls)
+
+    latencies = []
+    calls = 0
+    warm_calls: Dict[str, int] = {}  # most calls of each operation in one invocation
+    for index in range(iterations):
+        event = events[index % len(events)]()
+        fake.reset()
+        started = time.perf_counter()
+        invoke(handler, event, expected)
+        latencies.append((time.perf_counter() - started) * 1000)
+        calls += sum(fake.calls.values())
+        for operation, count in fake.calls.items():
+            warm_calls[operation] = max(warm_calls.get(operation, 0), count)
+
+    results = {
+        "cold_import_ms": round(import_ms, 2),
+        "cold_invoke_ms": round(cold_ms, 2),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "cold_api_calls": sum(cold_calls.values()),
+        "api_calls": round(calls / max(iterations, 1), 2),
+        "warm_calls": warm_calls,
+    }
+
+    with open(output, "w") as fp:
+        json.dump(results, fp, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]), sys.argv[3])
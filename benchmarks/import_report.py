@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Report where each handler spends its cold import time.
+
+Every handler is imported in a fresh interpreter with ``-X importtime``; the report
+lists the total import time and the top-level packages that account for most of it.
+
+    python benchmarks/import_report.py [--top N] [scenario ...]
+"""
+
+import argparse
+from collections import Counter
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+from scenarios import ENVIRONMENT, ROOT, SCENARIOS
+
+
+def profile_imports(path: str, module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Return the cumulative import time of a module and the self time of every top-level
+    package it imported, in milliseconds
+    """
+    env = dict(os.environ, **ENVIRONMENT)
+    env["PYTHONPATH"] = os.pathsep.join([path, os.path.join(ROOT, "dependencies")])
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=path,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if process.returncode != 0:
+        raise Exception(f"Unable to import {module}:\n{process.stderr}")
+
+    total = 0.0
+    packages: Counter = Counter()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, packages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "scenarios", nargs="*", help="scenarios to report (default: all)"
+    )
+    parser.add_argument(
+        "--top", type=int, default=8, help="packages to list per handler"
+    )
+    args = parser.parse_args()
+
+    handlers = {}
+    for name in args.scenarios or sorted(SCENARIOS):
+        scenario = SCENARIOS[name]
+        key = (scenario["path"], scenario["module"])
+        handlers.setdefault(key, name)
+
+    for (path, module), name in handlers.items():
+        total, packages = profile_imports(os.path.join(ROOT, path), module)
+        print(f"{name} ({path}/{module}.py): {total:.1f}ms")
+        for package, elapsed in packages.most_common(args.top):
+            print(f"  {package:<32} {elapsed:>8.1f}ms {elapsed / total:>6.1%}")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Run every benchmark scenario offline and compare the results against a stored baseline.
+
+Each scenario runs in its own interpreter so import time and peak RSS are those of a
+cold Lambda container. The run fails if any scenario makes more AWS API calls than its
+baseline, in total or of any one operation in a single invocation. Timing and memory figures depend on the
+machine, so changes beyond the tolerance are reported but do not fail the run.
+
+    python benchmarks/run.py                    # compare against baseline.json
+    python benchmarks/run.py --update-baseline  # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from scenarios import SCENARIOS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+
+TIMING_METRICS = ("cold_import_ms", "p50_ms", "p90_ms", "peak_rss_mb")
+CALL_METRICS = ("cold_api_calls", "api_calls")
+TIMING_SLACK_MS = 1.0  # absolute noise allowance for sub-millisecond timings
+
+
+def run_scenario(name: str, iterations: int) -> Dict[str, Any]:
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        process = subprocess.run(
+            [
+                sys.executable,
+                os.path.join(HERE, "harness.py"),
+                name,
+                str(iterations),
+                output.name,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if process.returncode != 0:
+            raise Exception(f"Scenario {name} failed:\n{process.stderr}")
+        with open(output.name, "r") as fp:
+            return json.load(fp)
+
+
+def run_repeated(name: str, iterations: int, repeat: int) -> Dict[str, Any]:
+    """
+    Run a scenario several times and keep the best figure of each metric, which is the
+    least affected by noise from the rest of the machine
+    """
+    runs = [run_scenario(name, iterations) for _ in range(repeat)]
+    result = dict(runs[0])
+    for metric, value in runs[0].items():
+        if isinstance(value, (int, float)):
+            result[metric] = min(run[metric] for run in runs)
+    return result
+
+
+def compare(
+    name: str, result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> Tuple[List[str], List[str]]:
+    """
+    Return the regressions of a scenario against its baseline, which are only ever
+    additional AWS API calls, and the timing and memory figures that changed by more
+    than the tolerance
+    """
+    regressions = []
+    for metric in CALL_METRICS:
+        if result[metric] > baseline[metric]:
+            regressions.append(
+                f"{name}: {metric} {result[metric]} > {baseline[metric]}"
+            )
+    for operation, count in sorted(result["warm_calls"].items()):
+        expected = baseline["warm_calls"].get(operation, 0)
+        if count > expected:
+            regressions.append(f"{name}: {operation} calls {count} > {expected}")
+
+    changes = []
+    for metric in TIMING_METRICS:
+        limit = baseline[metric] * (1 + tolerance)
+        if metric.endswith("_ms"):
+            limit = max(limit, baseline[metric] + TIMING_SLACK_MS)
+        if result[metric] > limit:
+            changes.append(
+                f"{name}: {metric} {result[metric]} > {baseline[metric]} (limit {limit:.2f})"
+            )
+    return regressions, changes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="relative increase of timings and memory to report (default: 0.5)",
+    )
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    names = args.scenarios or sorted(SCENARIOS)
+
+    results = {}
+    print(
+        f"{'scenario':<24} {'import':>9} {'cold':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'rss':>7} {'calls':>6}"
+    )
+    for name in names:
+        result = results[name] = run_repeated(name, args.iterations, args.repeat)
+        print(
+            f"{name:<24} {result['cold_import_ms']:>7.1f}ms {result['cold_invoke_ms']:>7.1f}ms "
+            f"{result['p50_ms']:>6.2f}ms {result['p90_ms']:>6.2f}ms {result['p99_ms']:>6.2f}ms "
+            f"{result['peak_rss_mb']:>5.1f}MB {result['api_calls']:>6}"
+        )
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r") as fp:
+                baseline = json.load(fp)
+        baseline.update(results)
+        with open(args.baseline, "w") as fp:
+            json.dump(baseline, fp, indent=2, sort_keys=True)
+            fp.write("\n")
+        print(f"Updated {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r") as fp:
+        baseline = json.load(fp)
+
+    regressions = []
+    changes = []
+    for name, result in results.items():
+        if name in baseline:
+            scenario_regressions, scenario_changes = compare(
+                name, result, baseline[name], args.tolerance
+            )
+            regressions.extend(scenario_regressions)
+            changes.extend(scenario_changes)
+        else:
+            print(f"No baseline for {name}")
+
+    if changes:
+        print("\nSlower than baseline (not gated):")
+        for change in changes:
+            print(f"  {change}")
+
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
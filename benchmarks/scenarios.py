@@ -0,0 +1,658 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark scenarios: which handler to import, the event to send and the AWS fixtures
+"""
+
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from fake_aws import FakeAWS, FakeDynamoDB
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENTS = os.path.join(ROOT, "events")
+
+ACCOUNT_ID = "111111111111"
+AUDIT_ACCOUNT_ID = "222222222222"
+ACCOUNT_NAME = "TestAccount"
+LAMBDA_ROLE_ARN = "arn:aws:iam::123456789012:role/QueueProcessorRole"
+TOKEN = "benchmark-token"
+REGIONS = ["us-east-1", "us-west-2"]
+SERVICE_CATALOG_TIME = "2020-09-21 01:53:07.692000+00:00"
+
+ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "ACCOUNT_TABLE": "AccountTable",
+    "CONFIG_TABLE": "ConfigTable",
+    "SECRET_ID": "ApiKeySecret",
+    "ACCOUNT_QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123456789012/AccountQueue.fifo",
+    "CALLBACK_QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123456789012/CallbackQueue",
+    "LAMBDA_ROLE_ARN": LAMBDA_ROLE_ARN,
+    "MAX_CONCURRENT_ACCOUNTS": "5",
+    "REGIONS": ",".join(REGIONS),
+    "LOG_LEVEL": "ERROR",
+    "POWERTOOLS_SERVICE_NAME": "benchmark",
+    "POWERTOOLS_METRICS_NAMESPACE": "Benchmark",
+    "POWERTOOLS_TRACE_DISABLED": "1",
+}
+
+TABLES = {
+    "AccountTable": {
+        "KeySchema": [{"AttributeName": "account_name", "KeyType": "HASH"}],
+        "AttributeDefinitions": [
+            {"AttributeName": "account_name", "AttributeType": "S"},
+            {"AttributeName": "status", "AttributeType": "S"},
+        ],
+        "GlobalSecondaryIndexes": [
+            {
+                "IndexName": "AccountStatusV2",
+                "KeySchema": [
+                    {"AttributeName": "status", "KeyType": "HASH"},
+                    {"AttributeName": "account_name", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "INCLUDE"},
+            }
+        ],
+    },
+    "ConfigTable": {
+        "KeySchema": [
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        "AttributeDefinitions": [
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+    },
+}
+
+
+def item(**values: Any) -> Dict[str, Any]:
+    """
+    Serialize a fixture item into DynamoDB JSON
+    """
+    result = {}
+    for name, value in values.items():
+        if isinstance(value, datetime):
+            result[name] = {"S": value.strftime("%Y-%m-%dT%H:%M:%S.%f%z")}
+        elif isinstance(value, bool):
+            result[name] = {"BOOL": value}
+        elif isinstance(value, (int, float)):
+            result[name] = {"N": str(value)}
+        elif isinstance(value, set):
+            result[name] = {"SS": sorted(value)}
+        else:
+            result[name] = {"S": value}
+    return result
+
+
+def account_item(status: str, now: datetime, **values: Any) -> Dict[str, Any]:
+    fields = {
+        "account_name": ACCOUNT_NAME,
+        "account_email": "aws-test@example.com",
+        "sso_user_email": "user@example.com",
+        "sso_user_first_name": "Test",
+        "sso_user_last_name": "User",
+        "ou_name": "Custom",
+        "status": status,
+        "queued_at": now - timedelta(minutes=30),
+    }
+    fields.update(values)
+    return item(**fields)
+
+
+def load_event(name: str) -> Dict[str, Any]:
+    with open(os.path.join(EVENTS, name), "r") as fp:
+        return json.load(fp)
+
+
+def api_event(**values: Any) -> Dict[str, Any]:
+    event = {
+        "version": "2.0",
+        "headers": {"authorization": f"Bearer {TOKEN}"},
+        "requestContext": {"http": {"method": "GET"}},
+    }
+    event.update(values)
+    return event
+
+
+def secret_responder(params: Dict[str, Any], region: str) -> Dict[str, Any]:
+    return {
+        "ARN": "arn:aws:secretsmanager:us-east-1:123456789012:secret:ApiKeySecret",
+        "Name": "ApiKeySecret",
+        "SecretString": json.dumps({"token": TOKEN}),
+    }
+
+
+def assume_role_responder(params: Dict[str, Any], region: str) -> Dict[str, Any]:
+    return {
+        "Credentials": {
+            "AccessKeyId": "ASIABENCHMARK",
+            "SecretAccessKey": "testing",
+            "SessionToken": "testing",
+            "Expiration": datetime.now(timezone.utc) + timedelta(hours=1),
+        },
+        "AssumedRoleUser": {"AssumedRoleId": "AROA:benchmark", "Arn": "arn"},
+    }
+
+
+def regions_responder(params: Dict[str, Any], region: str) -> Dict[str, Any]:
+    return {"Regions": [{"RegionName": name} for name in REGIONS]}
+
+
+def base_dynamodb(now: datetime) -> FakeDynamoDB:
+    dynamodb = FakeDynamoDB(TABLES)
+    dynamodb.put("ConfigTable", item(pk="counter", sk="status", QUEUED=1))
+    dynamodb.put(
+        "ConfigTable",
+        item(
+            pk="servicecatalog",
+            sk="discovery",
+            portfolio_id="port-benchmark",
+            product_id="prod-benchmark",
+            provisioning_artifact_id="pa-benchmark",
+            associated_principals={LAMBDA_ROLE_ARN},
+            discovered_at=now,
+            expires_at=int((now + timedelta(hours=24)).timestamp()),
+        ),
+    )
+    return dynamodb
+
+
+def account_create(now: datetime) -> FakeAWS:
+    responders = {
+        ("secretsmanager", "GetSecretValue"): secret_responder,
+        ("sqs", "SendMessage"): {"MessageId": "benchmark"},
+    }
+    return FakeAWS(responders, base_dynamodb(now))
+
+
+def account_status(now: datetime) -> FakeAWS:
+    dynamodb = base_dynamodb(now)
+    dynamodb.put(
+        "AccountTable",
+        account_item("SUCCEEDED", now, account_id=ACCOUNT_ID, updated_at=now),
+    )
+    responders = {("secretsmanager", "GetSecretValue"): secret_responder}
+    return FakeAWS(responders, dynamodb)
+
+
+def account_delete(now: datetime) -> FakeAWS:
+    dynamodb = base_dynamodb(now)
+    dynamodb.put("AccountTable", account_item("QUEUED", now))
+    responders = {("secretsmanager", "GetSecretValue"): secret_responder}
+    return FakeAWS(responders, dynamodb)
+
+
+def api_routes(now: datetime) -> FakeAWS:
+    fake = account_delete(now)
+    fake.responders[("sqs", "SendMessage")] = {"MessageId": "benchmark"}
+    return fake
+
+
+def queue_processor_queued(now: datetime) -> FakeAWS:
+    dynamodb = base_dynamodb(now)
+    dynamodb.put("AccountTable", account_item("QUEUED", now))
+    responders = {
+        ("servicecatalog", "ProvisionProduct"): {
+            "RecordDetail": {
+                "RecordId": "rec-benchmark",
+                "Status": "IN_PROGRESS",
+                "CreatedTime": SERVICE_CATALOG_TIME,
+                "UpdatedTime": SERVICE_CATALOG_TIME,
+            }
+        },
+        ("sqs", "ChangeMessageVisibility"): {},
+    }
+    return FakeAWS(responders, dynamodb)
+
+
+def queue_processor_finished(now: datetime) -> FakeAWS:
+    dynamodb = base_dynamodb(now)
+    dynamodb.put(
+        "AccountTable",
+        account_item(
+            "IN_PROGRESS",
+            now,
+            record_id="rec-benchmark",
+            created_at=now,
+            updated_at=now,
+        ),
+    )
+    dynamodb.put(
+        "ConfigTable",
+        item(
+            pk="lease",
+            sk="slot#00",
+            account_name=ACCOUNT_NAME,
+            acquired_at=now,
+            expires_at=int((now + timedelta(hours=2)).timestamp()),
+        ),
+    )
+    responders = {
+        ("servicecatalog", "DescribeRecord"): {
+            "RecordDetail": {
+                "RecordId": "rec-benchmark",
+                "Status": "SUCCEEDED",
+                "UpdatedTime": SERVICE_CATALOG_TIME,
+            },
+            "RecordOutputs": [{"OutputKey": "AccountId", "OutputValue": ACCOUNT_ID}],
+        },
+    }
+    return FakeAWS(responders, dynamodb)
+
+
+def invoke_callback(now: datetime) -> FakeAWS:
+    dynamodb = base_dynamodb(now)
+    dynamodb.put(
+        "AccountTable",
+        account_item(
+            "IN_PROGRESS",
+            now,
+            account_name="LifeCycle1",
+            record_id="rec-benchmark",
+            callback_url="https://example.com/callback",
+            callback_secret="secret",
+            receipt_handle="receipt",
+            created_at=now,
+        ),
+    )
+    responders = {
+        ("sqs", "SendMessage"): {"MessageId": "benchmark"},
+        ("sqs", "DeleteMessage"): {},
+    }
+    return FakeAWS(responders, dynamodb)
+
+
+def s3_public_block(now: datetime) -> FakeAWS:
+    responders = {
+        ("sts", "AssumeRole"): assume_role_responder,
+        ("s3control", "GetPublicAccessBlock"): {},
+        ("s3control", "PutPublicAccessBlock"): {},
+    }
+    return FakeAWS(responders, base_dynamodb(now))
+
+
+def route53_query_logs(now: datetime) -> FakeAWS:
+    responders = {
+        ("sts", "AssumeRole"): assume_role_responder,
+        ("logs", "DescribeResourcePolicies"): {"resourcePolicies": []},
+        ("logs", "PutResourcePolicy"): {},
+    }
+    return FakeAWS(responders, base_dynamodb(now))
+
+
+def delete_default_vpc(now: datetime) -> FakeAWS:
+    responders = {
+        ("sts", "AssumeRole"): assume_role_responder,
+        ("ec2", "DescribeRegions"): regions_responder,
+        ("ec2", "DescribeVpcs"): {"Vpcs": [{"VpcId": "vpc-1", "IsDefault": True}]},
+        ("ec2", "DescribeInternetGateways"): {
+            "InternetGateways": [{"InternetGatewayId": "igw-1"}]
+        },
+        ("ec2", "DescribeRouteTables"): {
+            "RouteTables": [{"RouteTableId": "rtb-1", "Associations": [{"Main": True}]}]
+        },
+        ("ec2", "DescribeSecurityGroups"): {
+            "SecurityGroups": [{"GroupId": "sg-1", "GroupName": "default"}]
+        },
+        ("ec2", "DescribeNetworkInterfaces"): {"NetworkInterfaces": []},
+        ("ec2", "DescribeSubnets"): {
+            "Subnets": [{"SubnetId": f"subnet-{index}"} for index in range(3)]
+        },
+        ("ec2", "DetachInternetGateway"): {},
+        ("ec2", "DeleteInternetGateway"): {},
+        ("ec2", "DeleteSubnet"): {},
+        ("ec2", "DeleteSecurityGroup"): {},
+        ("ec2", "DeleteVpc"): {},
+    }
+    return FakeAWS(responders, base_dynamodb(now))
+
+
+def enable_security_hub(now: datetime) -> FakeAWS:
+    dynamodb = base_dynamodb(now)
+    dynamodb.put("ConfigTable", item(pk="organization", sk="#index", refreshed_at=now))
+    for account_id, name in ((ACCOUNT_ID, ACCOUNT_NAME), (AUDIT_ACCOUNT_ID, "Audit")):
+        dynamodb.put(
+            "ConfigTable",
+            item(
+                pk="organization",
+                sk=account_id,
+                name=name,
+                email=f"{name.lower()}@example.com",
+            ),
+        )
+    responders = {
+        ("sts", "AssumeRole"): assume_role_responder,
+        # not a member yet, so the task is applied
+        ("securityhub", "GetMasterAccount"): {},
+        ("securityhub", "EnableSecurityHub"): {},
+        ("securityhub", "CreateMembers"): {"UnprocessedAccounts": []},
+        ("securityhub", "InviteMembers"): {"UnprocessedAccounts": []},
+        ("securityhub", "ListInvitations"): {
+            "Invitations": [{"AccountId": AUDIT_ACCOUNT_ID, "InvitationId": "inv-1"}]
+        },
+        ("securityhub", "AcceptInvitation"): {},
+    }
+    return FakeAWS(responders, dynamodb)
+
+
+def baseline(now: datetime) -> FakeAWS:
+    """
+    Every baseline task applied to the account in a single invocation
+    """
+    fake = enable_security_hub(now)
+    for task in (s3_public_block, route53_query_logs, delete_default_vpc):
+        fake.responders.update(task(now).responders)
+    return fake
+
+
+BACKFILL_ACCOUNTS = 4
+
+
+def baseline_backfill(now: datetime) -> FakeAWS:
+    """
+    Every baseline task applied to the accounts of the organization
+    """
+    fake = baseline(now)
+    accounts = [
+        {"Id": f"{300000000000 + index}", "Name": f"Account{index}", "Status": "ACTIVE"}
+        for index in range(BACKFILL_ACCOUNTS)
+    ]
+    for account in accounts:
+        fake.dynamodb.put(
+            "ConfigTable",
+            item(
+                pk="organization",
+                sk=account["Id"],
+                name=account["Name"],
+                email=f"{account['Name'].lower()}@example.com",
+            ),
+        )
+    fake.responders.update(
+        {
+            ("organizations", "ListAccounts"): {"Accounts": accounts},
+            ("organizations", "DescribeOrganization"): {
+                "Organization": {"MasterAccountId": "123456789012"}
+            },
+        }
+    )
+    return fake
+
+
+RECONCILE_ACCOUNTS = 1000
+RECONCILE_PAGE_SIZE = 100
+
+
+def reconcile(now: datetime) -> FakeAWS:
+    """
+    A table of provisioned accounts in which a few have missed their completion event,
+    a few QUEUED accounts lost their message and a few accounts were provisioned outside
+    the API
+    """
+    dynamodb = base_dynamodb(now)
+    created_at = now - timedelta(days=1)
+    products = []
+    members = []
+    for index in range(RECONCILE_ACCOUNTS):
+        name = f"Account{index:04d}"
+        account_id = f"{100000000000 + index}"
+        status = "IN_PROGRESS" if index % 50 == 1 else "SUCCEEDED"
+        if index % 100 == 2:
+            dynamodb.put(
+                "AccountTable",
+                account_item("QUEUED", now, account_name=name, queued_at=created_at),
+            )
+            continue
+        if index % 50 != 3:
+            dynamodb.put(
+                "AccountTable",
+                account_item(
+                    status,
+                    now,
+                    account_name=name,
+                    account_id=account_id,
+                    ou_id="ou-benchmark",
+                    record_id=f"rec-{index}",
+                    created_at=created_at,
+                    updated_at=created_at,
+                ),
+            )
+        products.append(
+            {
+                "Name": name,
+                "Id": f"pp-{index}",
+                "Status": "AVAILABLE",
+                "CreatedTime": created_at,
+                "LastRecordId": f"rec-{index}",
+                "LastProvisioningRecordId": f"rec-{index}",
+                "ProductName": "AWS Control Tower Account Factory",
+            }
+        )
+        members.append(
+            {
+                "Id": account_id,
+                "Name": name,
+                "Email": f"{name.lower()}@example.com",
+                "Status": "ACTIVE",
+            }
+        )
+
+    def search_provisioned_products(
+        params: Dict[str, Any], region: str
+    ) -> Dict[str, Any]:
+        start = int(params.get("PageToken", "0"))
+        end = start + params["PageSize"]
+        response = {"ProvisionedProducts": products[start:end]}
+        if end < len(products):
+            response["NextPageToken"] = str(end)
+        return response
+
+    def list_accounts_for_parent(params: Dict[str, Any], region: str) -> Dict[str, Any]:
+        if params["ParentId"] != "ou-benchmark":
+            return {"Accounts": []}
+        return {"Accounts": [dict(member) for member in members]}
+
+    def list_organizational_units_for_parent(
+        params: Dict[str, Any], region: str
+    ) -> Dict[str, Any]:
+        if params["ParentId"] != "r-benchmark":
+            return {"OrganizationalUnits": []}
+        return {"OrganizationalUnits": [{"Id": "ou-benchmark", "Name": "Custom"}]}
+
+    responders = {
+        ("servicecatalog", "SearchProvisionedProducts"): search_provisioned_products,
+        ("organizations", "ListRoots"): {
+            "Roots": [{"Id": "r-benchmark", "Name": "Root"}]
+        },
+        ("organizations", "ListOrganizationalUnitsForParent"): (
+            list_organizational_units_for_parent
+        ),
+        ("organizations", "ListAccountsForParent"): list_accounts_for_parent,
+        ("sqs", "SendMessageBatch"): {"Successful": [], "Failed": []},
+    }
+    return FakeAWS(responders, dynamodb)
+
+
+def sqs_event(body: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "Records": [
+            {
+                "messageId": "benchmark",
+                "receiptHandle": "receipt",
+                "body": json.dumps(body),
+                "attributes": {},
+                "messageAttributes": {},
+                "eventSource": "aws:sqs",
+                "eventSourceARN": "arn:aws:sqs:us-east-1:123456789012:AccountQueue.fifo",
+                "awsRegion": "us-east-1",
+            }
+        ]
+    }
+
+
+def baseline_event(
+    tasks: Optional[List[str]] = None, force: bool = False
+) -> Dict[str, Any]:
+    """
+    A baseline of a new account, or with force, of an account in which the baselines
+    are always applied again (the baseline state only skips them after the first
+    invocation otherwise)
+    """
+    event: Dict[str, Any] = {
+        "account": {"accountId": ACCOUNT_ID, "accountName": ACCOUNT_NAME}
+    }
+    if tasks:
+        event["tasks"] = tasks
+    if force:
+        event["force"] = True
+    return event
+
+
+def create_account_event() -> Dict[str, Any]:
+    return api_event(
+        routeKey="POST /v1/accounts",
+        body=json.dumps(load_event("create_account.json")),
+    )
+
+
+def account_event(method: str) -> Dict[str, Any]:
+    return api_event(
+        routeKey=f"{method} /v1/accounts/{{accountName}}",
+        pathParameters={"accountName": ACCOUNT_NAME},
+    )
+
+
+# requests to every route, each answered by the container warmed up by the others
+API_ROUTE_EVENTS = [
+    lambda: account_event("GET"),
+    create_account_event,
+    lambda: account_event("DELETE"),
+]
+
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "apigw_account_create": {
+        "path": "src",
+        "module": "apigw_router",
+        "handler": "lambda_handler",
+        "status": 202,
+        "event": create_account_event,
+        "fake": account_create,
+    },
+    "apigw_account_status": {
+        "path": "src",
+        "module": "apigw_router",
+        "handler": "lambda_handler",
+        "status": 200,
+        "event": lambda: account_event("GET"),
+        "fake": account_status,
+    },
+    "apigw_account_delete": {
+        "path": "src",
+        "module": "apigw_router",
+        "handler": "lambda_handler",
+        "status": 204,
+        "event": lambda: account_event("DELETE"),
+        "fake": account_delete,
+    },
+    "apigw_routes": {
+        "path": "src",
+        "module": "apigw_router",
+        "handler": "lambda_handler",
+        "status": 200,
+        "events": API_ROUTE_EVENTS,
+        "fake": api_routes,
+    },
+    "apigw_warmup": {
+        "path": "src",
+        "module": "apigw_router",
+        "handler": "lambda_handler",
+        "event": lambda: {"warmup": True},
+        "fake": api_routes,
+    },
+    "sqs_processor_queued": {
+        "path": "src",
+        "module": "sqs_processor",
+        "handler": "lambda_handler",
+        "event": lambda: sqs_event(load_event("create_account.json")),
+        "fake": queue_processor_queued,
+        # the message is kept in the queue by failing the batch until the account finishes
+        "raises": "SQSBatchProcessingError",
+    },
+    "sqs_processor_finished": {
+        "path": "src",
+        "module": "sqs_processor",
+        "handler": "lambda_handler",
+        "event": lambda: sqs_event(load_event("create_account.json")),
+        "fake": queue_processor_finished,
+    },
+    "eb_invoke_callback": {
+        "path": "src",
+        "module": "eb_invoke_callback",
+        "handler": "lambda_handler",
+        "event": lambda: load_event("invoke_callback.json"),
+        "fake": invoke_callback,
+    },
+    "eb_reconcile": {
+        "path": "src",
+        "module": "eb_reconcile",
+        "handler": "lambda_handler",
+        "event": lambda: {"source": "aws.events", "detail-type": "Scheduled Event"},
+        "fake": reconcile,
+    },
+    "s3_public_block": {
+        "path": "functions/baseline",
+        "module": "lambda_handler",
+        "handler": "handler",
+        "event": lambda: baseline_event(["s3_public_block"], force=True),
+        "fake": s3_public_block,
+        "result": "SUCCEEDED",
+    },
+    "route53_query_logs": {
+        "path": "functions/baseline",
+        "module": "lambda_handler",
+        "handler": "handler",
+        "event": lambda: baseline_event(["route53_query_logs"], force=True),
+        "fake": route53_query_logs,
+        "result": "SUCCEEDED",
+    },
+    "delete_default_vpc": {
+        "path": "functions/baseline",
+        "module": "lambda_handler",
+        "handler": "handler",
+        "event": lambda: baseline_event(["delete_default_vpc"], force=True),
+        "fake": delete_default_vpc,
+        "result": "SUCCEEDED",
+    },
+    "enable_security_hub": {
+        "path": "functions/baseline",
+        "module": "lambda_handler",
+        "handler": "handler",
+        "event": lambda: baseline_event(["enable_security_hub"], force=True),
+        "fake": enable_security_hub,
+        "result": "SUCCEEDED",
+    },
+    "baseline": {
+        "path": "functions/baseline",
+        "module": "lambda_handler",
+        "handler": "handler",
+        "event": baseline_event,
+        "fake": baseline,
+        "result": "SUCCEEDED",
+    },
+    "baseline_backfill": {
+        "path": "functions/baseline",
+        "module": "backfill",
+        "handler": "handler",
+        "event": lambda: {"job": "benchmark"},
+        "fake": baseline_backfill,
+    },
+}
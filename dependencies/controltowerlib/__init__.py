@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Helpers shared by every function through the dependency layer
+"""
+
+from .clients import get_client
+from .instrumentation import record_api_calls
+from .sts import STS, execution_role_arn
+from .warmup import warmup_handler
+
+__all__ = [
+    "STS",
+    "execution_role_arn",
+    "get_client",
+    "record_api_calls",
+    "warmup_handler",
+]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import os
+from typing import Any, Dict, Optional
+
+from aws_lambda_powertools import Logger
+import pynamodb
+from pynamodb.attributes import (
+    JSONAttribute,
+    TTLAttribute,
+    UnicodeAttribute,
+    UTCDateTimeAttribute,
+)
+from pynamodb.models import Model
+
+CONFIG_TABLE = os.environ["CONFIG_TABLE"]
+CHECKPOINT_PK = "checkpoint"
+CHECKPOINT_TTL = timedelta(days=1)  # a job not resumed by then starts over
+logger = Logger(child=True)
+
+__all__ = ["Checkpoint", "CheckpointModel"]
+
+
+class CheckpointModel(Model):
+    """
+    Progress of a job that did not finish within a single invocation
+    """
+
+    class Meta:
+        table_name = CONFIG_TABLE
+
+    pk = UnicodeAttribute(hash_key=True)
+    sk = UnicodeAttribute(range_key=True)
+
+    cursor = UnicodeAttribute()
+    progress = JSONAttribute(null=True)  # totals of the job so far
+    started_at = UTCDateTimeAttribute()
+    updated_at = UTCDateTimeAttribute()
+    expires_at = TTLAttribute()
+
+
+class Checkpoint:
+    """
+    Resume a job that works through keys in sorted order from the last key it completed.
+    Work must be safe to repeat, as a job that times out before saving its checkpoint
+    does the unsaved part again.
+
+    A job can also save its progress (for example the totals it reports when it
+    finishes), which ``load`` restores along with the cursor.
+    """
+
+    def __init__(self, job: str, ttl: timedelta = CHECKPOINT_TTL) -> None:
+        self.job = job
+        self.ttl = ttl
+        self.started_at: Optional[datetime] = None
+        self.progress: Dict[str, Any] = {}
+
+    def load(self, now: datetime) -> Optional[str]:
+        """
+        Return the last key completed by an unfinished run, or None to start over
+        """
+        self.started_at = now
+        self.progress = {}
+        try:
+            item = CheckpointModel.get(CHECKPOINT_PK, self.job, consistent_read=True)
+        except CheckpointModel.DoesNotExist:
+            return None
+        except pynamodb.exceptions.GetError:
+            logger.exception(f"Unable to load checkpoint of {self.job}")
+            return None
+
+        # DynamoDB deletes expired items lazily, so expiration is checked here as well
+        if item.expires_at <= now:
+            logger.info(f"Checkpoint of {self.job} has expired, starting over")
+            return None
+
+        self.started_at = item.started_at
+        self.progress = item.progress or {}
+        logger.info(f"Resuming {self.job} after '{item.cursor}'")
+        return item.cursor
+
+    def save(
+        self, cursor: str, now: datetime, progress: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Record the last key completed, for the next invocation to resume from
+        """
+        if progress is not None:
+            self.progress = progress
+        item = CheckpointModel(
+            CHECKPOINT_PK,
+            self.job,
+            cursor=cursor,
+            progress=self.progress or None,
+            started_at=self.started_at or now,
+            updated_at=now,
+            expires_at=now + self.ttl,
+        )
+        try:
+            item.save()
+        except pynamodb.exceptions.PutError as error:
+            logger.exception(f"Unable to save checkpoint of {self.job}")
+            raise error
+        logger.info(f"Saved checkpoint of {self.job} at '{cursor}'")
+
+    def clear(self) -> None:
+        """
+        Forget the progress of a finished run
+        """
+        try:
+            CheckpointModel(CHECKPOINT_PK, self.job).delete()
+        except pynamodb.exceptions.DeleteError:
+            logger.exception(f"Unable to delete checkpoint of {self.job}")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+from .instrumentation import RECORDER
+
+DEFAULT_IDENTITY = "default"  # the function's own credentials
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+MAX_ATTEMPTS = 10
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, str, str, int], Any] = {}
+
+
+def get_config(max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS) -> Config:
+    """
+    Return the client configuration, with adaptive retries and a connection pool sized
+    for the number of threads sharing the client
+    """
+    return Config(
+        retries={"mode": "adaptive", "max_attempts": MAX_ATTEMPTS},
+        max_pool_connections=max_pool_connections,
+    )
+
+
+def get_client(
+    service_name: str,
+    region_name: Optional[str] = None,
+    session: Optional[boto3.Session] = None,
+    identity: str = DEFAULT_IDENTITY,
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+) -> Any:
+    """
+    Return a client from the process-wide registry, creating it on first use.
+
+    Clients are keyed by service, region, credential identity and connection pool size,
+    so they survive warm invocations and a caller asking for a larger pool than an
+    earlier caller gets one. A session must be given for any identity other than the
+    default one.
+    """
+    key = (service_name, region_name or "", identity, max_pool_connections)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    # boto3 sessions are not thread safe, so clients are only created under the lock
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if session is None:
+                if boto3.DEFAULT_SESSION is None:
+                    boto3.setup_default_session()
+                session = boto3.DEFAULT_SESSION
+            client = session.client(
+                service_name,
+                region_name=region_name,
+                config=get_config(max_pool_connections),
+            )
+            RECORDER.register(client)
+            _clients[key] = client
+    return client
+
+
+def discard_clients(identity: str) -> None:
+    """
+    Drop the clients of a credential identity that is no longer used, so a process
+    working through many accounts does not keep every client it created
+    """
+    with _lock:
+        for key in [key for key in _clients if key[2] == identity]:
+            del _clients[key]
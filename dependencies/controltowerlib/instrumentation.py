@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import MetricUnit, single_metric
+
+# error codes botocore treats as throttling (see botocore.retries.standard)
+THROTTLE_ERROR_CODES = {
+    "BandwidthLimitExceeded",
+    "EC2ThrottledException",
+    "LimitExceededException",
+    "PriorRequestNotComplete",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "RequestThrottledException",
+    "SlowDown",
+    "ThrottledException",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "TransactionInProgressException",
+}
+START_KEY = "api_call_started_at"
+SERVICE_KEY = "api_call_service_name"
+logger = Logger(child=True)
+
+__all__ = ["ApiCallRecorder", "RECORDER", "record_api_calls"]
+
+
+class ApiCallStats:
+    __slots__ = ("calls", "latency", "retries", "throttles", "errors")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.latency = 0.0  # milliseconds
+        self.retries = 0
+        self.throttles = 0
+        self.errors = 0
+
+
+class ApiCallRecorder:
+    """
+    Record the AWS API calls of an invocation through botocore's event system: the
+    number of calls, their latency, retry attempts and throttled attempts per service and
+    operation. Only a few dictionary updates are made per call, so it stays enabled
+    whether or not tracing is.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], ApiCallStats] = defaultdict(ApiCallStats)
+        self._pending: Dict[Any, float] = {}
+        self._signals_connected = False
+
+    def register(self, client: Any) -> None:
+        """
+        Register the recorder on a botocore client
+        """
+        events = client.meta.events
+        # first, so the call is timed even if another handler answers it
+        events.register_first("before-call", self._before_call)
+        events.register("after-call", self._after_call)
+        events.register("after-call-error", self._after_call_error)
+        events.register("needs-retry", self._needs_retry)
+
+    def register_pynamodb(self) -> None:
+        """
+        Record PynamoDB requests, which bypass botocore's client events, through its
+        send signals. The signals are only sent if blinker is installed.
+        """
+        from pynamodb.signals import (
+            post_dynamodb_send,
+            pre_dynamodb_send,
+            signals_available,
+        )
+
+        if self._signals_connected or not signals_available:
+            return
+        pre_dynamodb_send.connect(self._pre_dynamodb_send, weak=False)
+        post_dynamodb_send.connect(self._post_dynamodb_send, weak=False)
+        self._signals_connected = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._pending.clear()
+
+    def snapshot(self) -> Dict[Tuple[str, str], ApiCallStats]:
+        with self._lock:
+            return dict(self._stats)
+
+    def flush(self, metrics: Any) -> None:
+        """
+        Add the recorded calls to a Powertools Metrics object and start over.
+
+        The totals of the invocation are added to the Metrics object. The calls of each
+        service and operation are published under the same metric names with AwsService
+        and Operation dimensions, through a Powertools single metric each, as every
+        metric in an EMF document shares the same dimensions. Powertools validates every
+        single metric against the EMF schema, which takes about 10ms, so only ApiCalls,
+        and retries, throttles and errors when there are some, are published per
+        operation. Latency is only published for the invocation.
+        """
+        stats = self.snapshot()
+        self.reset()
+        if not stats:
+            return
+
+        totals = ApiCallStats()
+        for (service, operation), stat in sorted(stats.items()):
+            for name, unit, value in self._metric_values(stat):
+                if value and name != "ApiCallLatency":
+                    with single_metric(
+                        name=name, unit=unit, value=value, namespace=metrics.namespace
+                    ) as metric:
+                        metric.add_dimension(name="AwsService", value=service)
+                        metric.add_dimension(name="Operation", value=operation)
+            totals.calls += stat.calls
+            totals.latency += stat.latency
+            totals.retries += stat.retries
+            totals.throttles += stat.throttles
+            totals.errors += stat.errors
+
+        for name, unit, value in self._metric_values(totals):
+            metrics.add_metric(name=name, unit=unit, value=value)
+
+    @staticmethod
+    def _metric_values(stat: ApiCallStats) -> List[Tuple[str, MetricUnit, float]]:
+        return [
+            ("ApiCalls", MetricUnit.Count, stat.calls),
+            ("ApiCallLatency", MetricUnit.Milliseconds, round(stat.latency, 3)),
+            ("ApiCallRetries", MetricUnit.Count, stat.retries),
+            ("ApiCallThrottles", MetricUnit.Count, stat.throttles),
+            ("ApiCallErrors", MetricUnit.Count, stat.errors),
+        ]
+
+    def _record(
+        self,
+        service: str,
+        operation: str,
+        started_at: float,
+        retries: int = 0,
+        error: bool = False,
+    ) -> None:
+        elapsed = (time.perf_counter() - started_at) * 1000 if started_at else 0.0
+        with self._lock:
+            stat = self._stats[(service, operation)]
+            stat.calls += 1
+            stat.latency += elapsed
+            stat.retries += retries
+            stat.errors += int(error)
+
+    def _before_call(self, model: Any, context: Dict[str, Any], **kwargs) -> None:
+        context[START_KEY] = time.perf_counter()
+        # after-call-error only names the service by its ID, e.g. secrets-manager
+        context[SERVICE_KEY] = model.service_model.service_name
+
+    def _after_call(
+        self, model: Any, parsed: Dict[str, Any], context: Dict[str, Any], **kwargs
+    ) -> None:
+        retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        self._record(
+            model.service_model.service_name,
+            model.name,
+            context.get(START_KEY),
+            retries=retries,
+            error="Error" in parsed,
+        )
+
+    def _after_call_error(
+        self, context: Dict[str, Any], event_name: str, **kwargs
+    ) -> None:
+        # after-call-error.<service-id>.<operation>, without the operation model
+        _, service_id, operation = event_name.split(".", 2)
+        service = context.get(SERVICE_KEY, service_id)
+        self._record(service, operation, context.get(START_KEY), error=True)
+
+    def _needs_retry(
+        self, operation: Any, response: Tuple[Any, Dict[str, Any]] = None, **kwargs
+    ) -> None:
+        if not response:
+            return
+        code = response[1].get("Error", {}).get("Code")
+        if code in THROTTLE_ERROR_CODES:
+            with self._lock:
+                key = (operation.service_model.service_name, operation.name)
+                self._stats[key].throttles += 1
+
+    def _pre_dynamodb_send(self, sender: Any, req_uuid: Any, **kwargs) -> None:
+        with self._lock:
+            self._pending[req_uuid] = time.perf_counter()
+
+    def _post_dynamodb_send(
+        self, sender: Any, operation_name: str, req_uuid: Any, **kwargs
+    ) -> None:
+        with self._lock:
+            started_at = self._pending.pop(req_uuid, None)
+        self._record("dynamodb", operation_name, started_at)
+
+
+# shared by every client of the process
+RECORDER = ApiCallRecorder()
+
+
+def record_api_calls(metrics: Any) -> Callable:
+    """
+    Decorate a Lambda handler to add the AWS API calls of each invocation to a Powertools
+    Metrics object. Apply it below ``metrics.log_metrics`` so the metrics are added before
+    they are flushed.
+    """
+    RECORDER.register_pynamodb()
+
+    def decorator(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        def wrapper(event: Dict[str, Any], context: Any) -> Any:
+            RECORDER.reset()
+            try:
+                return handler(event, context)
+            finally:
+                try:
+                    RECORDER.flush(metrics)
+                except Exception:
+                    logger.exception("Unable to record AWS API call metrics")
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+import boto3
+import botocore.loaders
+import botocore.session
+from botocore.credentials import RefreshableCredentials
+
+from .clients import DEFAULT_MAX_POOL_CONNECTIONS, discard_clients, get_client
+
+EXECUTION_ROLE_NAME = "AWSControlTowerExecution"
+logger = Logger(child=True)
+
+# service models are read once per process rather than once per assumed role
+_data_loader = botocore.loaders.create_loader()
+
+
+def execution_role_arn(account_id: str) -> str:
+    """
+    Return the ARN of the Control Tower execution role in an account
+    """
+    return f"arn:aws:iam::{account_id}:role/{EXECUTION_ROLE_NAME}"
+
+
+class STS:
+    """
+    Credential broker that caches assumed-role sessions by role ARN and session name.
+
+    Sessions carry refreshable credentials, so a long running operation, or a session
+    left idle in a warm container, keeps working past the expiry of the credentials it
+    started with. A cached session is therefore never replaced, and the clients created
+    from it stay valid. Safe to share between threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, str], boto3.Session] = {}
+
+    @property
+    def client(self) -> Any:
+        return get_client("sts")
+
+    def assume_role(self, role_arn: str, role_session_name: str) -> boto3.Session:
+        """
+        Return a boto3 session for a role, assuming it unless it is cached
+        """
+        key = (role_arn, role_session_name)
+        with self._lock:
+            cached = self._sessions.get(key)
+            if cached:
+                return cached
+
+            logger.debug(f"Assuming {role_arn} as {role_session_name}")
+
+            def fetch() -> Dict[str, str]:
+                response = self.client.assume_role(
+                    RoleArn=role_arn, RoleSessionName=role_session_name
+                )
+                credentials = response["Credentials"]
+                return {
+                    "access_key": credentials["AccessKeyId"],
+                    "secret_key": credentials["SecretAccessKey"],
+                    "token": credentials["SessionToken"],
+                    "expiry_time": credentials["Expiration"].isoformat(),
+                }
+
+            credentials = RefreshableCredentials.create_from_metadata(
+                metadata=fetch(), refresh_using=fetch, method="sts-assume-role"
+            )
+            botocore_session = botocore.session.get_session()
+            botocore_session.register_component("data_loader", _data_loader)
+            botocore_session._credentials = credentials
+            session = boto3.session.Session(botocore_session=botocore_session)
+
+            self._sessions[key] = session
+            return session
+
+    def get_client(
+        self,
+        role_arn: str,
+        role_session_name: str,
+        service_name: str,
+        region_name: Optional[str] = None,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    ) -> Any:
+        """
+        Return a client for a role from the client registry, which can then be used from
+        any thread
+        """
+        session = self.assume_role(role_arn, role_session_name)
+        return get_client(
+            service_name,
+            region_name,
+            session=session,
+            identity=self._identity(role_arn, role_session_name),
+            max_pool_connections=max_pool_connections,
+        )
+
+    def release(self, role_arn: str, role_session_name: str) -> None:
+        """
+        Forget the session of a role and the clients created from it
+        """
+        with self._lock:
+            self._sessions.pop((role_arn, role_session_name), None)
+        discard_clients(self._identity(role_arn, role_session_name))
+
+    @staticmethod
+    def _identity(role_arn: str, role_session_name: str) -> str:
+        return f"{role_arn}#{role_session_name}"
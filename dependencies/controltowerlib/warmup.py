@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import functools
+import time
+from typing import Any, Callable, Dict
+
+from aws_lambda_powertools import Logger
+
+from .clients import DEFAULT_MAX_POOL_CONNECTIONS, get_client
+
+WARMUP_KEY = "warmup"  # a warm-up event is {"warmup": true}
+logger = Logger(child=True)
+
+__all__ = [
+    "create_clients",
+    "describe_tables",
+    "is_warmup",
+    "warm_up",
+    "warmup_handler",
+]
+
+
+def is_warmup(event: Any) -> bool:
+    """
+    Return whether an event is a warm-up ping rather than a request
+    """
+    return isinstance(event, dict) and event.get(WARMUP_KEY) is True
+
+
+def create_clients(
+    *service_names: str, max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS
+) -> Callable[[], None]:
+    """
+    Return a warm-up step creating the pooled clients of some services
+    """
+
+    def step() -> None:
+        for service_name in service_names:
+            get_client(service_name, max_pool_connections=max_pool_connections)
+
+    return step
+
+
+def describe_tables(*models: Any) -> Callable[[], None]:
+    """
+    Return a warm-up step opening the connection of some PynamoDB models, which
+    describes their table once and caches its key schema for every later request
+    """
+
+    def step() -> None:
+        for model in models:
+            model._get_connection().get_meta_table()
+
+    return step
+
+
+def warm_up(steps: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Run warm-up steps in order and return the time each took. A failed step is logged
+    and reported, and the next step still runs, as a request would only pay for it later.
+    """
+    started = time.perf_counter()
+    results = {}
+    for name, step in steps.items():
+        step_started = time.perf_counter()
+        try:
+            step()
+            status = "OK"
+        except Exception:
+            logger.exception(f"Unable to warm up {name}")
+            status = "FAILED"
+        results[name] = {
+            "status": status,
+            "duration_ms": round((time.perf_counter() - step_started) * 1000, 1),
+        }
+
+    return {
+        "warmup": True,
+        "steps": results,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def warmup_handler(**steps: Callable[[], Any]) -> Callable:
+    """
+    Decorator answering warm-up events by running the given steps, which initialize
+    what a request would otherwise initialize lazily, instead of the handler.
+
+    Apply it above the Logger and Tracer decorators, so a warm-up event is neither
+    logged in full nor traced, and below ``log_metrics``, so the cold start is counted
+    on the warm-up rather than on the first request after it.
+    """
+
+    def decorator(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        def wrapper(event: Any, context: Any) -> Any:
+            if not is_warmup(event):
+                return handler(event, context)
+
+            result = warm_up(steps)
+            logger.info(result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Apply the baseline tasks to existing accounts: every account of the organization, the
+accounts of some organizational units, or a list of accounts. A checkpoint is saved
+after every batch of accounts, so a run resumes after the last completed batch. A run
+that approaches the Lambda timeout stops and returns "complete": false, and the backfill
+state machine invokes it again with the same event until it completes.
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import os
+from typing import Dict, Any, List
+import warnings
+
+from aws_lambda_powertools import Logger, Metrics, Tracer
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from controltowerlib import STS, record_api_calls, warmup_handler
+from controltowerlib.checkpoint import Checkpoint, CheckpointModel
+from controltowerlib.warmup import create_clients, describe_tables
+
+from engine import Engine, TaskContext, get_enabled_regions
+from organizations import OrganizationAccountModel, Organizations
+from state import BaselineStateModel
+import tasks  # noqa: F401 (registers every task)
+from throttle import RateLimiter
+
+warnings.filterwarnings("ignore", "No metrics to publish*")
+
+tracer = Tracer(patch_modules=["botocore", "pynamodb"])
+logger = Logger()
+metrics = Metrics()
+sts = STS()
+engine = Engine()
+limiter = RateLimiter()
+
+DEFAULT_JOB = "default"
+MAX_ACCOUNTS = int(os.environ.get("MAX_ACCOUNTS", 8))  # accounts worked on at once
+# regions worked on at once across all accounts
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", 32))
+TIME_MARGIN_MS = int(os.environ.get("TIME_MARGIN_MS", 300000))
+
+
+def select_accounts(event: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Return the accounts of a backfill sorted by ID, which is the order a checkpoint
+    resumes in
+    """
+    if event.get("accounts"):
+        accounts = [{"Id": account_id} for account_id in set(event["accounts"])]
+    else:
+        accounts = Organizations().list_accounts(event.get("organizational_units"))
+    return sorted(accounts, key=lambda account: account["Id"])
+
+
+def run_account(
+    account: Dict[str, Any], event: Dict[str, Any], executor: ThreadPoolExecutor
+) -> Dict[str, Any]:
+    task_context = TaskContext(account["Id"], account.get("Name"), sts, limiter)
+    try:
+        return engine.run(
+            task_context,
+            event.get("tasks"),
+            event.get("regions"),
+            executor,
+            event.get("force", False),
+        )
+    finally:
+        # the clients of an account are not used again by this backfill
+        task_context.release()
+
+
+@metrics.log_metrics(capture_cold_start_metric=True)
+@record_api_calls(metrics)
+@warmup_handler(
+    tables=describe_tables(
+        BaselineStateModel, CheckpointModel, OrganizationAccountModel
+    ),
+    clients=create_clients("ec2", "organizations", "sts"),
+    regions=get_enabled_regions,
+)
+@tracer.capture_lambda_handler
+@logger.inject_lambda_context(log_event=True)
+def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Apply the baseline tasks to a set of existing accounts.
+
+    The event selects the accounts with "accounts" (a list of account IDs) or
+    "organizational_units" (a list of OU IDs), and otherwise applies to every account of
+    the organization. Like the baseline function, "tasks" and "regions" limit the tasks
+    and regions applied, and "force" applies tasks already in place. Backfills with a
+    different "job" name keep separate checkpoints.
+    """
+
+    job = event.get("job", DEFAULT_JOB)
+    engine.select(event.get("tasks"))  # fail before any work on unknown tasks
+
+    checkpoint = Checkpoint(f"backfill#{job}")
+    cursor = checkpoint.load(datetime.now(timezone.utc))
+    progress = checkpoint.progress or {
+        "succeeded": 0,
+        "failed": 0,
+        "failed_accounts": {},
+    }
+
+    accounts = select_accounts(event)
+    if cursor:
+        accounts = [account for account in accounts if account["Id"] > cursor]
+    logger.info(f"Applying the baseline to {len(accounts)} accounts")
+
+    previous = dict(progress)
+    totals: Counter = Counter()  # accounts of this invocation
+    complete = True
+    with ThreadPoolExecutor(
+        max_workers=MAX_ACCOUNTS
+    ) as account_executor, ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENCY
+    ) as region_executor:
+        for start in range(0, len(accounts), MAX_ACCOUNTS):
+            if start and context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+                complete = False
+                break
+
+            batch = accounts[start : start + MAX_ACCOUNTS]
+            results = account_executor.map(
+                lambda account: run_account(account, event, region_executor), batch
+            )
+            for result in results:
+                if result["status"] == "SUCCEEDED":
+                    totals["succeeded"] += 1
+                else:
+                    totals["failed"] += 1
+                    progress["failed_accounts"][result["account_id"]] = result[
+                        "failed_tasks"
+                    ]
+            progress["succeeded"] = previous["succeeded"] + totals["succeeded"]
+            progress["failed"] = previous["failed"] + totals["failed"]
+
+            # the last batch clears the checkpoint instead
+            if start + MAX_ACCOUNTS < len(accounts):
+                cursor = batch[-1]["Id"]
+                checkpoint.save(cursor, datetime.now(timezone.utc), progress)
+
+    if complete and cursor is not None:
+        checkpoint.clear()
+
+    metrics.add_metric(
+        name="BackfillAccountsSucceeded",
+        unit=MetricUnit.Count,
+        value=totals["succeeded"],
+    )
+    metrics.add_metric(
+        name="BackfillAccountsFailed", unit=MetricUnit.Count, value=totals["failed"]
+    )
+
+    summary = {"job": job, "complete": complete}
+    summary.update(progress)
+    logger.info(summary)
+    return summary
@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Baseline engine: every baseline is a Task registered with @register, and a run applies
+the registered tasks to one account concurrently, with a single role assumption and the
+same pooled clients shared by every task.
+"""
+
+import abc
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from aws_lambda_powertools import Logger
+from controltowerlib import STS, execution_role_arn, get_client
+from controltowerlib.clients import DEFAULT_MAX_POOL_CONNECTIONS
+
+from state import BaselineState, config_hash
+from throttle import RateLimiter
+
+GLOBAL_REGION = "global"  # result key of tasks that are not applied per region
+MAX_REGION_WORKERS = 32
+SESSION_NAME = "baseline"
+logger = Logger(child=True)
+
+__all__ = [
+    "GLOBAL_REGION",
+    "TASKS",
+    "Engine",
+    "Task",
+    "TaskContext",
+    "get_enabled_regions",
+    "register",
+]
+
+# registered tasks by name, in registration order
+TASKS: Dict[str, "Task"] = {}
+
+_regions_lock = threading.Lock()
+_enabled_regions: Optional[List[str]] = None
+
+
+def get_enabled_regions() -> List[str]:
+    """
+    Return the regions enabled by default (those that do not require an opt-in), which
+    are the same for every account so they are only described once per container
+    """
+    global _enabled_regions
+    with _regions_lock:
+        if _enabled_regions is None:
+            response = get_client("ec2").describe_regions(
+                Filters=[{"Name": "opt-in-status", "Values": ["opt-in-not-required"]}],
+                AllRegions=False,
+            )
+            _enabled_regions = [region["RegionName"] for region in response["Regions"]]
+        return _enabled_regions
+
+
+class TaskContext:
+    """
+    The account a run applies to, and the clients every task shares to reach it
+    """
+
+    def __init__(
+        self,
+        account_id: str,
+        account_name: str = None,
+        sts: STS = None,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.account_id = account_id
+        self.account_name = account_name
+        self.sts = sts or STS()
+        self.limiter = limiter
+
+    def client(
+        self,
+        service_name: str,
+        region_name: Optional[str] = None,
+        account_id: Optional[str] = None,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    ) -> Any:
+        """
+        Return a client that uses the execution role of the account (or of another
+        account), assuming it only once for every task of the run
+        """
+        account_id = account_id or self.account_id
+        client = self.sts.get_client(
+            execution_role_arn(account_id),
+            SESSION_NAME,
+            service_name,
+            region_name,
+            max_pool_connections=max_pool_connections,
+        )
+        if self.limiter is not None:
+            self.limiter.register(client, account_id)
+        return client
+
+    def release(self) -> None:
+        """
+        Drop the session and clients of the account once the run is done with it
+        """
+        self.sts.release(execution_role_arn(self.account_id), SESSION_NAME)
+        if self.limiter is not None:
+            self.limiter.release(self.account_id)
+
+
+class Task(abc.ABC):
+    """
+    A baseline applied to an account. Subclasses must implement ``apply``, so a task
+    without it fails when it is registered rather than when it runs.
+
+    Attributes
+    ----------
+    name: str
+        Unique name of the task, used as its key in the results
+    depends_on: tuple
+        Names of the tasks that must succeed before this task starts
+    regional: bool
+        Whether the task is applied once per region (see ``regions``) or once for the
+        account
+    idempotent: bool
+        Whether applying the task again after a partial failure is safe, so the state
+        machine may retry it
+    version: int
+        Version of what ``apply`` does, to bump when it changes so that the task is
+        applied again in accounts where its configuration has not changed
+    """
+
+    name: str = ""
+    depends_on: Sequence[str] = ()
+    regional: bool = False
+    idempotent: bool = True
+    version: int = 1
+
+    def regions(self, context: TaskContext) -> List[str]:
+        """
+        Return the regions to apply a regional task in
+        """
+        return get_enabled_regions()
+
+    def prepare(self, context: TaskContext) -> Any:
+        """
+        Do the work shared by every region once, returning a value passed to ``apply``
+        """
+        return None
+
+    def config(self, context: TaskContext, region: Optional[str], prepared: Any) -> Any:
+        """
+        Return the configuration the task puts in place, which is hashed into the
+        baseline state of the account so that a change applies the task again
+        """
+        return None
+
+    def check(self, context: TaskContext, region: Optional[str], prepared: Any) -> bool:
+        """
+        Return whether the configuration is already in place, reading it with as few
+        calls as possible. Tasks that cannot tell always apply.
+        """
+        return False
+
+    @abc.abstractmethod
+    def apply(
+        self, context: TaskContext, region: Optional[str], prepared: Any
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Apply the task to the account in a region (None for tasks that are not
+        regional), returning optional details to add to the result
+        """
+
+
+def register(cls: Type[Task]) -> Type[Task]:
+    """
+    Class decorator registering a task with the engine
+    """
+    if not cls.name:
+        raise Exception(f"Task {cls.__name__} has no name")
+    if cls.name in TASKS:
+        raise Exception(f"Task {cls.name} is already registered")
+    TASKS[cls.name] = cls()
+    return cls
+
+
+def elapsed_ms(start: float) -> int:
+    return int((time.monotonic() - start) * 1000)
+
+
+class Engine:
+    """
+    Run tasks against an account, starting each task as soon as the tasks it depends on
+    have succeeded. Tasks whose dependencies did not succeed are skipped.
+
+    The configuration a task put in place in each region is recorded in the baseline
+    state of the account. Until the record expires, a task whose configuration has not
+    changed is skipped ("action": "CACHED"). Otherwise the task first checks whether the
+    configuration is in place ("COMPLIANT") and only applies it if not ("APPLIED").
+    """
+
+    def __init__(
+        self,
+        tasks: Dict[str, Task] = TASKS,
+        max_region_workers: int = MAX_REGION_WORKERS,
+    ) -> None:
+        self.tasks = tasks
+        self.max_region_workers = max_region_workers
+
+    def select(self, names: Optional[List[str]] = None) -> List[str]:
+        """
+        Return the tasks to run, all of them unless names are given
+        """
+        if not names:
+            return list(self.tasks)
+        unknown = [name for name in names if name not in self.tasks]
+        if unknown:
+            raise Exception(f"Unknown baseline tasks: {unknown}")
+        return [name for name in self.tasks if name in names]
+
+    def run(
+        self,
+        context: TaskContext,
+        names: Optional[List[str]] = None,
+        regions: Optional[List[str]] = None,
+        region_executor: Optional[ThreadPoolExecutor] = None,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Run tasks against an account, returning a result document with the status of
+        each task in each region.
+
+        Only the named tasks run if names are given, and their dependencies outside of
+        that list are assumed to have succeeded before (a retry of the failed tasks of
+        a previous run). Regional tasks only run in the given regions if any.
+
+        Runs against several accounts can share a region executor, which then caps the
+        number of regions being worked on across all of them. Forced runs apply every
+        task regardless of the baseline state.
+        """
+        if region_executor is None:
+            with ThreadPoolExecutor(max_workers=self.max_region_workers) as executor:
+                return self.run(context, names, regions, executor, force)
+
+        selected = self.select(names)
+        state = BaselineState(context.account_id)
+        if not force:
+            state.load()
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = list(selected)
+        running: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=len(selected) or 1) as task_executor:
+            while pending or running:
+                for name in list(pending):
+                    dependencies = [
+                        dependency
+                        for dependency in self.tasks[name].depends_on
+                        if dependency in selected
+                    ]
+                    if any(
+                        dependency in results
+                        and results[dependency]["status"] != "SUCCEEDED"
+                        for dependency in dependencies
+                    ):
+                        logger.warning(f"Skipping {name}, a dependency did not succeed")
+                        results[name] = self._result(name, "SKIPPED")
+                        pending.remove(name)
+                    elif all(dependency in results for dependency in dependencies):
+                        future = task_executor.submit(
+                            self._run_task,
+                            name,
+                            context,
+                            regions,
+                            region_executor,
+                            state,
+                            force,
+                        )
+                        running[future] = name
+                        pending.remove(name)
+
+                if not running:
+                    # remaining tasks depend on each other
+                    for name in pending:
+                        results[name] = self._result(name, "SKIPPED")
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[running.pop(future)] = future.result()
+
+        state.save()
+        failed = [name for name in selected if results[name]["status"] != "SUCCEEDED"]
+        return {
+            "account_id": context.account_id,
+            "status": "FAILED" if failed else "SUCCEEDED",
+            "tasks": {name: results[name] for name in selected},
+            "failed_tasks": failed,
+            "retryable_tasks": [name for name in failed if self.tasks[name].idempotent],
+        }
+
+    def _result(self, name: str, status: str, **values: Any) -> Dict[str, Any]:
+        result = {"status": status, "idempotent": self.tasks[name].idempotent}
+        result.update(values)
+        return result
+
+    def _run_task(
+        self,
+        name: str,
+        context: TaskContext,
+        regions: Optional[List[str]],
+        executor: ThreadPoolExecutor,
+        state: BaselineState,
+        force: bool,
+    ) -> Dict[str, Any]:
+        task = self.tasks[name]
+        start = time.monotonic()
+
+        try:
+            prepared = task.prepare(context)
+            if task.regional:
+                task_regions = regions or task.regions(context)
+            else:
+                task_regions = [None]
+        except Exception as error:
+            logger.exception(f"Unable to prepare {name} in {context.account_id}")
+            return self._result(
+                name, "FAILED", error=str(error), duration_ms=elapsed_ms(start)
+            )
+
+        def apply(region: Optional[str]) -> Dict[str, Any]:
+            region_name = region or GLOBAL_REGION
+            region_start = time.monotonic()
+            result: Dict[str, Any] = {"status": "SUCCEEDED"}
+            try:
+                config = task.config(context, region, prepared)
+                digest = config_hash(task.version, config)
+                now = datetime.now(timezone.utc)
+                if not force and state.is_current(name, region_name, digest, now):
+                    result["action"] = "CACHED"
+                elif not force and task.check(context, region, prepared):
+                    result["action"] = "COMPLIANT"
+                    state.record(name, region_name, digest, False, now)
+                else:
+                    result.update(task.apply(context, region, prepared) or {})
+                    result["action"] = "APPLIED"
+                    now = datetime.now(timezone.utc)
+                    state.record(name, region_name, digest, True, now)
+            except Exception as error:
+                logger.exception(
+                    f"Unable to apply {name} in {context.account_id} in {region_name}"
+                )
+                result = {"status": "FAILED", "error": str(error)}
+            result["duration_ms"] = elapsed_ms(region_start)
+            return result
+
+        futures = {
+            region or GLOBAL_REGION: executor.submit(apply, region)
+            for region in task_regions
+        }
+        region_results = {region: future.result() for region, future in futures.items()}
+
+        failed = any(
+            result["status"] != "SUCCEEDED" for result in region_results.values()
+        )
+        return self._result(
+            name,
+            "FAILED" if failed else "SUCCEEDED",
+            regions=region_results,
+            duration_ms=elapsed_ms(start),
+        )
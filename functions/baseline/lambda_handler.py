@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Any
+import warnings
+
+from aws_lambda_powertools import Logger, Metrics, Tracer
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from controltowerlib import STS, record_api_calls, warmup_handler
+from controltowerlib.warmup import create_clients, describe_tables
+
+from engine import Engine, TaskContext, get_enabled_regions
+from organizations import OrganizationAccountModel
+from state import BaselineStateModel
+import tasks  # noqa: F401 (registers every task)
+
+warnings.filterwarnings("ignore", "No metrics to publish*")
+
+tracer = Tracer(patch_modules=["botocore", "pynamodb"])
+logger = Logger()
+metrics = Metrics()
+sts = STS()
+engine = Engine()
+
+
+@metrics.log_metrics(capture_cold_start_metric=True)
+@record_api_calls(metrics)
+@warmup_handler(
+    tables=describe_tables(BaselineStateModel, OrganizationAccountModel),
+    clients=create_clients("ec2", "sts"),
+    regions=get_enabled_regions,
+)
+@tracer.capture_lambda_handler
+@logger.inject_lambda_context(log_event=True)
+def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Apply every baseline task to a new account.
+
+    Passing "tasks" in the event (for example the "retryable_tasks" of a previous
+    result) runs only those tasks, and "regions" limits regional tasks to those regions.
+    With "force", tasks are applied even if the baseline state shows them in place.
+    """
+
+    account = event.get("account", {})
+    account_id = account.get("accountId")
+    if not account_id:
+        raise Exception("Account ID not found in event")
+
+    task_context = TaskContext(account_id, account.get("accountName"), sts)
+    result = engine.run(
+        task_context,
+        event.get("tasks"),
+        event.get("regions"),
+        force=event.get("force", False),
+    )
+
+    metrics.add_metric(
+        name="BaselineTasksFailed",
+        unit=MetricUnit.Count,
+        value=len(result["failed_tasks"]),
+    )
+    if result["failed_tasks"]:
+        logger.warn(f"Baseline tasks failed in {account_id}: {result['failed_tasks']}")
+
+    # the state machine retries failed tasks with the same account
+    result["account"] = account
+    return result
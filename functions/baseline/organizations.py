@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from aws_lambda_powertools import Logger
+from controltowerlib import get_client
+from pynamodb.attributes import UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.models import Model
+
+CT_AUDIT_ACCOUNT_NAME = "Audit"
+CONFIG_TABLE = os.environ["CONFIG_TABLE"]
+INDEX_PK = "organization"
+INDEX_META_SK = "#index"
+INDEX_TTL = timedelta(hours=1)  # age after which the stored index is refreshed
+MEMO_TTL = timedelta(minutes=5)  # age after which the stored index is re-read
+logger = Logger(child=True)
+
+
+class OrganizationAccountModel(Model):
+    """
+    An account of the organization, keyed by account ID
+    """
+
+    class Meta:
+        table_name = CONFIG_TABLE
+
+    pk = UnicodeAttribute(hash_key=True)
+    sk = UnicodeAttribute(range_key=True)
+
+    name = UnicodeAttribute(null=True)
+    email = UnicodeAttribute(null=True)
+    refreshed_at = UTCDateTimeAttribute(null=True)  # only set on the index item
+
+
+class AccountIndex:
+    """
+    Index of the organization's accounts by ID and by name, stored in DynamoDB and
+    memoized in-process, so lookups do not have to page through every account. Safe to
+    share between threads, which only refresh it once.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.by_id: Dict[str, OrganizationAccountModel] = {}
+        self.by_name: Dict[str, str] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.loaded_at: Optional[datetime] = None
+
+    def load(self, client, now: datetime) -> None:
+        """
+        Read the stored index unless the in-process copy is fresh, refreshing it from
+        Organizations if it is missing or stale
+        """
+        if self.loaded_at and self.loaded_at + MEMO_TTL > now:
+            return
+
+        with self._lock:
+            # another thread may have loaded it while this one waited
+            if self.loaded_at and self.loaded_at + MEMO_TTL > now:
+                return
+
+            by_id = {}
+            refreshed_at = None
+            for item in OrganizationAccountModel.query(INDEX_PK):
+                if item.sk == INDEX_META_SK:
+                    refreshed_at = item.refreshed_at
+                else:
+                    by_id[item.sk] = item
+            self._set(by_id, refreshed_at, now)
+
+            if not refreshed_at or refreshed_at + INDEX_TTL <= now:
+                self.refresh(client, now)
+
+    def refresh(self, client, now: datetime) -> None:
+        """
+        Refresh the index from Organizations, only writing the accounts that changed
+        """
+        with self._lock:
+            # another thread may have refreshed it while this one waited
+            if self.refreshed_at is not None and self.refreshed_at >= now:
+                return
+
+            logger.info("Refreshing organization account index")
+
+            current = {}
+            paginator = client.get_paginator("list_accounts")
+            for page in paginator.paginate():
+                for account in page.get("Accounts", []):
+                    current[account["Id"]] = OrganizationAccountModel(
+                        INDEX_PK,
+                        account["Id"],
+                        name=account.get("Name"),
+                        email=account.get("Email"),
+                    )
+
+            changed = [
+                item
+                for account_id, item in current.items()
+                if account_id not in self.by_id
+                or self.by_id[account_id].name != item.name
+                or self.by_id[account_id].email != item.email
+            ]
+            removed = [
+                item
+                for account_id, item in self.by_id.items()
+                if account_id not in current
+            ]
+
+            with OrganizationAccountModel.batch_write() as batch:
+                for item in changed:
+                    batch.save(item)
+                for item in removed:
+                    batch.delete(item)
+                batch.save(
+                    OrganizationAccountModel(INDEX_PK, INDEX_META_SK, refreshed_at=now)
+                )
+
+            logger.debug(f"Updated {len(changed)} and removed {len(removed)} accounts")
+            self._set(current, now, now)
+
+    def add(self, item: OrganizationAccountModel) -> None:
+        """
+        Store a single account found outside of a full refresh
+        """
+        item.save()
+        with self._lock:
+            self.by_id[item.sk] = item
+            if item.name:
+                self.by_name[item.name] = item.sk
+
+    def _set(
+        self,
+        by_id: Dict[str, OrganizationAccountModel],
+        refreshed_at: Optional[datetime],
+        now: datetime,
+    ) -> None:
+        self.by_id = by_id
+        self.by_name = {
+            item.name: account_id for account_id, item in by_id.items() if item.name
+        }
+        self.refreshed_at = refreshed_at
+        self.loaded_at = now
+
+
+# shared by every warm invocation of the container
+ACCOUNT_INDEX = AccountIndex()
+
+
+class Organizations:
+    def __init__(self, index: AccountIndex = ACCOUNT_INDEX) -> None:
+        self.index = index
+
+    @property
+    def client(self) -> Any:
+        return get_client("organizations")
+
+    def get_account_id(self, name: str) -> Optional[str]:
+        """
+        Return the ID of the account with a given name, refreshing the index on a miss
+        """
+        now = datetime.now(timezone.utc)
+        self.index.load(self.client, now)
+
+        account_id = self.index.by_name.get(name)
+        if account_id is None and self.index.refreshed_at != now:
+            self.index.refresh(self.client, now)
+            account_id = self.index.by_name.get(name)
+        return account_id
+
+    def get_audit_account_id(self) -> Optional[str]:
+        """
+        Return the Control Tower Audit account
+        """
+        return self.get_account_id(CT_AUDIT_ACCOUNT_NAME)
+
+    def get_account_email(self, account_id) -> Optional[str]:
+        """
+        Return the email address for an account
+        """
+        self.index.load(self.client, datetime.now(timezone.utc))
+
+        item = self.index.by_id.get(account_id)
+        if item is None or not item.email:
+            # accounts created since the last refresh are looked up individually
+            response = self.client.describe_account(AccountId=account_id)
+            account = response.get("Account", {})
+            item = OrganizationAccountModel(
+                INDEX_PK,
+                account_id,
+                name=account.get("Name"),
+                email=account.get("Email"),
+            )
+            self.index.add(item)
+        return item.email
+
+    def list_accounts(
+        self, parent_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the active member accounts of the organization, or only those in the given
+        organizational units and the units nested in them. The management account is
+        left out, as it has no Control Tower execution role.
+        """
+        accounts = []
+        if parent_ids is None:
+            paginator = self.client.get_paginator("list_accounts")
+            for page in paginator.paginate():
+                accounts.extend(page.get("Accounts", []))
+        else:
+            accounts_paginator = self.client.get_paginator("list_accounts_for_parent")
+            units_paginator = self.client.get_paginator(
+                "list_organizational_units_for_parent"
+            )
+            parents = list(parent_ids)
+            while parents:
+                parent_id = parents.pop()
+                for page in accounts_paginator.paginate(ParentId=parent_id):
+                    accounts.extend(page.get("Accounts", []))
+                for page in units_paginator.paginate(ParentId=parent_id):
+                    parents.extend(
+                        unit["Id"] for unit in page.get("OrganizationalUnits", [])
+                    )
+
+        response = self.client.describe_organization()
+        management_account_id = response["Organization"]["MasterAccountId"]
+        return [
+            account
+            for account in accounts
+            if account.get("Status") == "ACTIVE"
+            and account["Id"] != management_account_id
+        ]
@@ -1,21 +1,36 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from typing import Any, Dict, Optional
+
 from aws_lambda_powertools import Logger
-import boto3
 import botocore
 
 logger = Logger(child=True)
 
 
 class SecurityHub:
-    def __init__(
-        self, role: boto3.Session, region: str, account_id: str = None
-    ) -> None:
-        self.client = role.client("securityhub", region_name=region)
+    def __init__(self, client: Any, region: str, account_id: str = None) -> None:
+        self.client = client
         self.account_id = account_id  # only used for logging
         self.region = region  # only used for logging
 
+    def get_master_account(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the administrator account this account is a member of, if any
+        """
+        try:
+            response = self.client.get_master_account()
+        except botocore.exceptions.ClientError as error:
+            # raised when Security Hub is not enabled
+            if error.response["Error"]["Code"] == "InvalidAccessException":
+                return None
+            logger.exception(
+                f"Unable to get administrator account of {self.account_id} in {self.region}"
+            )
+            raise error
+        return response.get("Master")
+
     def enable_security_hub(self) -> None:
         """
         Enable Security Hub
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+import pynamodb
+from pynamodb.attributes import TTLAttribute, UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.models import Model
+
+CONFIG_TABLE = os.environ["CONFIG_TABLE"]
+STATE_PK_PREFIX = "baseline#"
+# age after which a baseline is checked for drift again, even if its config has not
+# changed, and after which DynamoDB deletes the record
+STATE_TTL = timedelta(seconds=int(os.environ.get("BASELINE_STATE_TTL", 86400)))
+logger = Logger(child=True)
+
+__all__ = ["BaselineState", "BaselineStateModel", "config_hash"]
+
+
+class BaselineStateModel(Model):
+    """
+    The last configuration of a baseline known to be in place in an account and region
+    """
+
+    class Meta:
+        table_name = CONFIG_TABLE
+
+    pk = UnicodeAttribute(hash_key=True)  # baseline#<account ID>
+    sk = UnicodeAttribute(range_key=True)  # <task>#<region>
+
+    config_hash = UnicodeAttribute()
+    applied_at = UTCDateTimeAttribute(null=True)  # last time the task made a change
+    checked_at = UTCDateTimeAttribute()  # last time the configuration was in place
+    expires_at = TTLAttribute()
+
+
+def config_hash(version: int, config: Any) -> str:
+    """
+    Return a digest of the configuration a task applies
+    """
+    document = json.dumps([version, config], sort_keys=True, default=str)
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class BaselineState:
+    """
+    The baseline records of an account, read with a single query at the start of a run
+    and written with a single batch at the end of it. Safe to share between threads.
+    """
+
+    def __init__(self, account_id: str) -> None:
+        self.pk = f"{STATE_PK_PREFIX}{account_id}"
+        self._lock = threading.Lock()
+        self._records: Dict[Tuple[str, str], BaselineStateModel] = {}
+        self._changed: Dict[Tuple[str, str], BaselineStateModel] = {}
+
+    def load(self) -> None:
+        try:
+            for record in BaselineStateModel.query(self.pk):
+                task, _, region = record.sk.partition("#")
+                self._records[(task, region)] = record
+        except pynamodb.exceptions.QueryError:
+            # every task is then checked for drift, which is only slower
+            logger.exception(f"Unable to load baseline state of {self.pk}")
+
+    def is_current(self, task: str, region: str, digest: str, now: datetime) -> bool:
+        """
+        Whether the configuration of a task was in place recently enough to skip it
+        """
+        record = self._records.get((task, region))
+        return (
+            record is not None
+            and record.config_hash == digest
+            and record.checked_at + STATE_TTL > now
+        )
+
+    def record(
+        self, task: str, region: str, digest: str, applied: bool, now: datetime
+    ) -> None:
+        """
+        Record that the configuration of a task is in place, and whether it was
+        applied (rather than found in place)
+        """
+        previous = self._records.get((task, region))
+        applied_at = now if applied else (previous.applied_at if previous else None)
+        record = BaselineStateModel(
+            self.pk,
+            f"{task}#{region}",
+            config_hash=digest,
+            applied_at=applied_at,
+            checked_at=now,
+            expires_at=now + STATE_TTL,
+        )
+        with self._lock:
+            self._records[(task, region)] = record
+            self._changed[(task, region)] = record
+
+    def save(self) -> None:
+        with self._lock:
+            changed = list(self._changed.values())
+            self._changed.clear()
+        if not changed:
+            return
+
+        try:
+            with BaselineStateModel.batch_write() as batch:
+                for record in changed:
+                    batch.save(record)
+        except pynamodb.exceptions.PutError:
+            # the next run checks these tasks for drift again, which is only slower
+            logger.exception(f"Unable to save baseline state of {self.pk}")
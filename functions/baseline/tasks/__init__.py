@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Baseline tasks, each registered with the engine on import. A new baseline is a new
+module in this package, imported below.
+"""
+
+from . import (  # noqa: F401
+    delete_default_vpc,
+    enable_security_hub,
+    route53_query_logs,
+    s3_public_block,
+)
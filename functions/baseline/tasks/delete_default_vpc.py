@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# see https://github.com/awslabs/aws-deployment-framework/blob/master/src/lambda_codebase/initial_commit/bootstrap_repository/adf-build/provisioner/src/vpc.py
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from functools import partial
+import time
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+
+from aws_lambda_powertools import Logger
+import botocore
+
+from engine import Task, TaskContext, register
+
+logger = Logger(child=True)
+
+# concurrent deletions per VPC, on top of the regions being processed in parallel
+VPC_CLEANUP_WORKERS = 4
+
+Deletion = Tuple[Callable[[], Any], Set[str]]
+
+
+def run_graph(tasks: Dict[str, Deletion], executor: Executor) -> None:
+    """
+    Run a graph of tasks, each keyed by ID with a function and the IDs of the tasks it
+    depends on, starting every task as soon as its dependencies have completed
+    """
+    done: Set[str] = set()
+    running: Dict[Future, str] = {}
+    pending = dict(tasks)
+    errors = []
+
+    while pending or running:
+        for task_id, (func, dependencies) in list(pending.items()):
+            if dependencies <= done:
+                running[executor.submit(func)] = task_id
+                del pending[task_id]
+
+        if not running:
+            # remaining tasks depend on a task that failed
+            break
+
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            task_id = running.pop(future)
+            error = future.exception()
+            if error:
+                logger.error(f"Unable to delete {task_id}: {error}")
+                errors.append(error)
+            else:
+                done.add(task_id)
+
+    if errors:
+        raise errors[0]
+
+
+def describe_vpc_resources(
+    client: Any, vpcid: str, executor: Executor
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Describe every resource that has to be deleted before a VPC, one call per type
+    """
+    vpc_filter = [{"Name": "vpc-id", "Values": [vpcid]}]
+    calls = {
+        "InternetGateways": lambda: client.describe_internet_gateways(
+            Filters=[{"Name": "attachment.vpc-id", "Values": [vpcid]}]
+        ),
+        "RouteTables": lambda: client.describe_route_tables(Filters=vpc_filter),
+        "SecurityGroups": lambda: client.describe_security_groups(Filters=vpc_filter),
+        "NetworkInterfaces": lambda: client.describe_network_interfaces(
+            Filters=vpc_filter
+        ),
+        "Subnets": lambda: client.describe_subnets(Filters=vpc_filter),
+    }
+    futures = {key: executor.submit(call) for key, call in calls.items()}
+    return {key: future.result().get(key, []) for key, future in futures.items()}
+
+
+def vpc_cleanup(vpcid: str, client: Any) -> None:
+    if not vpcid:
+        return
+
+    with ThreadPoolExecutor(max_workers=VPC_CLEANUP_WORKERS) as executor:
+        resources = describe_vpc_resources(client, vpcid, executor)
+
+        tasks: Dict[str, Deletion] = {}
+
+        # detach and delete all gateways associated with the vpc
+        for gw in resources["InternetGateways"]:
+
+            def delete_gateway(gw_id=gw["InternetGatewayId"]):
+                client.detach_internet_gateway(InternetGatewayId=gw_id, VpcId=vpcid)
+                client.delete_internet_gateway(InternetGatewayId=gw_id)
+
+            tasks[gw["InternetGatewayId"]] = (delete_gateway, set())
+
+        # Route table associations
+        subnet_dependencies: Dict[str, Set[str]] = {}
+        for rt in resources["RouteTables"]:
+            for rta in rt.get("Associations", []):
+                if rta.get("Main"):
+                    continue
+                assoc_id = rta["RouteTableAssociationId"]
+                tasks[assoc_id] = (
+                    partial(client.disassociate_route_table, AssociationId=assoc_id),
+                    set(),
+                )
+                if rta.get("SubnetId"):
+                    subnet_dependencies.setdefault(rta["SubnetId"], set()).add(assoc_id)
+
+        # Network interfaces
+        interface_ids = set()
+        for interface in resources["NetworkInterfaces"]:
+            eni_id = interface["NetworkInterfaceId"]
+            interface_ids.add(eni_id)
+            tasks[eni_id] = (
+                partial(client.delete_network_interface, NetworkInterfaceId=eni_id),
+                set(),
+            )
+            subnet_dependencies.setdefault(interface["SubnetId"], set()).add(eni_id)
+
+        # Security Group (only once no interface uses them)
+        for sg in resources["SecurityGroups"]:
+            if sg["GroupName"] != "default":
+                tasks[sg["GroupId"]] = (
+                    partial(client.delete_security_group, GroupId=sg["GroupId"]),
+                    set(interface_ids),
+                )
+
+        # Subnets (only once their interfaces and associations are gone)
+        for subnet in resources["Subnets"]:
+            subnet_id = subnet["SubnetId"]
+            tasks[subnet_id] = (
+                partial(client.delete_subnet, SubnetId=subnet_id),
+                subnet_dependencies.get(subnet_id, set()),
+            )
+
+        # Delete vpc
+        tasks[vpcid] = (partial(client.delete_vpc, VpcId=vpcid), set(tasks))
+
+        run_graph(tasks, executor)
+
+    logger.info(f"VPC {vpcid} and associated resources has been deleted.")
+
+
+def delete_default_vpc(client: Any, account_id: str, region: str) -> None:
+    default_vpc_id = None
+    max_retry_seconds = 360
+    while True:
+        try:
+            vpc_response = client.describe_vpcs()
+            break
+        except botocore.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] == "OptInRequired":
+                logger.warning(
+                    f"Passing on region {client.meta.region_name} as Opt-in is required."
+                )
+                return
+            # botocore already retried throttling and transient errors
+            raise error
+        except BaseException as error:
+            logger.warning(
+                f"Could not retrieve VPCs: {error}. Sleeping for 2 seconds before trying again."
+            )
+            max_retry_seconds -= 2
+            time.sleep(2)
+            if max_retry_seconds <= 0:
+                raise Exception("Could not describe VPCs within retry limit.")
+
+    for vpc in vpc_response["Vpcs"]:
+        if vpc["IsDefault"] is True:
+            default_vpc_id = vpc["VpcId"]
+            break
+
+    if default_vpc_id is None:
+        logger.debug(
+            f"No default VPC found in account {account_id} in the {region} region"
+        )
+        return
+
+    logger.info(f"Found default VPC Id {default_vpc_id} in the {region} region")
+    vpc_cleanup(default_vpc_id, client)
+
+
+@register
+class DeleteDefaultVpc(Task):
+    """
+    Delete the default VPC, and everything in it, in every region enabled by default
+    """
+
+    name = "delete_default_vpc"
+    regional = True
+
+    def check(self, context: TaskContext, region: Optional[str], prepared: Any) -> bool:
+        client = context.client("ec2", region, max_pool_connections=VPC_CLEANUP_WORKERS)
+        try:
+            response = client.describe_vpcs(
+                Filters=[{"Name": "is-default", "Values": ["true"]}]
+            )
+        except botocore.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] == "OptInRequired":
+                return True
+            raise error
+        return not response.get("Vpcs")
+
+    def apply(
+        self, context: TaskContext, region: Optional[str], prepared: Any
+    ) -> Optional[Dict[str, Any]]:
+        client = context.client("ec2", region, max_pool_connections=VPC_CLEANUP_WORKERS)
+        delete_default_vpc(client, context.account_id, region)
+        return None
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+from typing import List, Dict, Any, Optional
+
+from aws_lambda_powertools import Logger
+
+from engine import Task, TaskContext, get_enabled_regions, register
+from organizations import Organizations
+from securityhub import SecurityHub
+
+# statuses of an active membership, GetMasterAccount returns them in uppercase
+MEMBER_STATUSES = {"ASSOCIATED", "ENABLED"}
+SECURITY_HUB_REGIONS = [
+    region for region in os.environ.get("REGIONS", "").split(",") if region
+]
+logger = Logger(child=True)
+
+
+@register
+class EnableSecurityHub(Task):
+    """
+    Enable Security Hub in the account and enroll it as a member of the Audit account.
+
+    In each region, the account enables Security Hub, the Audit account creates and
+    invites it as a member, then the account accepts the invitation.
+    """
+
+    name = "enable_security_hub"
+    regional = True
+
+    def regions(self, context: TaskContext) -> List[str]:
+        if SECURITY_HUB_REGIONS:
+            return SECURITY_HUB_REGIONS
+        logger.warn("REGIONS not defined, using all regions")
+        return get_enabled_regions()
+
+    def prepare(self, context: TaskContext) -> Dict[str, Any]:
+        organizations = Organizations()
+
+        audit_account_id = organizations.get_audit_account_id()
+        if not audit_account_id:
+            raise Exception("Control Tower Audit account not found")
+
+        return {
+            "audit_account_id": audit_account_id,
+            "account_email": organizations.get_account_email(context.account_id),
+        }
+
+    def config(
+        self, context: TaskContext, region: Optional[str], prepared: Dict[str, Any]
+    ) -> Any:
+        return {"audit_account_id": prepared["audit_account_id"]}
+
+    def check(
+        self, context: TaskContext, region: Optional[str], prepared: Dict[str, Any]
+    ) -> bool:
+        member = SecurityHub(
+            context.client("securityhub", region), region, context.account_id
+        )
+        master = member.get_master_account()
+        return (
+            master is not None
+            and master.get("AccountId") == prepared["audit_account_id"]
+            and str(master.get("MemberStatus", "")).upper() in MEMBER_STATUSES
+        )
+
+    def apply(
+        self, context: TaskContext, region: Optional[str], prepared: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        account_id = context.account_id
+        audit_account_id = prepared["audit_account_id"]
+
+        member = SecurityHub(context.client("securityhub", region), region, account_id)
+        audit = SecurityHub(
+            context.client("securityhub", region, account_id=audit_account_id),
+            region,
+            audit_account_id,
+        )
+
+        member.enable_security_hub()
+
+        audit.enable_security_hub()
+        audit.create_member(account_id, prepared["account_email"])
+        audit.invite_member(account_id)
+
+        member.accept_invitations(audit_account_id)
+        return {"audit_account_id": audit_account_id}
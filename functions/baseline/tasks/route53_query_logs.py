@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from typing import Any, Dict, Optional
+
+from engine import Task, TaskContext, register
+
+POLICY_NAME = "AWSServiceRoleForRoute53"
+
+
+@register
+class Route53QueryLogs(Task):
+    """
+    Allow Route53 to deliver query logs to CloudWatch Logs
+    """
+
+    name = "route53_query_logs"
+
+    def config(self, context: TaskContext, region: Optional[str], prepared: Any) -> Any:
+        return {
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Sid": "Route53LogsToCloudWatchLogs",
+                    "Effect": "Allow",
+                    "Principal": {"Service": "route53.amazonaws.com"},
+                    "Action": ["logs:CreateLogStream", "logs:PutLogEvents"],
+                    "Resource": f"arn:aws:logs:us-east-1:{context.account_id}:log-group:/aws/route53/*",  # log-group must be in us-east-1
+                }
+            ],
+        }
+
+    def check(self, context: TaskContext, region: Optional[str], prepared: Any) -> bool:
+        client = context.client("logs")
+        response = client.describe_resource_policies()
+        for policy in response.get("resourcePolicies", []):
+            if policy.get("policyName") == POLICY_NAME:
+                return json.loads(policy["policyDocument"]) == self.config(
+                    context, region, prepared
+                )
+        return False
+
+    def apply(
+        self, context: TaskContext, region: Optional[str], prepared: Any
+    ) -> Optional[Dict[str, Any]]:
+        policy = self.config(context, region, prepared)
+
+        client = context.client("logs")
+        client.put_resource_policy(
+            policyName=POLICY_NAME, policyDocument=json.dumps(policy)
+        )
+        return None
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Optional
+
+import botocore
+
+from engine import Task, TaskContext, register
+
+PUBLIC_ACCESS_BLOCK = {
+    "BlockPublicAcls": True,
+    "IgnorePublicAcls": True,
+    "BlockPublicPolicy": True,
+    "RestrictPublicBuckets": True,
+}
+
+
+@register
+class S3PublicBlock(Task):
+    """
+    Block S3 public access on the whole account
+    """
+
+    name = "s3_public_block"
+
+    def config(self, context: TaskContext, region: Optional[str], prepared: Any) -> Any:
+        return PUBLIC_ACCESS_BLOCK
+
+    def check(self, context: TaskContext, region: Optional[str], prepared: Any) -> bool:
+        client = context.client("s3control")
+        try:
+            response = client.get_public_access_block(AccountId=context.account_id)
+        except botocore.exceptions.ClientError as error:
+            if (
+                error.response["Error"]["Code"]
+                == "NoSuchPublicAccessBlockConfiguration"
+            ):
+                return False
+            raise error
+        return response.get("PublicAccessBlockConfiguration") == PUBLIC_ACCESS_BLOCK
+
+    def apply(
+        self, context: TaskContext, region: Optional[str], prepared: Any
+    ) -> Optional[Dict[str, Any]]:
+        client = context.client("s3control")
+        client.put_public_access_block(
+            PublicAccessBlockConfiguration=PUBLIC_ACCESS_BLOCK,
+            AccountId=context.account_id,
+        )
+        return None
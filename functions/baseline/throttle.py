@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+# requests per second made by a process to a service in an account and region, kept
+# under the documented API rate limits so concurrent accounts do not throttle the
+# Audit account, which every account of a backfill calls
+SERVICE_RATES = {
+    "ec2": 20.0,
+    "logs": 5.0,
+    "s3control": 5.0,
+    "securityhub": 10.0,
+}
+UNIQUE_ID = "baseline-rate-limiter"
+
+__all__ = ["RateLimiter", "SERVICE_RATES"]
+
+
+class TokenBucket:
+    """
+    Allow ``rate`` requests per second with bursts of up to ``rate`` requests
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # a request waits for the token it takes, so waiting threads keep their order
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+class RateLimiter:
+    """
+    Space out the API calls made to each service in each account and region, as API
+    rate limits apply per account and region.
+
+    Clients are registered once, after which every call waits for a token before it is
+    sent. botocore's adaptive retries still slow clients down when they are throttled.
+    """
+
+    def __init__(self, rates: Dict[str, float] = SERVICE_RATES) -> None:
+        self.rates = rates
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+
+    def register(self, client: Any, account_id: str) -> None:
+        """
+        Limit the calls of a client to the rate of its service, if it has one
+        """
+        service_name = client.meta.service_model.service_name
+        rate = self.rates.get(service_name)
+        if rate is None:
+            return
+
+        key = (account_id, service_name, client.meta.region_name or "")
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate)
+
+        def before_call(**kwargs) -> None:
+            bucket.acquire()
+
+        # first, so the call waits even if another handler answers it, and registering a
+        # client again is a no-op, so clients are only limited once
+        client.meta.events.register_first(
+            "before-call", before_call, unique_id=UNIQUE_ID
+        )
+
+    def release(self, account_id: str) -> None:
+        """
+        Forget the buckets of an account that is done
+        """
+        with self._lock:
+            for key in [key for key in self._buckets if key[0] == account_id]:
+                del self._buckets[key]
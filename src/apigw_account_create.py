@@ -4,59 +4,59 @@
 from datetime import datetime, timezone
 import json
 import os
-from typing import Dict, Any
-import warnings
+from typing import Any, Callable, Dict, List, Optional, Set
 
-from aws_lambda_powertools import Logger, Metrics, Tracer
-from aws_lambda_powertools.utilities.typing import LambdaContext
-import boto3
+from aws_lambda_powertools import Logger, Tracer
 import botocore
+from controltowerlib import get_client
 import fastjsonschema
 import pynamodb
 
+from controltowerapi import status
 from controltowerapi.models import AccountModel
-from responses import build_response, error_response, authenticate_request
-
-warnings.filterwarnings("ignore", "No metrics to publish*")
+from responses import build_response, error_response
 
 ACCOUNT_QUEUE_URL = os.environ["ACCOUNT_QUEUE_URL"]
+MAX_BATCH_SIZE = 100
+SQS_BATCH_SIZE = 10  # maximum entries per SendMessageBatch request
 
 tracer = Tracer()
-logger = Logger()
-metrics = Metrics()
+logger = Logger(child=True)
 
-with open("./schemas/create_account.json", "r") as fp:
-    data = json.loads(fp.read())
-    VALIDATE = fastjsonschema.compile(data)
+SCHEMA_PATH = "./schemas/create_account.json"
+_validator = None
 
 
-@metrics.log_metrics(capture_cold_start_metric=True)
-@tracer.capture_lambda_handler
-@logger.inject_lambda_context(log_event=True)
-def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
-    if not event or "body" not in event:
-        return error_response(400, "Unknown event")
+def get_validator() -> Callable[[Any], Any]:
+    """
+    Return the request body validator. The schema is only compiled on first use, or on
+    a warm-up.
+    """
+    global _validator
 
-    result = authenticate_request(event)
-    if result is not True:
-        return result
+    if _validator is None:
+        with open(SCHEMA_PATH, "r") as fp:
+            _validator = fastjsonschema.compile(json.loads(fp.read()))
+    return _validator
 
-    try:
-        body = json.loads(event["body"])
-    except ValueError:
-        logger.exception("Unable to parse JSON body: " + event["body"])
-        return error_response(400, "Unable to parse JSON body")
 
+def validate(body: Any) -> Optional[str]:
+    """
+    Validate a request body, returning the error message if it is invalid
+    """
     try:
-        VALIDATE(body)
+        get_validator()(body)
     except fastjsonschema.JsonSchemaException as error:
-        logger.exception(f"Invalid request body: {error.message}")
-        return error_response(400, error.message)
+        return error.message
+    return None
 
-    account_name = body["AccountName"]
 
+def build_item(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a new QUEUED account item from a validated request body
+    """
     item = {
-        "account_name": account_name,
+        "account_name": body["AccountName"],
         "account_email": body["AccountEmail"],
         "status": "QUEUED",
         "ou_name": body["ManagedOrganizationalUnit"],
@@ -69,37 +69,197 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         item["callback_url"] = body["CallbackUrl"]
     if "CallbackSecret" in body:
         item["callback_secret"] = body["CallbackSecret"]
+    return item
+
+
+def build_message(body: Dict[str, Any]) -> str:
+    return json.dumps(body, indent=None, separators=(",", ":"), sort_keys=True)
+
+
+@tracer.capture_method
+def send_messages(bodies: List[Dict[str, Any]]) -> Set[str]:
+    """
+    Send accounts to the queue, up to ten per request, and return the names of the
+    accounts that could not be sent
+    """
+    unsent = set()
+    for start in range(0, len(bodies), SQS_BATCH_SIZE):
+        chunk = bodies[start : start + SQS_BATCH_SIZE]
+        # entry IDs only allow some characters, so entries are identified by position
+        entries = [
+            {
+                "Id": str(index),
+                "MessageBody": build_message(body),
+                "MessageDeduplicationId": body["AccountName"],
+                "MessageGroupId": body["AccountName"],
+            }
+            for index, body in enumerate(chunk)
+        ]
+        try:
+            response = get_client("sqs").send_message_batch(
+                QueueUrl=ACCOUNT_QUEUE_URL, Entries=entries
+            )
+        except botocore.exceptions.ClientError:
+            logger.exception("Unable to send messages to queue")
+            unsent.update(body["AccountName"] for body in chunk)
+            continue
+
+        for failure in response.get("Failed", []):
+            account_name = chunk[int(failure["Id"])]["AccountName"]
+            logger.error(
+                f"Unable to send account '{account_name}' to queue: {failure.get('Message')}"
+            )
+            unsent.add(account_name)
+
+    return unsent
+
+
+def rollback(account: AccountModel) -> None:
+    """
+    Delete a QUEUED account that could not be sent to the queue, so its name can be
+    requested again
+    """
+    try:
+        status.delete(account)
+        logger.info(f"Deleted account '{account.account_name}' that was not queued")
+    except pynamodb.exceptions.TransactWriteError:
+        # reconciliation sends QUEUED accounts without a message to the queue again
+        logger.exception(f"Unable to delete account '{account.account_name}'")
+
+
+def create_account(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    POST /v1/accounts
+    """
+    if "body" not in event:
+        return error_response(400, "Unknown event")
+
+    try:
+        body = json.loads(event["body"])
+    except ValueError:
+        logger.exception("Unable to parse JSON body: " + event["body"])
+        return error_response(400, "Unable to parse JSON body")
+
+    message = validate(body)
+    if message:
+        logger.error(f"Invalid request body: {message}")
+        return error_response(400, message)
 
+    account_name = body["AccountName"]
+    item = build_item(body)
     account = AccountModel(**item)
 
     try:
-        account.save(AccountModel.account_name.does_not_exist())
-    except pynamodb.exceptions.PutError as error:
-        if isinstance(error.cause, botocore.exceptions.ClientError):
-            if (
-                error.cause.response["Error"]["Code"]
-                == "ConditionalCheckFailedException"
-            ):
-                return error_response(
-                    409, f'Account name "{account_name}" already exists'
-                )
+        status.create(account, AccountModel.account_name.does_not_exist())
+    except pynamodb.exceptions.TransactWriteError as error:
+        if status.is_conditional_check_failed(error):
+            return error_response(409, f'Account name "{account_name}" already exists')
         return error_response(500, "Unable to store account")
 
-    message = json.dumps(body, indent=None, separators=(",", ":"), sort_keys=True)
+    message = build_message(body)
 
     logger.info(f"Sending account '{account_name}' to queue")
 
-    sqs = boto3.client("sqs")
-
     try:
-        sqs.send_message(
+        get_client("sqs").send_message(
             QueueUrl=ACCOUNT_QUEUE_URL,
             MessageBody=message,
             MessageDeduplicationId=account_name,
-            MessageGroupId="Accounts",
+            MessageGroupId=account_name,
         )
         logger.debug(f"Sent account '{account_name}' to queue")
-    except botocore.exceptions.ClientError as error:
+    except botocore.exceptions.ClientError:
         logger.exception("Unable to send message to queue")
+        rollback(account)
+        return error_response(500, "Unable to queue account")
 
     return build_response(202, item)
+
+
+def batch_create_accounts(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    POST /v1/accounts:batch
+    """
+    if "body" not in event:
+        return error_response(400, "Unknown event")
+
+    try:
+        body = json.loads(event["body"])
+    except ValueError:
+        logger.exception("Unable to parse JSON body: " + event["body"])
+        return error_response(400, "Unable to parse JSON body")
+
+    account_requests = body.get("Accounts") if isinstance(body, dict) else None
+    if not isinstance(account_requests, list) or not account_requests:
+        return error_response(400, "Accounts must be a non-empty list")
+    if len(account_requests) > MAX_BATCH_SIZE:
+        return error_response(
+            400, f"Accounts must contain at most {MAX_BATCH_SIZE} accounts"
+        )
+
+    results: List[Dict[str, Any]] = []
+    accounts: Dict[str, AccountModel] = {}
+    bodies: Dict[str, Dict[str, Any]] = {}
+    items: Dict[str, Dict[str, Any]] = {}
+
+    for request in account_requests:
+        message = validate(request)
+        if message:
+            account_name = (
+                request.get("AccountName") if isinstance(request, dict) else None
+            )
+            results.append(
+                {"AccountName": account_name, "code": 400, "message": message}
+            )
+            continue
+
+        account_name = request["AccountName"]
+        if account_name in accounts:
+            results.append(
+                {
+                    "AccountName": account_name,
+                    "code": 409,
+                    "message": f'Account name "{account_name}" is duplicated in the request',
+                }
+            )
+            continue
+
+        item = build_item(request)
+        accounts[account_name] = AccountModel(**item)
+        bodies[account_name] = request
+        items[account_name] = item
+        results.append({"AccountName": account_name, "code": 202})
+
+    rejected, failed = status.create_many(
+        list(accounts.values()), AccountModel.account_name.does_not_exist()
+    )
+    rejected = {account.account_name for account in rejected}
+    failed = {account.account_name for account in failed}
+
+    unsent = send_messages(
+        [
+            body
+            for account_name, body in bodies.items()
+            if account_name not in rejected and account_name not in failed
+        ]
+    )
+    for account_name in unsent:
+        rollback(accounts[account_name])
+
+    for result in results:
+        account_name = result["AccountName"]
+        if result["code"] != 202:
+            continue
+        if account_name in rejected:
+            result["code"] = 409
+            result["message"] = f'Account name "{account_name}" already exists'
+        elif account_name in failed:
+            result["code"] = 500
+            result["message"] = "Unable to store account"
+        elif account_name in unsent:
+            result["code"] = 500
+            result["message"] = "Unable to queue account"
+        else:
+            result["account"] = items[account_name]
+
+    return build_response(207, {"results": results})
@@ -2,35 +2,24 @@
 # -*- coding: utf-8 -*-
 
 from typing import Dict, Any
-import warnings
 
-from aws_lambda_powertools import Logger, Metrics, Tracer
-from aws_lambda_powertools.utilities.typing import LambdaContext
-import botocore
+from aws_lambda_powertools import Logger
 import pynamodb
 
+from controltowerapi import status
 from controltowerapi.models import AccountModel
-from responses import build_response, error_response, authenticate_request
+from responses import build_response, error_response
 
-warnings.filterwarnings("ignore", "No metrics to publish*")
+logger = Logger(child=True)
 
-tracer = Tracer()
-logger = Logger()
-metrics = Metrics()
 
-
-@metrics.log_metrics(capture_cold_start_metric=True)
-@tracer.capture_lambda_handler
-@logger.inject_lambda_context(log_event=True)
-def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
-
-    if not event or "pathParameters" not in event:
+def delete_account(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    DELETE /v1/accounts/{accountName}
+    """
+    if "pathParameters" not in event:
         return error_response(400, "Unknown event")
 
-    result = authenticate_request(event)
-    if result is not True:
-        return result
-
     account_name = event.get("pathParameters", {}).get("accountName")
 
     try:
@@ -38,19 +27,21 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     except AccountModel.DoesNotExist:
         return error_response(404, "Account not found")
 
+    if account.status != "QUEUED":
+        return error_response(
+            409,
+            f'Account creation for "{account_name}" has already started and cannot be deleted',
+        )
+
     try:
-        account.delete(AccountModel.status == "QUEUED")
-    except pynamodb.exceptions.DeleteError as error:
+        status.delete(account, AccountModel.status == "QUEUED")
+    except pynamodb.exceptions.TransactWriteError as error:
         logger.exception("Unable to delete account")
-        if isinstance(error.cause, botocore.exceptions.ClientError):
-            if (
-                error.cause.response["Error"]["Code"]
-                == "ConditionalCheckFailedException"
-            ):
-                return error_response(
-                    409,
-                    f'Account creation for "{account_name}" has already started and cannot be deleted',
-                )
+        if status.is_conditional_check_failed(error):
+            return error_response(
+                409,
+                f'Account creation for "{account_name}" has already started and cannot be deleted',
+            )
         return error_response(500, "Unable to delete account")
 
     return build_response(204)
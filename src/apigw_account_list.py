@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import base64
+import binascii
+import json
+from typing import Dict, Any, Optional
+
+from aws_lambda_powertools import Logger
+import pynamodb
+
+from controltowerapi.models import AccountModel, LIST_ATTRIBUTES
+from controltowerapi.status import ACTIVE_STATUSES, FINISH_STATUSES
+from responses import build_response, error_response
+
+logger = Logger(child=True)
+
+STATUSES = {"QUEUED"} | ACTIVE_STATUSES | FINISH_STATUSES
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Encode a DynamoDB LastEvaluatedKey into an opaque cursor token
+    """
+    if not last_evaluated_key:
+        return None
+    data = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor token back into a DynamoDB ExclusiveStartKey
+
+    Raises
+    ------
+    ValueError
+        If the cursor is not a token returned by encode_cursor
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.decoder.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, dict) or "account_name" not in key:
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def list_accounts(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    GET /v1/accounts
+    """
+
+    params = event.get("queryStringParameters") or {}
+
+    status = params.get("status")
+    if status is not None and status not in STATUSES:
+        return error_response(400, f'Unknown status "{status}"')
+
+    try:
+        limit = int(params.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return error_response(400, "limit must be an integer")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return error_response(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    last_evaluated_key = None
+    if params.get("cursor"):
+        try:
+            last_evaluated_key = decode_cursor(params["cursor"])
+        except ValueError:
+            return error_response(400, "Invalid cursor")
+
+    # page_size matches limit so DynamoDB stops reading as soon as the page is full
+    try:
+        if status:
+            results = AccountModel.status_index.query(
+                status,
+                limit=limit,
+                page_size=limit,
+                last_evaluated_key=last_evaluated_key,
+            )
+        else:
+            results = AccountModel.scan(
+                limit=limit,
+                page_size=limit,
+                last_evaluated_key=last_evaluated_key,
+                attributes_to_get=LIST_ATTRIBUTES,
+            )
+
+        accounts = [
+            {
+                "account_name": account.account_name,
+                "account_id": account.account_id,
+                "ou_name": account.ou_name,
+                "status": account.status,
+                "queued_at": str(account.queued_at),
+                "updated_at": str(account.updated_at) if account.updated_at else None,
+            }
+            for account in results
+        ]
+    except (pynamodb.exceptions.QueryError, pynamodb.exceptions.ScanError):
+        logger.exception("Unable to list accounts")
+        return error_response(500, "Unable to list accounts")
+
+    data = {"accounts": accounts}
+
+    cursor = encode_cursor(results.last_evaluated_key)
+    if cursor:
+        data["cursor"] = cursor
+
+    return build_response(200, data)
@@ -1,41 +1,121 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from typing import Dict, Any
-import warnings
+import hashlib
+import os
+import time
+from typing import Dict, Any, Optional
 
-from aws_lambda_powertools import Logger, Metrics, Tracer
-from aws_lambda_powertools.utilities.typing import LambdaContext
+from aws_lambda_powertools import Logger
 
 from controltowerapi.models import AccountModel
-from responses import build_response, error_response, authenticate_request
+from controltowerapi.status import FINISH_STATUSES
+from responses import build_response, error_response
 
-warnings.filterwarnings("ignore", "No metrics to publish*")
+logger = Logger(child=True)
 
-tracer = Tracer()
-logger = Logger()
-metrics = Metrics()
+# seconds clients may cache accounts in a finished status, 0 disables caching
+FINISHED_MAX_AGE = int(os.environ.get("FINISHED_MAX_AGE", "0"))
+# longest a request may wait for a change, under the 30 second API Gateway timeout
+MAX_WAIT = int(os.environ.get("MAX_WAIT", "25"))
+POLL_INTERVAL = 0.5  # seconds before the first re-check, doubled after each one
+MAX_POLL_INTERVAL = 4.0  # seconds
 
 
-@metrics.log_metrics(capture_cold_start_metric=True)
-@tracer.capture_lambda_handler
-@logger.inject_lambda_context(log_event=True)
-def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+def compute_etag(account: AccountModel) -> str:
+    """
+    Return a strong ETag that changes whenever the account status or update time changes
+    """
+    version = ":".join(
+        [
+            account.account_name,
+            account.status,
+            str(account.updated_at or account.queued_at),
+        ]
+    )
+    return '"' + hashlib.sha256(version.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Return whether an If-None-Match header matches an ETag (using weak comparison)
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def is_unchanged(account: AccountModel, since: Optional[str]) -> bool:
+    """
+    Return whether an account still has the status or ETag a client already has
+    """
+    if not since:
+        return False
+    return since == account.status or etag_matches(compute_etag(account), since)
+
+
+def wait_for_change(
+    account: AccountModel, since: Optional[str], wait: int
+) -> AccountModel:
+    """
+    Re-read an account with backoff until it no longer matches "since" or the wait is over,
+    and return its latest version
+    """
+    deadline = time.monotonic() + wait
+    interval = POLL_INTERVAL
+    while is_unchanged(account, since):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+        account.refresh()
+    return account
 
-    if not event or "pathParameters" not in event:
-        return error_response(400, "Unknown event")
 
-    result = authenticate_request(event)
-    if result is not True:
-        return result
+def get_account(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    GET /v1/accounts/{accountName}?wait={seconds}&since={status or ETag}
+
+    With "wait", the request is held open for up to that many seconds until the account
+    status differs from "since" (or else from the If-None-Match header), so clients
+    waiting for an account do not have to poll in a tight loop.
+    """
+    if "pathParameters" not in event:
+        return error_response(400, "Unknown event")
 
     account_name = event.get("pathParameters", {}).get("accountName")
+    params = event.get("queryStringParameters") or {}
+    if_none_match = event.get("headers", {}).get("if-none-match")
+
+    try:
+        wait = int(params.get("wait", 0))
+    except ValueError:
+        return error_response(400, "wait must be an integer")
+    if wait < 0 or wait > MAX_WAIT:
+        return error_response(400, f"wait must be between 0 and {MAX_WAIT}")
 
     try:
         account = AccountModel.get(account_name)
+        if wait:
+            account = wait_for_change(
+                account, params.get("since") or if_none_match, wait
+            )
     except AccountModel.DoesNotExist:
         return error_response(404, "Account not found")
 
+    etag = compute_etag(account)
+    max_age = FINISHED_MAX_AGE if account.status in FINISH_STATUSES else 0
+
+    if etag_matches(etag, if_none_match):
+        return build_response(304, headers={"ETag": etag}, max_age=max_age)
+
     data = {
         "account_name": account.account_name,
         "ou_name": account.ou_name,
@@ -43,4 +123,4 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         "queued_at": str(account.queued_at),
     }
 
-    return build_response(200, data)
+    return build_response(200, data, headers={"ETag": etag}, max_age=max_age)
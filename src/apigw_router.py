@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Single handler for every API route, so all of them share one warm container: the API
+token cache, the pooled clients and table connections, and the compiled schemas.
+"""
+
+import importlib
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+import warnings
+
+from aws_lambda_powertools import Logger, Metrics, Tracer
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from controltowerlib import record_api_calls, warmup_handler
+from controltowerlib.warmup import create_clients, describe_tables
+
+from responses import TOKENS, authenticate_request, error_response
+
+warnings.filterwarnings("ignore", "No metrics to publish*")
+
+tracer = Tracer(patch_modules=["botocore", "pynamodb"])
+logger = Logger()
+metrics = Metrics()
+
+# route key ("<method> <path>") to the module and function handling it. Modules are
+# imported on first use, so a request only loads the modules of its own route.
+ROUTES = {
+    "GET /v1/accounts": ("apigw_account_list", "list_accounts"),
+    "POST /v1/accounts": ("apigw_account_create", "create_account"),
+    "POST /v1/accounts:batch": ("apigw_account_create", "batch_create_accounts"),
+    "GET /v1/accounts/{accountName}": ("apigw_account_status", "get_account"),
+    "DELETE /v1/accounts/{accountName}": ("apigw_account_delete", "delete_account"),
+}
+
+_handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+
+def compile_route(route_key: str) -> Tuple[str, "re.Pattern"]:
+    method, path = route_key.split(" ", 1)
+    pattern = re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(path))
+    return method, re.compile(f"^{pattern}$")
+
+
+_patterns = {route_key: compile_route(route_key) for route_key in ROUTES}
+
+
+def match_route(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the route of a request, from its route key or else (for a catch-all route)
+    from its method and path, in which case the path parameters are added to the event
+    """
+    route_key = event.get("routeKey")
+    if route_key in ROUTES:
+        return route_key
+
+    method = event.get("requestContext", {}).get("http", {}).get("method")
+    path = event.get("rawPath", "")
+    for route_key, (route_method, pattern) in _patterns.items():
+        match = pattern.match(path)
+        if route_method == method and match:
+            event["pathParameters"] = dict(
+                event.get("pathParameters") or {}, **match.groupdict()
+            )
+            return route_key
+    return None
+
+
+def get_handler(route_key: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    handler = _handlers.get(route_key)
+    if handler is None:
+        module_name, function_name = ROUTES[route_key]
+        module = importlib.import_module(module_name)
+        handler = _handlers[route_key] = getattr(module, function_name)
+    return handler
+
+
+def load_routes() -> None:
+    for route_key in ROUTES:
+        get_handler(route_key)
+
+
+def compile_schemas() -> None:
+    from apigw_account_create import get_validator
+
+    get_validator()
+
+
+def connect_tables() -> None:
+    from controltowerapi.models import AccountModel, StatusCounterModel
+
+    describe_tables(AccountModel, StatusCounterModel)()
+
+
+@metrics.log_metrics(capture_cold_start_metric=True)
+@record_api_calls(metrics)
+@warmup_handler(
+    tokens=TOKENS.get_values,
+    routes=load_routes,
+    schemas=compile_schemas,
+    tables=connect_tables,
+    clients=create_clients("sqs"),
+)
+@tracer.capture_lambda_handler
+@logger.inject_lambda_context(log_event=True)
+def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    if not event:
+        return error_response(400, "Unknown event")
+
+    result = authenticate_request(event)
+    if result is not True:
+        return result
+
+    route_key = match_route(event)
+    if route_key is None:
+        return error_response(404, "Not Found")
+
+    tracer.put_annotation(key="route", value=route_key)
+    return get_handler(route_key)(event)
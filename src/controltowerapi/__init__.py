@@ -1,12 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from .models import AccountModel
-from .secretsmanager import SecretsManager
-from .servicecatalog import ServiceCatalog
-
-__all__ = [
-    "AccountModel",
-    "SecretsManager",
-    "ServiceCatalog",
-]
+import importlib
+from typing import Any
+
+# Submodules are imported on first access, so a function only loads (and only has to
+# ship) the modules it actually uses
+_EXPORTS = {
+    "AccountModel": "models",
+    "LeaseModel": "models",
+    "Organizations": "organizations",
+    "ProductDiscovery": "servicecatalog",
+    "Scheduler": "scheduler",
+    "SecretCache": "secretsmanager",
+    "SecretsManager": "secretsmanager",
+    "ServiceCatalog": "servicecatalog",
+    "ServiceCatalogModel": "models",
+    "StatusCounterModel": "models",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+    return getattr(module, name)
@@ -4,20 +4,40 @@
 import os
 
 from pynamodb.models import Model
-from pynamodb.attributes import UnicodeAttribute, UTCDateTimeAttribute
-from pynamodb.indexes import GlobalSecondaryIndex, KeysOnlyProjection
+from pynamodb.attributes import (
+    NumberAttribute,
+    TTLAttribute,
+    UnicodeAttribute,
+    UnicodeSetAttribute,
+    UTCDateTimeAttribute,
+)
+from pynamodb.indexes import GlobalSecondaryIndex, IncludeProjection
 
 ACCOUNT_TABLE = os.environ["ACCOUNT_TABLE"]
+CONFIG_TABLE = os.environ["CONFIG_TABLE"]
 
-__all__ = ["AccountModel"]
+# attributes returned when listing accounts, also projected into the status index
+LIST_ATTRIBUTES = [
+    "account_name",
+    "account_id",
+    "ou_name",
+    "status",
+    "queued_at",
+    "updated_at",
+]
+
+__all__ = ["AccountModel", "LeaseModel", "ServiceCatalogModel", "StatusCounterModel"]
 
 
 class StatusIndex(GlobalSecondaryIndex):
+    # replaces the keys-only AccountStatus index, as a projection cannot be changed
     class Meta:
-        index_name = "AccountStatus"
+        index_name = "AccountStatusV2"
         read_capacity_units = 0
         write_capacity_units = 0
-        projection = KeysOnlyProjection()
+        projection = IncludeProjection(
+            ["account_id", "ou_name", "queued_at", "updated_at"]
+        )
 
     status = UnicodeAttribute(hash_key=True)
     account_name = UnicodeAttribute(range_key=True)
@@ -30,9 +50,10 @@ class AccountModel(Model):
     account_name = UnicodeAttribute(hash_key=True)
     account_email = UnicodeAttribute()
     account_id = UnicodeAttribute(null=True)
-    sso_user_email = UnicodeAttribute()
-    sso_user_first_name = UnicodeAttribute()
-    sso_user_last_name = UnicodeAttribute()
+    # unknown for accounts provisioned outside the API and imported by reconciliation
+    sso_user_email = UnicodeAttribute(null=True)
+    sso_user_first_name = UnicodeAttribute(null=True)
+    sso_user_last_name = UnicodeAttribute(null=True)
     record_id = UnicodeAttribute(null=True)
     ou_name = UnicodeAttribute()
     ou_id = UnicodeAttribute(null=True)
@@ -45,6 +66,65 @@ class AccountModel(Model):
     callback_url = UnicodeAttribute(null=True)
     callback_secret = UnicodeAttribute(null=True)
 
+    # latest receipt handle of the account's queue message, used to delete it on completion
+    receipt_handle = UnicodeAttribute(null=True)
+
     queued_at = UTCDateTimeAttribute()
     created_at = UTCDateTimeAttribute(null=True)
     updated_at = UTCDateTimeAttribute(null=True)
+
+
+class ServiceCatalogModel(Model):
+    """
+    Cached Control Tower Account Factory discovery results
+    """
+
+    class Meta:
+        table_name = CONFIG_TABLE
+
+    pk = UnicodeAttribute(hash_key=True)
+    sk = UnicodeAttribute(range_key=True)
+
+    portfolio_id = UnicodeAttribute()
+    product_id = UnicodeAttribute()
+    provisioning_artifact_id = UnicodeAttribute()
+    associated_principals = UnicodeSetAttribute(null=True)
+
+    discovered_at = UTCDateTimeAttribute()
+    expires_at = TTLAttribute()
+
+
+class LeaseModel(Model):
+    """
+    Account provisioning slot, held by at most one account at a time
+    """
+
+    class Meta:
+        table_name = CONFIG_TABLE
+
+    pk = UnicodeAttribute(hash_key=True)
+    sk = UnicodeAttribute(range_key=True)
+
+    account_name = UnicodeAttribute(null=True)
+    acquired_at = UTCDateTimeAttribute(null=True)
+    expires_at = TTLAttribute(null=True)
+
+
+class StatusCounterModel(Model):
+    """
+    Number of accounts in each status, maintained in the same transaction as every
+    account status transition
+    """
+
+    class Meta:
+        table_name = CONFIG_TABLE
+
+    pk = UnicodeAttribute(hash_key=True)
+    sk = UnicodeAttribute(range_key=True)
+
+    queued = NumberAttribute(attr_name="QUEUED", default=0)
+    created = NumberAttribute(attr_name="CREATED", default=0)
+    in_progress = NumberAttribute(attr_name="IN_PROGRESS", default=0)
+    in_progress_in_error = NumberAttribute(attr_name="IN_PROGRESS_IN_ERROR", default=0)
+    succeeded = NumberAttribute(attr_name="SUCCEEDED", default=0)
+    failed = NumberAttribute(attr_name="FAILED", default=0)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List
+
+from aws_lambda_powertools import Logger
+import botocore
+from controltowerlib import get_client
+
+logger = Logger(child=True)
+
+__all__ = ["Organizations"]
+
+
+class Organizations:
+    @property
+    def client(self) -> Any:
+        return get_client("organizations")
+
+    def _paginate(self, operation: str, key: str, **kwargs) -> List[Dict[str, Any]]:
+        paginator = self.client.get_paginator(operation)
+        results = []
+        for page in paginator.paginate(**kwargs):
+            results.extend(page.get(key, []))
+        return results
+
+    def list_accounts(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return every account of the organization by name, along with the ID and name of
+        its parent organizational unit. The organization is walked one organizational
+        unit at a time, so the parent of each account costs no extra request.
+        """
+        accounts: Dict[str, Dict[str, Any]] = {}
+
+        try:
+            parents = [
+                (root["Id"], root["Name"])
+                for root in self._paginate("list_roots", "Roots")
+            ]
+            while parents:
+                parent_id, parent_name = parents.pop()
+                for account in self._paginate(
+                    "list_accounts_for_parent", "Accounts", ParentId=parent_id
+                ):
+                    account["OrganizationalUnitId"] = parent_id
+                    account["OrganizationalUnitName"] = parent_name
+                    accounts[account["Name"]] = account
+                parents.extend(
+                    (ou["Id"], ou["Name"])
+                    for ou in self._paginate(
+                        "list_organizational_units_for_parent",
+                        "OrganizationalUnits",
+                        ParentId=parent_id,
+                    )
+                )
+        except botocore.exceptions.ClientError as error:
+            logger.exception("Unable to list organization accounts")
+            raise error
+
+        logger.debug(f"Found {len(accounts)} accounts in the organization")
+        return accounts
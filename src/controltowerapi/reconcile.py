@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from aws_lambda_powertools import Logger
+
+from .models import AccountModel
+from .status import FINISH_STATUSES
+
+# account status of a Control Tower Account Factory provisioned product
+PRODUCT_STATUSES = {
+    "AVAILABLE": "SUCCEEDED",
+    "TAINTED": "SUCCEEDED",  # provisioned, a later update failed
+    "ERROR": "FAILED",
+    "UNDER_CHANGE": "IN_PROGRESS",
+    "PLAN_IN_PROGRESS": "IN_PROGRESS",
+}
+# the processor records a product moments after provisioning it, so a QUEUED account is
+# only corrected once its product is older than this
+SETTLE_TIME = timedelta(minutes=15)
+logger = Logger(child=True)
+
+__all__ = ["Correction", "PRODUCT_STATUSES", "plan", "scan_accounts"]
+
+
+class Correction:
+    """
+    A change to a single account: an account to import into the table, a status or
+    attribute update, or an account to send to the queue again
+    """
+
+    IMPORT = "import"
+    UPDATE = "update"
+    REQUEUE = "requeue"
+
+    __slots__ = ("action", "account", "previous", "status", "values")
+
+    def __init__(
+        self,
+        action: str,
+        account: AccountModel,
+        status: Optional[str] = None,
+        values: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.action = action
+        self.account = account
+        self.previous = account.status
+        self.status = status or account.status
+        self.values = values or {}
+
+    @property
+    def account_name(self) -> str:
+        return self.account.account_name
+
+
+def scan_accounts(segments: int) -> Dict[str, AccountModel]:
+    """
+    Return every account of the table by name, reading the segments of a parallel scan
+    concurrently
+    """
+
+    def scan(segment: int) -> List[AccountModel]:
+        return list(AccountModel.scan(segment=segment, total_segments=segments))
+
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        results = executor.map(scan, range(segments))
+
+    accounts = {
+        account.account_name: account for result in results for account in result
+    }
+    logger.debug(f"Scanned {len(accounts)} accounts in {segments} segments")
+    return accounts
+
+
+def build_import(
+    product: Dict[str, Any], member: Dict[str, Any], now: datetime
+) -> AccountModel:
+    """
+    Build the item of an account provisioned outside the API
+    """
+    return AccountModel(
+        product["Name"],
+        account_email=member["Email"],
+        account_id=member["Id"],
+        record_id=product.get("LastProvisioningRecordId") or product["LastRecordId"],
+        ou_name=member["OrganizationalUnitName"],
+        ou_id=member["OrganizationalUnitId"],
+        status=PRODUCT_STATUSES[product["Status"]],
+        queued_at=product["CreatedTime"],
+        created_at=product["CreatedTime"],
+        updated_at=now,
+    )
+
+
+def plan(
+    accounts: Dict[str, AccountModel],
+    products: Dict[str, Dict[str, Any]],
+    members: Dict[str, Dict[str, Any]],
+    now: datetime,
+    requeue_after: timedelta,
+) -> List[Correction]:
+    """
+    Compare the table with the provisioned products of Service Catalog and the accounts
+    of the organization, all by account name, and return the corrections sorted by
+    account name:
+
+    - provisioned products without an account are imported, once the account has joined
+      the organization (its email address is not known before)
+    - accounts whose status or record, account or organizational unit IDs lag behind
+      their provisioned product are updated. Finished accounts never go back to an
+      active status, as a provisioned product is also under change while Control Tower
+      updates it.
+    - QUEUED accounts without a provisioned product that have not changed for
+      ``requeue_after`` are sent to the queue again, in case their message was lost.
+      The queue is FIFO with a message group per account, so a duplicate message is
+      only received once the original one is deleted.
+    """
+    corrections = []
+    missing = 0
+
+    for name in sorted(set(accounts) | set(products)):
+        account = accounts.get(name)
+        product = products.get(name)
+        member = members.get(name)
+
+        if account is None:
+            if product["Status"] in PRODUCT_STATUSES and member:
+                account = build_import(product, member, now)
+                corrections.append(Correction(Correction.IMPORT, account))
+            continue
+
+        if product is None:
+            if account.status != "QUEUED":
+                missing += 1
+            elif (account.updated_at or account.queued_at) + requeue_after <= now:
+                corrections.append(
+                    Correction(Correction.REQUEUE, account, values={"updated_at": now})
+                )
+            continue
+
+        if account.status == "QUEUED" and product["CreatedTime"] + SETTLE_TIME > now:
+            continue
+
+        status = PRODUCT_STATUSES.get(product["Status"], account.status)
+        if account.status in FINISH_STATUSES and status not in FINISH_STATUSES:
+            status = account.status
+
+        values: Dict[str, Any] = {}
+        record_id = product.get("LastProvisioningRecordId") or product["LastRecordId"]
+        if record_id and not account.record_id:
+            values["record_id"] = record_id
+        if not account.created_at:
+            values["created_at"] = product["CreatedTime"]
+        if member and not account.account_id:
+            values["account_id"] = member["Id"]
+        if member and not account.ou_id:
+            values["ou_id"] = member["OrganizationalUnitId"]
+
+        if status == account.status and not values:
+            continue
+
+        values["updated_at"] = now
+        corrections.append(Correction(Correction.UPDATE, account, status, values))
+
+    if missing:
+        logger.warning(f"Found {missing} accounts without a provisioned product")
+
+    return corrections
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from aws_lambda_powertools import Logger
+import botocore
+from controltowerlib import get_client
+import pynamodb
+
+from .models import AccountModel, LeaseModel
+from .status import is_conditional_check_failed
+
+CT_MAX_CONCURRENT_ACCOUNTS = 5  # Control Tower Account Factory limit
+LEASE_PK = "lease"
+LEASE_DURATION = timedelta(hours=2)
+logger = Logger(child=True)
+
+__all__ = ["Scheduler", "CT_MAX_CONCURRENT_ACCOUNTS"]
+
+
+class Scheduler:
+    """
+    Admit at most N concurrent account provisionings using leases stored in DynamoDB.
+
+    Each slot is a single item that is claimed with a conditional write, so concurrent
+    processor invocations can never hold more than N leases. A lease is released when
+    the account reaches a finished status, or lapses once it expires.
+    """
+
+    def __init__(self, slots: int, duration: timedelta = LEASE_DURATION) -> None:
+        self.slots = max(1, min(slots, CT_MAX_CONCURRENT_ACCOUNTS))
+        self.duration = duration
+
+    @staticmethod
+    def slot_key(slot: int) -> str:
+        return f"slot#{slot:02d}"
+
+    def leases(self) -> List[LeaseModel]:
+        """
+        Return the current lease items (slots never claimed have no item)
+        """
+        return list(LeaseModel.query(LEASE_PK, consistent_read=True))
+
+    def acquire(self, account_name: str) -> Optional[str]:
+        """
+        Claim (or extend) a provisioning slot for an account, returning the slot key or
+        None if every slot is held by another account
+        """
+        now = datetime.now(timezone.utc)
+
+        held = {}
+        for lease in self.leases():
+            if lease.account_name and lease.expires_at and lease.expires_at > now:
+                held[lease.sk] = lease.account_name
+
+        candidates = [key for key, name in held.items() if name == account_name] + [
+            self.slot_key(slot)
+            for slot in range(self.slots)
+            if self.slot_key(slot) not in held
+        ]
+
+        for key in candidates:
+            lease = LeaseModel(LEASE_PK, key)
+            try:
+                lease.update(
+                    actions=[
+                        LeaseModel.account_name.set(account_name),
+                        LeaseModel.acquired_at.set(now),
+                        LeaseModel.expires_at.set(now + self.duration),
+                    ],
+                    condition=(
+                        LeaseModel.account_name.does_not_exist()
+                        | (LeaseModel.expires_at < now)
+                        | (LeaseModel.account_name == account_name)
+                    ),
+                )
+            except pynamodb.exceptions.UpdateError as error:
+                if is_conditional_check_failed(error):
+                    logger.debug(f"Lease {key} was claimed concurrently")
+                    continue
+                logger.exception(f"Unable to acquire lease {key}")
+                raise error
+
+            logger.info(f"Account '{account_name}' acquired lease {key}")
+            return key
+
+        logger.info(f"All {self.slots} provisioning slots are in use")
+        return None
+
+    def release(self, account_name: str) -> None:
+        """
+        Release every lease held by an account
+        """
+        for lease in self.leases():
+            self._release(lease, account_name)
+
+    def finalize(self, accounts: List[AccountModel], queue_url: str) -> None:
+        """
+        Release the provisioning slots of accounts that reached a finished status and
+        delete their queue messages
+
+        Parameters
+        ----------
+        accounts: List[AccountModel]
+            Accounts that reached a finished status
+        queue_url: str
+            URL of the queue the accounts were received from
+        """
+        leases = self.leases()
+        for account in accounts:
+            for lease in leases:
+                self._release(lease, account.account_name)
+
+            if not account.receipt_handle:
+                continue
+            try:
+                get_client("sqs").delete_message(
+                    QueueUrl=queue_url, ReceiptHandle=account.receipt_handle
+                )
+                logger.info(
+                    f"Deleted queue message for account '{account.account_name}'"
+                )
+            except botocore.exceptions.ClientError:
+                # the message was received again since, the processor will delete it instead
+                logger.exception("Unable to delete queue message")
+
+    @staticmethod
+    def _release(lease: LeaseModel, account_name: str) -> None:
+        if lease.account_name != account_name:
+            return
+        try:
+            lease.update(
+                actions=[
+                    LeaseModel.account_name.remove(),
+                    LeaseModel.acquired_at.remove(),
+                    LeaseModel.expires_at.remove(),
+                ],
+                condition=(LeaseModel.account_name == account_name),
+            )
+            logger.info(f"Account '{account_name}' released lease {lease.sk}")
+        except pynamodb.exceptions.UpdateError as error:
+            if is_conditional_check_failed(error):
+                # lease expired and was claimed by another account
+                return
+            logger.exception(f"Unable to release lease {lease.sk}")
+            raise error
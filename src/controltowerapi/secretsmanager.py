@@ -1,26 +1,47 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from datetime import datetime, timedelta, timezone
 import json
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 from aws_lambda_powertools import Logger
-import boto3
 import botocore
+from controltowerlib import get_client
 
 logger = Logger(child=True)
 
-__all__ = ["SecretsManager"]
+# a secret being rotated has its new value in AWSPENDING until rotation completes
+VERSION_STAGES = ("AWSCURRENT", "AWSPENDING")
+SECRET_CACHE_TTL = timedelta(minutes=5)
+# time before another attempt after a failed refresh, so an outage of Secrets Manager
+# does not add blocking calls to every request
+SECRET_RETRY_INTERVAL = timedelta(seconds=30)
+
+__all__ = ["SecretsManager", "SecretCache"]
 
 
 class SecretsManager:
-    def __init__(self) -> None:
-        self.client = boto3.client("secretsmanager")
+    @property
+    def client(self) -> Any:
+        return get_client("secretsmanager")
+
+    def get_secret_value(
+        self, secret_id: str, key: str = None, version_stage: str = None
+    ) -> Optional[str]:
+        params = {"SecretId": secret_id}
+        if version_stage:
+            params["VersionStage"] = version_stage
 
-    def get_secret_value(self, secret_id: str, key: str = None) -> Optional[str]:
         try:
-            response = self.client.get_secret_value(SecretId=secret_id)
+            response = self.client.get_secret_value(**params)
         except botocore.exceptions.ClientError as error:
+            if (
+                version_stage == "AWSPENDING"
+                and error.response["Error"]["Code"] == "ResourceNotFoundException"
+            ):
+                logger.debug(f"Secret {secret_id} is not being rotated")
+                return None
             logger.exception(f"Unable to get secret value for {secret_id}")
             return None
 
@@ -35,3 +56,65 @@ class SecretsManager:
             return None
 
         return data.get(key)
+
+
+class SecretCache:
+    """
+    Cache the values of a secret across the AWSCURRENT and AWSPENDING version stages, so
+    both the old and new values are accepted while the secret is rotated.
+
+    Values are fetched on the first lookup and fetched again, synchronously, on the
+    first lookup after the TTL, which stays well within the time both stages remain
+    valid during a rotation. A Lambda environment is frozen between invocations, so a
+    refresh cannot happen in the background. If a refresh fails, the previous values
+    are kept and no lookup tries again for the retry interval.
+    """
+
+    def __init__(
+        self,
+        secret_id: str,
+        key: str = None,
+        ttl: timedelta = SECRET_CACHE_TTL,
+        retry_interval: timedelta = SECRET_RETRY_INTERVAL,
+    ) -> None:
+        self.secret_id = secret_id
+        self.key = key
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._secretsmanager: Optional[SecretsManager] = None
+        self._values: Tuple[str, ...] = ()
+        self._expires_at: Optional[datetime] = None
+
+    def get_values(self) -> Tuple[str, ...]:
+        """
+        Return every currently valid value of the secret
+        """
+        if self._expires_at is None or self._expires_at <= datetime.now(timezone.utc):
+            self.refresh()
+        return self._values
+
+    def refresh(self) -> None:
+        """
+        Fetch the secret values of every version stage from Secrets Manager
+        """
+        if self._secretsmanager is None:
+            self._secretsmanager = SecretsManager()
+
+        values = []
+        for stage in VERSION_STAGES:
+            value = self._secretsmanager.get_secret_value(
+                self.secret_id, self.key, version_stage=stage
+            )
+            if value and value not in values:
+                values.append(value)
+
+        if not values:
+            logger.error(
+                f"Unable to refresh secret {self.secret_id}, retrying in "
+                f"{self.retry_interval.total_seconds():.0f} seconds"
+            )
+            self._expires_at = datetime.now(timezone.utc) + self.retry_interval
+            return
+
+        self._values = tuple(values)
+        self._expires_at = datetime.now(timezone.utc) + self.ttl
@@ -1,22 +1,32 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from typing import Dict, Optional, Any
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any
 
 from aws_lambda_powertools import Logger
-import boto3
 import botocore
+from controltowerlib import get_client
+import pynamodb
+
+from .models import ServiceCatalogModel
 
 CT_PORTFOLIO_NAME = "AWS Control Tower Account Factory Portfolio"
 CT_PRODUCT_NAME = "AWS Control Tower Account Factory"
+DISCOVERY_PK = "servicecatalog"
+DISCOVERY_SK = "discovery"
+DISCOVERY_TTL = timedelta(hours=24)  # lifetime of the persisted DynamoDB item
+DISCOVERY_MEMO_TTL = timedelta(minutes=15)  # lifetime of the in-process copy
+PROVISIONED_PRODUCTS_PAGE_SIZE = 100  # maximum allowed by SearchProvisionedProducts
 logger = Logger(child=True)
 
-__all__ = ["ServiceCatalog"]
+__all__ = ["ServiceCatalog", "ProductDiscovery"]
 
 
 class ServiceCatalog:
-    def __init__(self) -> None:
-        self.client = boto3.client("servicecatalog")
+    @property
+    def client(self) -> Any:
+        return get_client("servicecatalog")
 
     def get_ct_portfolio_id(self) -> Optional[str]:
         """
@@ -30,9 +40,9 @@ class ServiceCatalog:
                     return portfolio["Id"]
         return None
 
-    def associate_principal(self, portfolio_id: str, principal_arn: str) -> None:
+    def associate_principal(self, portfolio_id: str, principal_arn: str) -> bool:
         """
-        Associate an IAM principal to a portfolio
+        Associate an IAM principal to a portfolio, returning whether the association succeeded
         """
         try:
             self.client.associate_principal_with_portfolio(
@@ -44,6 +54,8 @@ class ServiceCatalog:
             logger.exception(
                 f"Unable to associate principal to portfolio {portfolio_id}"
             )
+            return False
+        return True
 
     def get_ct_product(self) -> Dict[str, str]:
         """
@@ -104,6 +116,33 @@ class ServiceCatalog:
 
         return response.get("RecordDetail", {})
 
+    def search_provisioned_products(self) -> List[Dict[str, Any]]:
+        """
+        Return every Control Tower Account Factory provisioned product of the account
+        """
+        products = []
+        params = {
+            "AccessLevelFilter": {"Key": "Account", "Value": "self"},
+            "PageSize": PROVISIONED_PRODUCTS_PAGE_SIZE,
+        }
+        try:
+            while True:
+                response = self.client.search_provisioned_products(**params)
+                products.extend(
+                    product
+                    for product in response.get("ProvisionedProducts", [])
+                    if product.get("ProductName") == CT_PRODUCT_NAME
+                )
+                if not response.get("NextPageToken"):
+                    break
+                params["PageToken"] = response["NextPageToken"]
+        except botocore.exceptions.ClientError as error:
+            logger.exception("Unable to search provisioned products")
+            raise error
+
+        logger.debug(f"Found {len(products)} provisioned accounts")
+        return products
+
     def describe_record(self, record_id: str) -> Dict[str, Any]:
         """
         Describe a provisioned product record
@@ -115,3 +154,132 @@ class ServiceCatalog:
             raise error
 
         return response
+
+
+def is_stale_artifact_error(error: Exception) -> bool:
+    """
+    Return whether Service Catalog rejected a request because the provisioning artifact
+    is no longer active (the product was updated after it was discovered)
+    """
+    if not isinstance(error, botocore.exceptions.ClientError):
+        return False
+    code = error.response.get("Error", {}).get("Code")
+    message = error.response.get("Error", {}).get("Message", "")
+    return (
+        code in ("InvalidParametersException", "ResourceNotFoundException")
+        and "artifact" in message.lower()
+    )
+
+
+class ProductDiscovery:
+    """
+    Discover the Control Tower Account Factory product once and cache the result, both
+    in-process and in a DynamoDB config item shared by every container
+    """
+
+    def __init__(self, servicecatalog: ServiceCatalog, principal_arn: str) -> None:
+        self.servicecatalog = servicecatalog
+        self.principal_arn = principal_arn
+        self._product: Optional[Dict[str, str]] = None
+        self._memo_expires_at: Optional[datetime] = None
+
+    def get_product(self) -> Dict[str, str]:
+        """
+        Return the product ID and DEFAULT provisioning artifact ID, discovering them
+        through Service Catalog only if neither cache has them
+        """
+        now = datetime.now(timezone.utc)
+        if self._product and self._memo_expires_at > now:
+            return self._product
+
+        item = self._load(now)
+        if not item:
+            item = self._discover(now)
+
+        if self.principal_arn not in (item.associated_principals or set()):
+            self._associate(item)
+
+        self._product = {
+            "ProductId": item.product_id,
+            "ProvisioningArtifactId": item.provisioning_artifact_id,
+        }
+        self._memo_expires_at = min(now + DISCOVERY_MEMO_TTL, item.expires_at)
+        return self._product
+
+    def invalidate(self) -> None:
+        """
+        Drop both the in-process and persisted discovery results
+        """
+        logger.info("Invalidating Service Catalog discovery cache")
+        self._product = None
+        self._memo_expires_at = None
+        try:
+            ServiceCatalogModel(DISCOVERY_PK, DISCOVERY_SK).delete()
+        except pynamodb.exceptions.DeleteError:
+            logger.exception("Unable to delete Service Catalog discovery cache")
+
+    def provision_product(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Provision a new AWS account, re-discovering the product once if Service Catalog
+        rejects the cached provisioning artifact as stale
+        """
+        try:
+            return self.servicecatalog.provision_product(self.get_product(), parameters)
+        except botocore.exceptions.ClientError as error:
+            if not is_stale_artifact_error(error):
+                raise error
+            logger.warning("Cached provisioning artifact is stale, re-discovering")
+
+        self.invalidate()
+        return self.servicecatalog.provision_product(self.get_product(), parameters)
+
+    def _load(self, now: datetime) -> Optional[ServiceCatalogModel]:
+        try:
+            item = ServiceCatalogModel.get(DISCOVERY_PK, DISCOVERY_SK)
+        except ServiceCatalogModel.DoesNotExist:
+            return None
+        except pynamodb.exceptions.GetError:
+            logger.exception("Unable to load Service Catalog discovery cache")
+            return None
+
+        # DynamoDB deletes expired items lazily, so expiration is checked here as well
+        if item.expires_at <= now:
+            logger.debug("Service Catalog discovery cache has expired")
+            return None
+        return item
+
+    def _discover(self, now: datetime) -> ServiceCatalogModel:
+        portfolio_id = self.servicecatalog.get_ct_portfolio_id()
+        if not portfolio_id:
+            raise Exception(f"Unable to locate portfolio '{CT_PORTFOLIO_NAME}'")
+
+        product = self.servicecatalog.get_ct_product()
+
+        item = ServiceCatalogModel(
+            DISCOVERY_PK,
+            DISCOVERY_SK,
+            portfolio_id=portfolio_id,
+            product_id=product["ProductId"],
+            provisioning_artifact_id=product["ProvisioningArtifactId"],
+            discovered_at=now,
+            expires_at=now + DISCOVERY_TTL,
+        )
+        try:
+            item.save()
+        except pynamodb.exceptions.PutError:
+            logger.exception("Unable to save Service Catalog discovery cache")
+        return item
+
+    def _associate(self, item: ServiceCatalogModel) -> None:
+        if not self.servicecatalog.associate_principal(
+            item.portfolio_id, self.principal_arn
+        ):
+            return
+        try:
+            item.update(
+                actions=[
+                    ServiceCatalogModel.associated_principals.add({self.principal_arn})
+                ]
+            )
+        except pynamodb.exceptions.UpdateError:
+            logger.exception("Unable to save portfolio principal association")
@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+import botocore
+import pynamodb
+from pynamodb.connection import Connection
+from pynamodb.constants import ALL_OLD
+from pynamodb.expressions.condition import Condition
+from pynamodb.transactions import TransactWrite
+
+from .models import AccountModel, StatusCounterModel
+
+COUNTER_PK = "counter"
+COUNTER_SK = "status"
+TRANSACTION_LIMIT = 25  # items per TransactWriteItems request
+ACTIVE_STATUSES = {"CREATED", "IN_PROGRESS", "IN_PROGRESS_IN_ERROR"}
+FINISH_STATUSES = {"FAILED", "SUCCEEDED"}
+# order in which an account moves through its statuses, it never moves back
+STATUS_RANKS = {
+    "QUEUED": 0,
+    "CREATED": 1,
+    "IN_PROGRESS": 2,
+    "IN_PROGRESS_IN_ERROR": 3,
+    "FAILED": 4,
+    "SUCCEEDED": 4,
+}
+logger = Logger(child=True)
+metrics = Metrics()  # shares the metric set flushed by the handler's log_metrics
+
+_connection = None
+
+__all__ = [
+    "ACTIVE_STATUSES",
+    "FINISH_STATUSES",
+    "is_conditional_check_failed",
+    "get_status_counts",
+    "reset_status_counts",
+    "create",
+    "create_many",
+    "transition",
+    "transition_many",
+    "advance",
+    "delete",
+]
+
+
+def _get_connection() -> Connection:
+    global _connection
+    if _connection is None:
+        _connection = Connection(region=AccountModel.Meta.region)
+    return _connection
+
+
+# counter attribute of each status
+COUNTER_ATTRIBUTES = {
+    "QUEUED": "queued",
+    "CREATED": "created",
+    "IN_PROGRESS": "in_progress",
+    "IN_PROGRESS_IN_ERROR": "in_progress_in_error",
+    "SUCCEEDED": "succeeded",
+    "FAILED": "failed",
+}
+
+
+def _counter_attribute(status: str):
+    name = COUNTER_ATTRIBUTES.get(status)
+    if name is None:
+        raise ValueError(f"Unknown status {status}")
+    return getattr(StatusCounterModel, name)
+
+
+def is_conditional_check_failed(error: Exception) -> bool:
+    """
+    Return whether a PynamoDB error was caused by a failed condition expression, either
+    on a single item write or on any item of a transaction
+    """
+    cause = getattr(error, "cause", None)
+    if not isinstance(cause, botocore.exceptions.ClientError):
+        return False
+    if cause.response["Error"]["Code"] == "ConditionalCheckFailedException":
+        return True
+    return "ConditionalCheckFailed" in cancellation_reasons(error)
+
+
+def cancellation_reasons(error: Exception) -> List[Optional[str]]:
+    """
+    Return the cancellation reason code of each item of a cancelled transaction, in
+    request order (None for items that did not cause the cancellation)
+    """
+    cause = getattr(error, "cause", None)
+    if not isinstance(cause, botocore.exceptions.ClientError):
+        return []
+    if cause.response["Error"]["Code"] != "TransactionCanceledException":
+        return []
+
+    reasons = cause.response.get("CancellationReasons")
+    if reasons is not None:
+        return [reason.get("Code") for reason in reasons]
+
+    # PynamoDB only keeps the message, which lists the reasons as "[None, ConditionalCheckFailed]"
+    match = re.search(r"\[(.*)\]", cause.response["Error"].get("Message", ""))
+    if not match:
+        return []
+    return [
+        None if reason.strip() == "None" else reason.strip()
+        for reason in match.group(1).split(",")
+    ]
+
+
+def get_status_counts() -> Dict[str, int]:
+    """
+    Return the number of accounts in each status with a single consistent read
+    """
+    try:
+        counter = StatusCounterModel.get(COUNTER_PK, COUNTER_SK, consistent_read=True)
+    except StatusCounterModel.DoesNotExist:
+        counter = StatusCounterModel(COUNTER_PK, COUNTER_SK)
+
+    return {
+        attribute.attr_name: int(getattr(counter, name) or 0)
+        for name, attribute in StatusCounterModel.get_attributes().items()
+        if not attribute.is_hash_key and not attribute.is_range_key
+    }
+
+
+def reset_status_counts(counts: Dict[str, int], expected: Dict[str, int]) -> bool:
+    """
+    Overwrite the counters with the number of accounts in each status, as counted from
+    a scan of the accounts table, returning whether they were rewritten.
+
+    This seeds the counters of accounts that existed before the counters did. The
+    counters are only rewritten if they still hold the values read before the scan
+    started, otherwise a transition made during the scan would be lost, and the reset
+    is left for the next scan.
+
+    Parameters
+    ----------
+    counts: Dict[str, int]
+        The number of scanned accounts in each status
+    expected: Dict[str, int]
+        The counters, as returned by get_status_counts before the scan started
+    """
+    unknown = set(counts) - set(COUNTER_ATTRIBUTES)
+    if unknown:
+        raise ValueError(f"Unknown statuses {', '.join(sorted(unknown))}")
+
+    counts = {status: counts.get(status, 0) for status in COUNTER_ATTRIBUTES}
+    expected = {status: expected.get(status, 0) for status in COUNTER_ATTRIBUTES}
+    if expected == counts:
+        return False
+
+    condition = None
+    for status, count in expected.items():
+        attribute = getattr(StatusCounterModel, COUNTER_ATTRIBUTES[status])
+        # counters that were never incremented are not stored
+        unchanged = attribute == count
+        if not count:
+            unchanged = attribute.does_not_exist() | unchanged
+        condition = unchanged if condition is None else condition & unchanged
+
+    counter = StatusCounterModel(
+        COUNTER_PK,
+        COUNTER_SK,
+        **{COUNTER_ATTRIBUTES[status]: count for status, count in counts.items()},
+    )
+    try:
+        counter.save(condition=condition)
+    except pynamodb.exceptions.PutError as error:
+        if not is_conditional_check_failed(error):
+            raise error
+        logger.info("Account status counters changed during the scan, not resetting")
+        return False
+
+    logger.warning(f"Reset account status counters from {expected} to {counts}")
+    return True
+
+
+def create(account: AccountModel, condition: Optional[Condition] = None) -> None:
+    """
+    Save a new account and count it in its initial status
+    """
+    counter = StatusCounterModel(COUNTER_PK, COUNTER_SK)
+    with TransactWrite(connection=_get_connection()) as transaction:
+        transaction.save(account, condition=condition)
+        transaction.update(counter, actions=[_counter_attribute(account.status).add(1)])
+
+
+def create_many(
+    accounts: List[AccountModel], condition: Optional[Condition] = None
+) -> Tuple[List[AccountModel], List[AccountModel]]:
+    """
+    Save new accounts in as few transactions as possible, returning the accounts that
+    were rejected because the condition failed and the accounts that could not be saved
+    for any other reason. All other accounts are saved.
+    """
+    rejected = []
+    failed = []
+    size = TRANSACTION_LIMIT - 1  # leave room for the counters item
+
+    for start in range(0, len(accounts), size):
+        chunk = accounts[start : start + size]
+        while chunk:
+            counts: Dict[str, int] = {}
+            for account in chunk:
+                counts[account.status] = counts.get(account.status, 0) + 1
+
+            counter = StatusCounterModel(COUNTER_PK, COUNTER_SK)
+            try:
+                with TransactWrite(connection=_get_connection()) as transaction:
+                    for account in chunk:
+                        transaction.save(account, condition=condition)
+                    transaction.update(
+                        counter,
+                        actions=[
+                            _counter_attribute(status).add(count)
+                            for status, count in counts.items()
+                        ],
+                    )
+                break
+            except pynamodb.exceptions.TransactWriteError as error:
+                reasons = cancellation_reasons(error)[: len(chunk)]
+                conflicts = {
+                    index
+                    for index, reason in enumerate(reasons)
+                    if reason == "ConditionalCheckFailed"
+                }
+                if not conflicts:
+                    logger.exception("Unable to save accounts")
+                    failed.extend(chunk)
+                    break
+                rejected.extend(chunk[index] for index in sorted(conflicts))
+                chunk = [
+                    account
+                    for index, account in enumerate(chunk)
+                    if index not in conflicts
+                ]
+
+    return rejected, failed
+
+
+def transition(
+    account: AccountModel,
+    status: str,
+    condition: Optional[Condition] = None,
+    **values: Any,
+) -> None:
+    """
+    Move an account to a new status, setting any other attribute values alongside it.
+
+    The update is conditional on the account still having the status it was loaded
+    with, so the counters of the previous and new status stay exact.
+    """
+    previous = account.status
+    values["status"] = status
+    actions = [getattr(AccountModel, name).set(value) for name, value in values.items()]
+
+    guard = AccountModel.status == previous
+    if condition is not None:
+        guard = guard & condition
+
+    if status == previous:
+        account.update(actions=actions, condition=guard)
+        return
+
+    counter = StatusCounterModel(COUNTER_PK, COUNTER_SK)
+    counter_actions = [
+        _counter_attribute(previous).add(-1),
+        _counter_attribute(status).add(1),
+    ]
+    with TransactWrite(connection=_get_connection()) as transaction:
+        transaction.update(account, actions=actions, condition=guard)
+        transaction.update(counter, actions=counter_actions)
+
+    # transactions do not return the new item, so apply the values locally
+    for name, value in values.items():
+        setattr(account, name, value)
+
+    logger.debug(f"Account '{account.account_name}' moved from {previous} to {status}")
+
+
+def advance(account_name: str, status: str, **values: Any) -> Optional[AccountModel]:
+    """
+    Move an account to a later status, or keep it in the same one, setting any other
+    attribute values alongside it, without reading the account first.
+
+    A single conditional UpdateItem rejects the change if the account does not exist or
+    is already past the status (an event delivered out of order), in which case None is
+    returned. Otherwise the account is returned as updated, built from the previous item
+    the update returns. The counters are updated by a second write only if the status
+    changed, as a transaction would not return the previous item.
+
+    This saves the read of ``transition`` at the cost of atomicity: if the counter update
+    fails, the account has already moved and a retry would find it in the new status, so
+    the counters could not be fixed by raising. The failure is logged and counted in the
+    StatusCounterErrors metric instead, the account is still returned, and the next
+    complete reconciliation recounts the counters.
+    """
+    rank = STATUS_RANKS.get(status)
+    if rank is None:
+        raise ValueError(f"Unknown status {status}")
+    earlier = [
+        previous
+        for previous, previous_rank in STATUS_RANKS.items()
+        if previous_rank < rank
+    ]
+
+    values["status"] = status
+    actions = [getattr(AccountModel, name).set(value) for name, value in values.items()]
+    guard = AccountModel.status.is_in(status, *earlier)
+
+    try:
+        data = AccountModel._get_connection().update_item(
+            account_name, actions=actions, condition=guard, return_values=ALL_OLD
+        )
+    except pynamodb.exceptions.UpdateError as error:
+        if is_conditional_check_failed(error):
+            return None
+        raise error
+
+    account = AccountModel.from_raw_data(data["Attributes"])
+    previous = account.status
+    for name, value in values.items():
+        setattr(account, name, value)
+
+    if status != previous:
+        try:
+            StatusCounterModel(COUNTER_PK, COUNTER_SK).update(
+                actions=[
+                    _counter_attribute(previous).add(-1),
+                    _counter_attribute(status).add(1),
+                ]
+            )
+        except pynamodb.exceptions.UpdateError:
+            logger.exception(
+                f"Unable to count account '{account_name}' from {previous} to {status}"
+            )
+            metrics.add_metric(
+                name="StatusCounterErrors", unit=MetricUnit.Count, value=1
+            )
+        logger.debug(f"Account '{account_name}' moved from {previous} to {status}")
+
+    return account
+
+
+def transition_many(
+    changes: List[Tuple[AccountModel, str, Dict[str, Any]]]
+) -> Tuple[List[AccountModel], List[AccountModel]]:
+    """
+    Apply (account, status, values) changes in as few transactions as possible, each
+    conditional on the account still having the status it was loaded with. Returns the
+    accounts that were changed concurrently and the accounts that could not be updated
+    for any other reason, like ``create_many``. All other changes are applied.
+    """
+    rejected = []
+    failed = []
+    size = TRANSACTION_LIMIT - 1  # leave room for the counters item
+
+    for start in range(0, len(changes), size):
+        chunk = changes[start : start + size]
+        while chunk:
+            counts: Dict[str, int] = {}
+            for account, status, _ in chunk:
+                if status != account.status:
+                    counts[account.status] = counts.get(account.status, 0) - 1
+                    counts[status] = counts.get(status, 0) + 1
+
+            counter = StatusCounterModel(COUNTER_PK, COUNTER_SK)
+            counter_actions = [
+                _counter_attribute(status).add(count)
+                for status, count in counts.items()
+                if count
+            ]
+            try:
+                with TransactWrite(connection=_get_connection()) as transaction:
+                    for account, status, values in chunk:
+                        values = dict(values, status=status)
+                        transaction.update(
+                            account,
+                            actions=[
+                                getattr(AccountModel, name).set(value)
+                                for name, value in values.items()
+                            ],
+                            condition=(AccountModel.status == account.status),
+                        )
+                    if counter_actions:
+                        transaction.update(counter, actions=counter_actions)
+                break
+            except pynamodb.exceptions.TransactWriteError as error:
+                reasons = cancellation_reasons(error)[: len(chunk)]
+                conflicts = {
+                    index
+                    for index, reason in enumerate(reasons)
+                    if reason == "ConditionalCheckFailed"
+                }
+                if not conflicts:
+                    logger.exception("Unable to update accounts")
+                    failed.extend(account for account, _, _ in chunk)
+                    break
+                rejected.extend(chunk[index][0] for index in sorted(conflicts))
+                chunk = [
+                    change
+                    for index, change in enumerate(chunk)
+                    if index not in conflicts
+                ]
+
+    # transactions do not return the new items, so apply the values locally
+    unchanged = {id(account) for account in rejected + failed}
+    for account, status, values in changes:
+        if id(account) in unchanged:
+            continue
+        for name, value in dict(values, status=status).items():
+            setattr(account, name, value)
+
+    return rejected, failed
+
+
+def delete(account: AccountModel, condition: Optional[Condition] = None) -> None:
+    """
+    Delete an account and stop counting it in its status
+    """
+    guard = AccountModel.status == account.status
+    if condition is not None:
+        guard = guard & condition
+
+    counter = StatusCounterModel(COUNTER_PK, COUNTER_SK)
+    with TransactWrite(connection=_get_connection()) as transaction:
+        transaction.delete(account, condition=guard)
+        transaction.update(
+            counter, actions=[_counter_attribute(account.status).add(-1)]
+        )
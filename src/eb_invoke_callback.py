@@ -9,76 +9,147 @@ from typing import Dict, Any
 import warnings
 
 from aws_lambda_powertools import Logger, Metrics, Tracer
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
-import requests
-
-from controltowerapi.models import AccountModel
+import botocore
+from controltowerlib import get_client, record_api_calls, warmup_handler
+from controltowerlib.warmup import create_clients, describe_tables
+import pynamodb
+
+from controltowerapi.models import AccountModel, LeaseModel, StatusCounterModel
+from controltowerapi.scheduler import Scheduler
+from controltowerapi.status import (
+    FINISH_STATUSES,
+    advance,
+    is_conditional_check_failed,
+)
 
 warnings.filterwarnings("ignore", "No metrics to publish*")
 
-tracer = Tracer()
+tracer = Tracer(patch_modules=["botocore", "pynamodb"])
 logger = Logger()
 metrics = Metrics()
 
-SECRET_ID = os.environ["SECRET_ID"]
-TOKEN = None
+scheduler = Scheduler(int(os.environ.get("MAX_CONCURRENT_ACCOUNTS", "1")))
+
+ACCOUNT_QUEUE_URL = os.environ["ACCOUNT_QUEUE_URL"]
+CALLBACK_QUEUE_URL = os.environ["CALLBACK_QUEUE_URL"]
+
+
+@tracer.capture_method
+def enqueue_callback(account: AccountModel) -> None:
+    """
+    Queue a signed callback for delivery by the callback worker
+
+    Parameters
+    ----------
+    account: AccountModel
+        An account with a callback URL
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        If the callback could not be queued
+    """
+    data = {
+        "account_name": account.account_name,
+        "account_id": account.account_id,
+        "ou_name": account.ou_name,
+        "ou_id": account.ou_id,
+        "status": account.status,
+        "created_at": str(account.created_at),
+    }
+
+    payload = json.dumps(data, indent=None, sort_keys=True, separators=(",", ":"))
+
+    headers = {"Content-Type": "application/json"}
+
+    if account.callback_secret:
+        key = str(account.callback_secret).encode()
+        sig = hmac.new(key, payload.encode(), "sha1").hexdigest()
+        headers["X-Signature"] = "sha1=" + sig
+
+    message = {
+        "account_name": account.account_name,
+        "status": account.status,
+        "url": account.callback_url,
+        "headers": headers,
+        "payload": payload,
+    }
+
+    try:
+        get_client("sqs").send_message(
+            QueueUrl=CALLBACK_QUEUE_URL,
+            MessageBody=json.dumps(message, indent=None, separators=(",", ":")),
+        )
+        logger.info(f"Queued callback for account '{account.account_name}'")
+    except botocore.exceptions.ClientError:
+        # fail the invocation, for EventBridge to retry the event
+        logger.exception("Unable to queue callback")
+        raise
 
 
 @metrics.log_metrics(capture_cold_start_metric=True)
+@record_api_calls(metrics)
+@warmup_handler(
+    tables=describe_tables(AccountModel, LeaseModel, StatusCounterModel),
+    clients=create_clients("sqs"),
+)
 @tracer.capture_lambda_handler
 @logger.inject_lambda_context(log_event=True)
 def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> None:
 
     account_name = event.get("account", {}).get("accountName")
 
-    try:
-        account = AccountModel.get(account_name)
-    except AccountModel.DoesNotExist:
-        logger.error(f'Account "{account_name}" does not exist')
-        return
-
-    actions = []
+    values = {}
     account_id = event.get("account", {}).get("accountId")
     if account_id:
-        actions.append(AccountModel.account_id.set(account_id))
+        values["account_id"] = account_id
 
     ou_name = event.get("organizationalUnit", {}).get("organizationalUnitName")
     if ou_name:
-        actions.append(AccountModel.ou_name.set(ou_name))
+        values["ou_name"] = ou_name
 
     ou_id = event.get("organizationalUnit", {}).get("organizationalUnitId")
     if ou_id:
-        actions.append(AccountModel.ou_id.set(ou_id))
+        values["ou_id"] = ou_id
 
-    state = event.get("state")
-    if state:
-        actions.append(AccountModel.status.set(state))
+    message = event.get("message")
+    if message:
+        values["status_message"] = message
 
-    if actions:
-        actions.append(AccountModel.updated_at.set(datetime.now(timezone.utc)))
+    values["updated_at"] = datetime.now(timezone.utc)
 
-    account.update(actions=actions)
-    account.refresh()
+    state = event.get("state")
+    if state:
+        account = advance(account_name, state, **values)
+        if account is None:
+            logger.warning(
+                f'Ignoring {state} event for account "{account_name}", which does not '
+                "exist or is already past it"
+            )
+            metrics.add_metric(name="StaleEvents", unit=MetricUnit.Count, value=1)
+            return
+    else:
+        account = AccountModel(account_name)
+        try:
+            # returns the new item
+            account.update(
+                actions=[
+                    getattr(AccountModel, name).set(value)
+                    for name, value in values.items()
+                ],
+                condition=AccountModel.account_name.exists(),
+            )
+        except pynamodb.exceptions.UpdateError as error:
+            if not is_conditional_check_failed(error):
+                logger.exception(f'Unable to update account "{account_name}"')
+                raise error
+            logger.error(f'Account "{account_name}" does not exist')
+            return
+
+    if account.status in FINISH_STATUSES:
+        scheduler.finalize([account], ACCOUNT_QUEUE_URL)
 
     if account.callback_url:
-        print(f"Send callback to {account.callback_url}")
-
-        data = {
-            "account_name": account.account_name,
-            "account_id": account.account_id,
-            "ou_name": account.ou_name,
-            "ou_id": account.ou_id,
-            "status": account.status,
-            "created_at": str(account.created_at),
-        }
-
-        payload = json.dumps(data, indent=None, sort_keys=True, separator=(",", ":"))
-
-        headers = {}
-
-        if account.callback_secret:
-            key = str(account.callback_secret).encode()
-            sig = hmac.new(key, payload.encode(), "sha1").hexdigest()
-            headers["X-Signature"] = "sha1=" + sig
-
-        response = requests.post(account.callback_url, payload=payload, headers=headers)
+        enqueue_callback(account)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from typing import Dict, Any, List, Tuple
+import warnings
+
+from aws_lambda_powertools import Logger, Metrics, Tracer
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.typing import LambdaContext
+import botocore
+from controltowerlib import get_client, record_api_calls, warmup_handler
+from controltowerlib.checkpoint import Checkpoint, CheckpointModel
+from controltowerlib.warmup import create_clients, describe_tables
+import pynamodb
+
+from controltowerapi.models import AccountModel, LeaseModel, StatusCounterModel
+from controltowerapi.organizations import Organizations
+from controltowerapi.reconcile import Correction, plan, scan_accounts
+from controltowerapi.scheduler import Scheduler
+from controltowerapi.servicecatalog import ServiceCatalog
+from controltowerapi.status import (
+    FINISH_STATUSES,
+    TRANSACTION_LIMIT,
+    create_many,
+    get_status_counts,
+    reset_status_counts,
+    transition_many,
+)
+
+warnings.filterwarnings("ignore", "No metrics to publish*")
+
+tracer = Tracer(patch_modules=["botocore", "pynamodb"])
+logger = Logger()
+metrics = Metrics()
+servicecatalog = ServiceCatalog()
+organizations = Organizations()
+scheduler = Scheduler(int(os.environ.get("MAX_CONCURRENT_ACCOUNTS", "1")))
+checkpoint = Checkpoint("reconcile")
+
+ACCOUNT_QUEUE_URL = os.environ["ACCOUNT_QUEUE_URL"]
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "4"))
+REQUEUE_AFTER = timedelta(seconds=int(os.environ.get("REQUEUE_AFTER", "21600")))
+BATCH_SIZE = TRANSACTION_LIMIT - 1  # corrections applied per transaction
+SQS_BATCH_SIZE = 10  # maximum entries per SendMessageBatch request
+TIME_MARGIN_MS = 60000  # time left when a run stops and saves its checkpoint
+TOTALS = ("Imported", "Updated", "Requeued", "Conflicts", "Failures")
+
+
+@tracer.capture_method
+def load_sources() -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Read the table, the provisioned products and the organization concurrently
+    """
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        accounts = executor.submit(scan_accounts, SCAN_SEGMENTS)
+        products = executor.submit(servicecatalog.search_provisioned_products)
+        members = executor.submit(organizations.list_accounts)
+
+        return (
+            accounts.result(),
+            {product["Name"]: product for product in products.result()},
+            members.result(),
+        )
+
+
+@tracer.capture_method
+def requeue(accounts: List[AccountModel]) -> None:
+    """
+    Send accounts to the queue again, up to ten per request
+    """
+    for start in range(0, len(accounts), SQS_BATCH_SIZE):
+        entries = [
+            {
+                "Id": account.account_name,
+                "MessageBody": json.dumps({"AccountName": account.account_name}),
+                "MessageDeduplicationId": account.account_name,
+                "MessageGroupId": account.account_name,
+            }
+            for account in accounts[start : start + SQS_BATCH_SIZE]
+        ]
+        try:
+            response = get_client("sqs").send_message_batch(
+                QueueUrl=ACCOUNT_QUEUE_URL, Entries=entries
+            )
+        except botocore.exceptions.ClientError:
+            logger.exception("Unable to send messages to queue")
+            continue
+
+        for failure in response.get("Failed", []):
+            logger.error(
+                f"Unable to send account '{failure['Id']}' to queue: {failure.get('Message')}"
+            )
+
+
+@tracer.capture_method
+def apply(corrections: List[Correction], totals: Counter) -> List[AccountModel]:
+    """
+    Apply a batch of corrections, imports and updates each with a single transaction,
+    and return the accounts imported
+    """
+    imports = [
+        correction.account
+        for correction in corrections
+        if correction.action == Correction.IMPORT
+    ]
+    updates = [
+        correction
+        for correction in corrections
+        if correction.action != Correction.IMPORT
+    ]
+
+    rejected, failed = create_many(
+        imports, condition=AccountModel.account_name.does_not_exist()
+    )
+    skipped = {id(account) for account in rejected + failed}
+    imported = [account for account in imports if id(account) not in skipped]
+    totals["Imported"] += len(imported)
+    totals["Conflicts"] += len(rejected)
+    totals["Failures"] += len(failed)
+
+    rejected, failed = transition_many(
+        [
+            (correction.account, correction.status, correction.values)
+            for correction in updates
+        ]
+    )
+    totals["Conflicts"] += len(rejected)
+    totals["Failures"] += len(failed)
+
+    # accounts changed concurrently are left for the next run
+    skipped = {account.account_name for account in rejected + failed}
+    updates = [
+        correction for correction in updates if correction.account_name not in skipped
+    ]
+    finished = [
+        correction.account
+        for correction in updates
+        if correction.status in FINISH_STATUSES
+        and correction.previous not in FINISH_STATUSES
+    ]
+    requeued = [
+        correction.account
+        for correction in updates
+        if correction.action == Correction.REQUEUE
+    ]
+    totals["Updated"] += len(updates) - len(requeued)
+    totals["Requeued"] += len(requeued)
+
+    if finished:
+        # finished without their completion event being handled
+        scheduler.finalize(finished, ACCOUNT_QUEUE_URL)
+    if requeued:
+        requeue(requeued)
+    return imported
+
+
+@tracer.capture_method
+def recount(accounts: List[AccountModel], expected: Dict[str, int]) -> None:
+    """
+    Rewrite the status counters from the scanned accounts, which reflect the corrections
+    applied since, so counters that drifted or predate some accounts are repaired. The
+    counters are left alone if they changed since they were read before the scan.
+    """
+    counts = Counter(account.status for account in accounts)
+    try:
+        if reset_status_counts(counts, expected):
+            metrics.add_metric(
+                name="ReconcileCountersReset", unit=MetricUnit.Count, value=1
+            )
+    except (pynamodb.exceptions.PynamoDBException, ValueError):
+        # the next complete run tries again
+        logger.exception("Unable to reset account status counters")
+
+
+@metrics.log_metrics(capture_cold_start_metric=True)
+@record_api_calls(metrics)
+@warmup_handler(
+    tables=describe_tables(
+        AccountModel, CheckpointModel, LeaseModel, StatusCounterModel
+    ),
+    clients=create_clients("organizations", "servicecatalog", "sqs"),
+)
+@tracer.capture_lambda_handler
+@logger.inject_lambda_context(log_event=True)
+def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc)
+    cursor = checkpoint.load(now)
+    # read before the scan, so transitions made during it can be detected
+    counters = get_status_counts()
+
+    accounts, products, members = load_sources()
+    corrections = plan(accounts, products, members, now, REQUEUE_AFTER)
+    if cursor:
+        corrections = [
+            correction for correction in corrections if correction.account_name > cursor
+        ]
+
+    logger.info(
+        f"Found {len(corrections)} corrections for {len(accounts)} accounts, "
+        f"{len(products)} provisioned products and {len(members)} organization accounts"
+    )
+
+    totals: Counter = Counter()
+    imported: List[AccountModel] = []
+    complete = True
+    for start in range(0, len(corrections), BATCH_SIZE):
+        if start and context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+            cursor = corrections[start - 1].account_name
+            checkpoint.save(cursor, datetime.now(timezone.utc))
+            complete = False
+            break
+        imported.extend(apply(corrections[start : start + BATCH_SIZE], totals))
+
+    if complete:
+        recount(list(accounts.values()) + imported, counters)
+        if cursor is not None:
+            checkpoint.clear()
+
+    summary = {"complete": complete}
+    for name in TOTALS:
+        summary[name.lower()] = totals[name]
+        metrics.add_metric(
+            name=f"Reconcile{name}", unit=MetricUnit.Count, value=totals[name]
+        )
+
+    logger.info(summary)
+    return summary
@@ -8,12 +8,12 @@ from typing import Dict, Any
 import secrets
 
 from aws_lambda_powertools import Logger
-from controltowerapi.secretsmanager import SecretsManager
+from controltowerapi.secretsmanager import SecretCache
 
 
 logger = Logger(child=True)
 SECRET_ID = os.environ["SECRET_ID"]
-TOKEN = None
+TOKENS = SecretCache(SECRET_ID, "token")
 
 __all__ = ["build_response", "error_response", "authenticate_request"]
 
@@ -26,17 +26,29 @@ class DateTimeEncoder(json.JSONEncoder):
 
 
 def build_response(
-    code: int, data: Dict[str, Any] = None, headers: Dict[str, str] = None
+    code: int,
+    data: Dict[str, Any] = None,
+    headers: Dict[str, str] = None,
+    max_age: int = 0,
 ) -> Dict[str, Any]:
+    """
+    Build an API Gateway response. Responses are not cacheable unless max_age is set,
+    in which case clients may reuse the response for that many seconds.
+    """
 
     response = {"statusCode": code, "headers": {}}
 
     if headers and isinstance(headers, dict):
         response["headers"].update(headers)
 
-    response["headers"]["Cache-Control"] = "no-cache,no-store,must-revalidate,max-age=0"
-    response["headers"]["Expires"] = "0"
-    response["headers"]["Pragma"] = "no-cache"
+    if max_age > 0:
+        cache_control = f"private,max-age={max_age}"
+    else:
+        cache_control = "no-cache,no-store,must-revalidate,max-age=0"
+        response["headers"]["Expires"] = "0"
+        response["headers"]["Pragma"] = "no-cache"
+
+    response["headers"]["Cache-Control"] = cache_control
     response["headers"]["X-Content-Type-Options"] = "nosniff"
     response["headers"]["X-Frame-Options"] = "DENY"
     response["headers"]["X-XSS-Protection"] = "1; mode=block"
@@ -71,11 +83,9 @@ def authenticate_request(event) -> bool:
             400, "Authorization header does appear to be a bearer token"
         )
 
-    global TOKEN
-    if not TOKEN:
-        TOKEN = SecretsManager().get_secret_value(SECRET_ID, "token")
-        if not TOKEN:
-            return error_response(500, "Internal Server Error")
+    tokens = TOKENS.get_values()
+    if not tokens:
+        return error_response(500, "Internal Server Error")
 
     try:
         access_token = authorization.split(" ")[1]
@@ -84,7 +94,12 @@ def authenticate_request(event) -> bool:
             400, "Authorization header does appear to be a bearer token"
         )
 
-    if not secrets.compare_digest(TOKEN, access_token):
+    # compare against every token so the response time does not reveal which matched
+    authorized = False
+    for token in tokens:
+        authorized |= secrets.compare_digest(token, access_token)
+
+    if not authorized:
         return error_response(401, "Unauthorized")
 
     return True
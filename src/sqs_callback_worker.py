@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+import warnings
+
+from aws_lambda_powertools import Logger, Metrics, Tracer
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.typing import LambdaContext
+import botocore
+from controltowerlib import get_client, record_api_calls, warmup_handler
+from controltowerlib.warmup import create_clients
+import requests
+from requests.adapters import HTTPAdapter
+
+warnings.filterwarnings("ignore", "No metrics to publish*")
+
+tracer = Tracer(patch_modules=["botocore", "requests"])
+logger = Logger()
+metrics = Metrics()
+
+CALLBACK_QUEUE_URL = os.environ["CALLBACK_QUEUE_URL"]
+MAX_WORKERS = 10  # matches the event source batch size
+MAX_PER_HOST = int(os.environ.get("MAX_CALLBACKS_PER_HOST", "2"))
+CONNECT_TIMEOUT = 3.05  # seconds
+READ_TIMEOUT = 10  # seconds
+# time left when no more deliveries are started, as one can take CONNECT + READ timeouts
+TIME_MARGIN_MS = 15000
+BACKOFF_BASE = 30  # seconds
+BACKOFF_MAX = 3600  # seconds
+
+# one pooled session for every delivery, reused across warm invocations
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
+host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+host_semaphores_lock = threading.Lock()
+
+
+def get_host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """
+    Return the semaphore capping concurrent deliveries to the host of a URL
+    """
+    host = urlparse(url).netloc.lower()
+    with host_semaphores_lock:
+        if host not in host_semaphores:
+            host_semaphores[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return host_semaphores[host]
+
+
+def backoff_seconds(attempt: int) -> int:
+    """
+    Return an exponential backoff delay with full jitter for a delivery attempt
+    """
+    return int(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)))
+
+
+def deliver(record: Dict[str, Any], deadline: float) -> Tuple[Optional[bool], float]:
+    """
+    Deliver a single callback, returning whether it succeeded and how long it took.
+
+    Deliveries to a host wait for one another, so a batch can take longer than the
+    function timeout. No delivery is started past the deadline (a ``time.monotonic``
+    value), and None is returned instead, for the message to be received again.
+    """
+    message = json.loads(record["body"])
+    attempt = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+
+    start = time.monotonic()
+    with get_host_semaphore(message["url"]):
+        if time.monotonic() >= deadline:
+            logger.warning(
+                f"Deferring callback for account '{message.get('account_name')}' "
+                "as the function is running out of time"
+            )
+            return None, 0.0
+        try:
+            response = session.post(
+                message["url"],
+                data=message["payload"],
+                headers=message.get("headers", {}),
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
+            outcome = str(response.status_code)
+            delivered = response.ok
+        except requests.exceptions.RequestException as error:
+            outcome = type(error).__name__
+            delivered = False
+    latency = (time.monotonic() - start) * 1000
+
+    logger.info(
+        f"Callback for account '{message.get('account_name')}' ({message.get('status')}) "
+        f"attempt {attempt}: {outcome} in {latency:.0f} ms"
+    )
+
+    if not delivered:
+        delay = backoff_seconds(attempt)
+        try:
+            get_client(
+                "sqs", max_pool_connections=MAX_WORKERS
+            ).change_message_visibility(
+                QueueUrl=CALLBACK_QUEUE_URL,
+                ReceiptHandle=record["receiptHandle"],
+                VisibilityTimeout=delay,
+            )
+            logger.info(f"Retrying callback in {delay} seconds")
+        except botocore.exceptions.ClientError:
+            logger.exception("Unable to change message visibility")
+
+    return delivered, latency
+
+
+def deliver_safely(
+    record: Dict[str, Any], deadline: float
+) -> Tuple[Optional[bool], float]:
+    try:
+        return deliver(record, deadline)
+    except Exception:
+        logger.exception("Unable to deliver callback")
+        return False, 0.0
+
+
+@metrics.log_metrics(capture_cold_start_metric=True)
+@record_api_calls(metrics)
+@warmup_handler(clients=create_clients("sqs", max_pool_connections=MAX_WORKERS))
+@tracer.capture_lambda_handler
+@logger.inject_lambda_context(log_event=True)
+def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Deliver a batch of callbacks concurrently. Failed messages are reported back to SQS
+    to be retried, and moved to the dead-letter queue by the redrive policy. Messages
+    not delivered before the function runs out of time are reported back as well.
+    """
+    records: List[Dict[str, Any]] = event.get("Records", [])
+    failures = []
+
+    if records:
+        remaining_ms = context.get_remaining_time_in_millis() - TIME_MARGIN_MS
+        deliver_batch = functools.partial(
+            deliver_safely, deadline=time.monotonic() + remaining_ms / 1000
+        )
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(records))) as executor:
+            results = list(executor.map(deliver_batch, records))
+
+        for record, (delivered, latency) in zip(records, results):
+            if delivered is None:
+                metrics.add_metric(
+                    name="CallbackDeferred", unit=MetricUnit.Count, value=1
+                )
+                failures.append({"itemIdentifier": record["messageId"]})
+                continue
+
+            metrics.add_metric(
+                name="CallbackLatency", unit=MetricUnit.Milliseconds, value=latency
+            )
+            if delivered:
+                metrics.add_metric(
+                    name="CallbackDelivered", unit=MetricUnit.Count, value=1
+                )
+            else:
+                metrics.add_metric(
+                    name="CallbackFailed", unit=MetricUnit.Count, value=1
+                )
+                failures.append({"itemIdentifier": record["messageId"]})
+
+    return {"batchItemFailures": failures}
@@ -8,27 +8,46 @@ from typing import Dict, Any, Optional
 import warnings
 
 from aws_lambda_powertools import Logger, Metrics, Tracer
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.batch import sqs_batch_processor
 from aws_lambda_powertools.utilities.typing import LambdaContext
 import botocore
+from controltowerlib import get_client, record_api_calls, warmup_handler
+from controltowerlib.warmup import create_clients, describe_tables
 import pynamodb
 
-from controltowerapi.servicecatalog import ServiceCatalog
-from controltowerapi.models import AccountModel
+from controltowerapi.servicecatalog import ServiceCatalog, ProductDiscovery
+from controltowerapi.models import (
+    AccountModel,
+    LeaseModel,
+    ServiceCatalogModel,
+    StatusCounterModel,
+)
+from controltowerapi.scheduler import Scheduler
+from controltowerapi.status import (
+    ACTIVE_STATUSES,
+    FINISH_STATUSES,
+    get_status_counts,
+    is_conditional_check_failed,
+    transition,
+)
 
 warnings.filterwarnings("ignore", "No metrics to publish*")
 
-tracer = Tracer()
+tracer = Tracer(patch_modules=["botocore", "pynamodb"])
 logger = Logger()
 metrics = Metrics()
 servicecatalog = ServiceCatalog()
+discovery = ProductDiscovery(servicecatalog, os.environ["LAMBDA_ROLE_ARN"])
+scheduler = Scheduler(int(os.environ.get("MAX_CONCURRENT_ACCOUNTS", "1")))
 
-CT_PORTFOLIO_ID = servicecatalog.get_ct_portfolio_id()
-servicecatalog.associate_principal(CT_PORTFOLIO_ID, os.environ["LAMBDA_ROLE_ARN"])
-CT_PRODUCT = servicecatalog.get_ct_product()
+ACCOUNT_QUEUE_URL = os.environ["ACCOUNT_QUEUE_URL"]
 
-ACTIVE_STATUSES = {"CREATED", "IN_PROGRESS", "IN_PROGRESS_IN_ERROR"}
-FINISH_STATUSES = {"FAILED", "SUCCEEDED"}
+# Completion is driven by the CreateManagedAccount event (see eb_invoke_callback). The
+# queued message is only re-checked as a safety net, with the delay doubling as the
+# account ages: 15 minutes, 30 minutes, 1 hour, then every 2 hours.
+SAFETY_NET_MIN_SECONDS = 900
+SAFETY_NET_MAX_SECONDS = 7200
 
 
 def parse_datetime(timestamp: str) -> datetime:
@@ -46,21 +65,25 @@ def parse_datetime(timestamp: str) -> datetime:
 @tracer.capture_method
 def check_active() -> None:
     """
-    Raise an exception if there are any accounts being created
+    Raise an exception if every provisioning slot is already used by an account being created
     """
-    for status in ACTIVE_STATUSES:
-        logger.debug(f"Checking if any accounts in status {status}")
-        try:
-            count = AccountModel.status_index.count(status, limit=1)
-        except pynamodb.exceptions.QueryError as error:
-            logger.exception("Unable to query account status index")
-            raise error
+    try:
+        counts = get_status_counts()
+    except pynamodb.exceptions.GetError as error:
+        logger.exception("Unable to get account status counters")
+        raise error
 
-        if count > 0:
-            logger.warn(
-                f"Found {count} accounts in {status} status, leaving message in queue"
-            )
-            raise Exception()
+    for status, count in counts.items():
+        metrics.add_metric(
+            name=f"Accounts{status.title().replace('_', '')}",
+            unit=MetricUnit.Count,
+            value=count,
+        )
+
+    total = sum(counts[status] for status in ACTIVE_STATUSES)
+    if total >= scheduler.slots:
+        logger.warn(f"Found {total} accounts being created, leaving message in queue")
+        raise Exception()
 
 
 @tracer.capture_method
@@ -84,22 +107,21 @@ def create_account(account: AccountModel) -> None:
     }
 
     try:
-        product = servicecatalog.provision_product(CT_PRODUCT, parameters)
+        product = discovery.provision_product(parameters)
     except Exception as error:
         logger.exception("Unable to provision product")
         raise error
 
     try:
-        account.update(
-            actions=[
-                AccountModel.record_id.set(product["RecordId"]),
-                AccountModel.created_at.set(parse_datetime(product["CreatedTime"])),
-                AccountModel.updated_at.set(parse_datetime(product["UpdatedTime"])),
-                AccountModel.status.set(product["Status"]),
-            ],
+        transition(
+            account,
+            product["Status"],
             condition=(AccountModel.status == "QUEUED"),
+            record_id=product["RecordId"],
+            created_at=parse_datetime(product["CreatedTime"]),
+            updated_at=parse_datetime(product["UpdatedTime"]),
         )
-    except pynamodb.exceptions.UpdateError as error:
+    except pynamodb.exceptions.PynamoDBException as error:
         logger.exception("Unable to update account")
         raise error
 
@@ -128,21 +150,61 @@ def update_status(account: AccountModel) -> Optional[str]:
         for output in response.get("RecordOutputs", {})
     }
 
-    actions = [
-        AccountModel.status.set(status),
-        AccountModel.updated_at.set(parse_datetime(updated_at)),
-    ]
+    values = {"updated_at": parse_datetime(updated_at)}
     if "AccountId" in outputs:
-        actions.append(AccountModel.account_id.set(outputs["AccountId"]))
+        values["account_id"] = outputs["AccountId"]
 
     try:
-        account.update(actions=actions)
-    except pynamodb.exceptions.UpdateError as error:
+        transition(account, status, **values)
+    except pynamodb.exceptions.PynamoDBException as error:
+        if is_conditional_check_failed(error):
+            # the status was changed concurrently, most likely by the completion event
+            account.refresh()
+            return account.status
         logger.exception("Unable to update account")
         raise error
     return status
 
 
+@tracer.capture_method
+def wait_for_event(account: AccountModel, record: Dict[str, Any]) -> None:
+    """
+    Hide the message until the next safety net check and raise so it stays in the queue.
+    The receipt handle is stored on the account so the completion event can delete it.
+
+    Parameters
+    ----------
+    account: AccountModel
+        An account being provisioned
+    record: dict
+        The SQS record for the account
+    """
+    now = datetime.now(timezone.utc)
+    elapsed = (now - (account.created_at or now)).total_seconds()
+    timeout = int(min(max(elapsed, SAFETY_NET_MIN_SECONDS), SAFETY_NET_MAX_SECONDS))
+
+    try:
+        account.update(
+            actions=[AccountModel.receipt_handle.set(record["receiptHandle"])]
+        )
+    except pynamodb.exceptions.UpdateError:
+        logger.exception("Unable to store receipt handle")
+
+    try:
+        get_client("sqs").change_message_visibility(
+            QueueUrl=ACCOUNT_QUEUE_URL,
+            ReceiptHandle=record["receiptHandle"],
+            VisibilityTimeout=timeout,
+        )
+    except botocore.exceptions.ClientError:
+        logger.exception("Unable to change message visibility")
+
+    logger.info(
+        f"Account '{account.account_name}' has status {account.status}, checking again in {timeout} seconds"
+    )
+    raise Exception()
+
+
 @tracer.capture_method
 def record_handler(record: Dict[str, str]) -> None:
     """
@@ -166,18 +228,29 @@ def record_handler(record: Dict[str, str]) -> None:
 
     logger.debug(f"Account {account.account_name} has status {account.status}")
 
+    created = False
     if account.status == "QUEUED":
-        # throw an exception if an item is active so this message is retried
+        # throw an exception if no slot is available so this message is retried
         check_active()
 
-        logger.info(
-            f"No accounts in progress, creating account '{account.account_name}'"
-        )
+        # discover the product before taking a slot, so a slow or failed discovery
+        # happens before anything is provisioned rather than between the two
+        discovery.get_product()
+
+        if not scheduler.acquire(account.account_name):
+            logger.warn(
+                f"No provisioning slot available for '{account.account_name}', leaving message in queue"
+            )
+            raise Exception()
+
+        logger.info(f"Slot acquired, creating account '{account.account_name}'")
 
         try:
             create_account(account)
+            created = True
         except Exception as error:
             logger.exception("Unable to create account")
+            scheduler.release(account.account_name)
             if isinstance(error, botocore.exceptions.ClientError):
                 if error.response["Error"]["Code"] == "InvalidParametersException":
                     logger.error(
@@ -186,15 +259,14 @@ def record_handler(record: Dict[str, str]) -> None:
 
                     # update status to FAILED
                     try:
-                        account.update(
-                            actions=[
-                                AccountModel.status.set("FAILED"),
-                                AccountModel.status_message.set(error.message),
-                                AccountModel.updated_at.set(datetime.now(timezone.utc)),
-                            ],
+                        transition(
+                            account,
+                            "FAILED",
                             condition=(AccountModel.status == "QUEUED"),
+                            status_message=error.response["Error"]["Message"],
+                            updated_at=datetime.now(timezone.utc),
                         )
-                    except pynamodb.exceptions.UpdateError as error:
+                    except pynamodb.exceptions.PynamoDBException as error:
                         logger.exception("Unable to update account")
                         raise error
                 else:
@@ -208,14 +280,32 @@ def record_handler(record: Dict[str, str]) -> None:
         )
         return
 
-    status = update_status(account)
-    if status in FINISH_STATUSES:
+    # an account that was just created cannot have finished yet, so only ask Service
+    # Catalog when the completion event has not arrived by the next safety net check
+    if account.status not in FINISH_STATUSES and not created:
+        update_status(account)
+
+    if account.status in FINISH_STATUSES:
+        scheduler.release(account.account_name)
         logger.info(
-            f"Account '{account.account_name}' reached {status}, deleting message"
+            f"Account '{account.account_name}' reached {account.status}, deleting message"
         )
+        return
+
+    # keep the lease alive and the message in the queue until the account finishes
+    scheduler.acquire(account.account_name)
+    wait_for_event(account, record)
 
 
 @metrics.log_metrics(capture_cold_start_metric=True)
+@record_api_calls(metrics)
+@warmup_handler(
+    tables=describe_tables(
+        AccountModel, LeaseModel, ServiceCatalogModel, StatusCounterModel
+    ),
+    clients=create_clients("sqs"),
+    discovery=discovery.get_product,
+)
 @tracer.capture_lambda_handler
 @logger.inject_lambda_context(log_event=True)
 @sqs_batch_processor(record_handler=record_handler)
@@ -1,2 +1,43 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the environment the functions read when they are imported
+ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "ACCOUNT_TABLE": "AccountTable",
+    "CONFIG_TABLE": "ConfigTable",
+    "SECRET_ID": "ApiKeySecret",
+    "ACCOUNT_QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123456789012/AccountQueue.fifo",
+    "CALLBACK_QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123456789012/CallbackQueue",
+    "LAMBDA_ROLE_ARN": "arn:aws:iam::123456789012:role/QueueProcessorRole",
+    "POWERTOOLS_TRACE_DISABLED": "1",
+    "POWERTOOLS_SERVICE_NAME": "Example",
+    "POWERTOOLS_METRICS_NAMESPACE": "Application",
+}
+for name, value in ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
+
+for path in ("src", "dependencies"):
+    path = os.path.join(ROOT, path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def conditional_check_failed(error_class: type) -> Exception:
+    """
+    Return a PynamoDB error caused by a failed condition expression
+    """
+    import botocore.exceptions
+
+    cause = botocore.exceptions.ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "failed"}},
+        "UpdateItem",
+    )
+    return error_class("failed", cause=cause)
@@ -1,2 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+
+import os
+import sys
+
+from .. import ROOT
+
+# the baseline function imports its modules from its own directory
+BASELINE = os.path.join(ROOT, "functions", "baseline")
+if BASELINE not in sys.path:
+    sys.path.insert(0, BASELINE)
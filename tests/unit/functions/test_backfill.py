@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+from typing import Any, Dict, List
+import unittest
+from unittest import mock
+
+import backfill
+from controltowerlib.checkpoint import Checkpoint
+
+
+class Context:
+    function_name = "backfill"
+    function_version = "$LATEST"
+    invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:backfill"
+    memory_limit_in_mb = 1024
+    aws_request_id = "00000000-0000-0000-0000-000000000000"
+
+    def __init__(self, remaining_ms: List[int]) -> None:
+        self.remaining_ms = iter(remaining_ms)
+
+    def get_remaining_time_in_millis(self) -> int:
+        return next(self.remaining_ms)
+
+
+def result(account: Dict[str, Any], *args: Any) -> Dict[str, Any]:
+    failed = account["Id"] == "03"
+    return {
+        "account_id": account["Id"],
+        "status": "FAILED" if failed else "SUCCEEDED",
+        "failed_tasks": ["s3_public_block"] if failed else [],
+    }
+
+
+def summary_progress(summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: summary[key] for key in ("succeeded", "failed", "failed_accounts")}
+
+
+class BackfillTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.saved: List[Any] = []
+        patches = [
+            mock.patch.object(backfill, "MAX_ACCOUNTS", 2),
+            mock.patch.object(
+                backfill,
+                "select_accounts",
+                return_value=[{"Id": f"0{index}"} for index in range(1, 6)],
+            ),
+            mock.patch.object(backfill, "run_account", side_effect=result),
+            mock.patch.object(Checkpoint, "load", autospec=True, return_value=None),
+            mock.patch.object(
+                Checkpoint,
+                "save",
+                autospec=True,
+                side_effect=lambda _, cursor, now, progress: self.saved.append(
+                    (cursor, copy.deepcopy(progress))
+                ),
+            ),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(Checkpoint, "clear", autospec=True)
+        self.clear = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_saves_a_checkpoint_after_every_batch(self):
+        summary = backfill.handler({}, Context([3600000] * 2))
+
+        self.assertTrue(summary["complete"])
+        self.assertEqual(
+            [cursor for cursor, _ in self.saved],
+            ["02", "04"],
+        )
+        self.assertEqual(
+            self.saved[1][1]["failed_accounts"], {"03": ["s3_public_block"]}
+        )
+        self.assertEqual((summary["succeeded"], summary["failed"]), (4, 1))
+        self.clear.assert_called_once()
+
+    def test_stops_before_the_timeout_without_losing_progress(self):
+        summary = backfill.handler({}, Context([0]))
+
+        self.assertFalse(summary["complete"])
+        self.assertEqual(self.saved, [("02", summary_progress(summary))])
+        self.clear.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from typing import Callable, List
+import unittest
+from unittest import mock
+
+import botocore
+
+from tasks.delete_default_vpc import delete_default_vpc, run_graph
+
+
+def client_error(code: str) -> botocore.exceptions.ClientError:
+    return botocore.exceptions.ClientError(
+        {"Error": {"Code": code, "Message": code}}, "DescribeVpcs"
+    )
+
+
+class RunGraphTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.started: List[str] = []
+        self.finished: List[str] = []
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+
+    def task(self, task_id: str, delay: float = 0, error: Exception = None) -> Callable:
+        def func() -> None:
+            with self.lock:
+                self.started.append(task_id)
+            time.sleep(delay)
+            if error:
+                raise error
+            with self.lock:
+                self.finished.append(task_id)
+
+        return func
+
+    def test_runs_tasks_after_their_dependencies(self):
+        run_graph(
+            {
+                "subnet": (self.task("subnet"), {"association", "interface"}),
+                "association": (self.task("association", 0.02), set()),
+                "interface": (self.task("interface", 0.01), set()),
+                "vpc": (self.task("vpc"), {"subnet", "gateway"}),
+                "gateway": (self.task("gateway"), set()),
+            },
+            self.executor,
+        )
+
+        self.assertCountEqual(
+            self.finished, ["subnet", "association", "interface", "vpc", "gateway"]
+        )
+        started = self.started.index
+        finished = self.finished.index
+        self.assertGreater(started("subnet"), finished("association"))
+        self.assertGreater(started("subnet"), finished("interface"))
+        self.assertGreater(started("vpc"), finished("subnet"))
+        self.assertGreater(started("vpc"), finished("gateway"))
+
+    def test_does_not_wait_for_unrelated_tasks(self):
+        run_graph(
+            {
+                "slow": (self.task("slow", 0.1), set()),
+                "fast": (self.task("fast"), set()),
+                "after_fast": (self.task("after_fast"), {"fast"}),
+            },
+            self.executor,
+        )
+
+        self.assertLess(self.finished.index("after_fast"), self.finished.index("slow"))
+
+    def test_skips_dependents_of_failed_tasks(self):
+        error = RuntimeError("DependencyViolation")
+        with self.assertRaises(RuntimeError) as raised:
+            run_graph(
+                {
+                    "subnet": (self.task("subnet", error=error), set()),
+                    "vpc": (self.task("vpc"), {"subnet"}),
+                    "gateway": (self.task("gateway"), set()),
+                },
+                self.executor,
+            )
+
+        self.assertIs(raised.exception, error)
+        self.assertEqual(self.finished, ["gateway"])
+        self.assertNotIn("vpc", self.started)
+
+
+class DeleteDefaultVpcTest(unittest.TestCase):
+    def test_passes_on_regions_that_require_opt_in(self):
+        client = mock.Mock()
+        client.describe_vpcs.side_effect = client_error("OptInRequired")
+        delete_default_vpc(client, "123456789012", "ap-east-1")
+        client.describe_vpcs.assert_called_once()
+
+    def test_raises_other_client_errors(self):
+        client = mock.Mock()
+        client.describe_vpcs.side_effect = client_error("UnauthorizedOperation")
+        with self.assertRaises(botocore.exceptions.ClientError):
+            delete_default_vpc(client, "123456789012", "us-east-1")
+        client.describe_vpcs.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone
+from typing import Any, Dict
+import unittest
+from unittest import mock
+
+from engine import TaskContext
+from tasks.enable_security_hub import EnableSecurityHub
+
+ACCOUNT_ID = "123456789012"
+AUDIT_ACCOUNT_ID = "210987654321"
+
+
+def get_master_account(account_id: str, member_status: str) -> Dict[str, Any]:
+    return {
+        "Master": {
+            "AccountId": account_id,
+            "InvitationId": "7ab938c5d52d7904ad09f9e7c20cc4eb",
+            "InvitedAt": datetime(2021, 6, 1, tzinfo=timezone.utc),
+            "MemberStatus": member_status,
+        },
+        "ResponseMetadata": {"HTTPStatusCode": 200, "RetryAttempts": 0},
+    }
+
+
+class CheckTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sts = mock.Mock()
+        self.client = self.sts.get_client.return_value
+        self.context = TaskContext(ACCOUNT_ID, sts=self.sts)
+        self.prepared = {"audit_account_id": AUDIT_ACCOUNT_ID}
+
+    def check(self, response: Dict[str, Any]) -> bool:
+        self.client.get_master_account.return_value = response
+        return EnableSecurityHub().check(self.context, "us-east-1", self.prepared)
+
+    def test_member_of_audit_account_is_compliant(self):
+        for member_status in ("ENABLED", "ASSOCIATED"):
+            with self.subTest(member_status=member_status):
+                self.assertTrue(
+                    self.check(get_master_account(AUDIT_ACCOUNT_ID, member_status))
+                )
+
+    def test_invited_member_is_not_compliant(self):
+        self.assertFalse(self.check(get_master_account(AUDIT_ACCOUNT_ID, "INVITED")))
+
+    def test_member_of_another_account_is_not_compliant(self):
+        self.assertFalse(self.check(get_master_account("111111111111", "ENABLED")))
+
+    def test_account_without_administrator_is_not_compliant(self):
+        self.assertFalse(self.check({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
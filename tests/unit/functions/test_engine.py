@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+import unittest
+from unittest import mock
+
+import engine
+from engine import Engine, Task, TaskContext, register
+from state import BaselineState
+
+
+def task(
+    name: str,
+    calls: List[str],
+    depends_on: Sequence[str] = (),
+    error: Exception = None,
+    idempotent: bool = True,
+) -> Task:
+    lock = threading.Lock()
+
+    class TestTask(Task):
+        def apply(
+            self, context: TaskContext, region: Optional[str], prepared: Any
+        ) -> Optional[Dict[str, Any]]:
+            with lock:
+                calls.append(name)
+            if error:
+                raise error
+            return None
+
+    TestTask.name = name
+    TestTask.depends_on = depends_on
+    TestTask.idempotent = idempotent
+    return TestTask()
+
+
+class RegisterTest(unittest.TestCase):
+    def test_task_without_apply_cannot_be_registered(self):
+        class Incomplete(Task):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            register(Incomplete)
+        self.assertNotIn("incomplete", engine.TASKS)
+
+
+class EngineTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(BaselineState, "save", autospec=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls: List[str] = []
+        self.context = TaskContext("123456789012", sts=mock.Mock())
+
+    def run_tasks(self, *tasks: Task, names: List[str] = None) -> Dict[str, Any]:
+        return Engine({task.name: task for task in tasks}).run(
+            self.context, names, force=True
+        )
+
+    def test_runs_tasks_after_their_dependencies(self):
+        result = self.run_tasks(
+            task("c", self.calls, depends_on=("b",)),
+            task("b", self.calls, depends_on=("a",)),
+            task("a", self.calls),
+        )
+
+        self.assertEqual(result["status"], "SUCCEEDED")
+        self.assertEqual(self.calls, ["a", "b", "c"])
+
+    def test_skips_tasks_whose_dependencies_failed(self):
+        result = self.run_tasks(
+            task("a", self.calls, error=Exception("failed")),
+            task("b", self.calls, depends_on=("a",)),
+            task("c", self.calls, depends_on=("b",)),
+            task("d", self.calls, idempotent=False, error=Exception("failed")),
+            task("e", self.calls),
+        )
+
+        statuses = {name: value["status"] for name, value in result["tasks"].items()}
+        self.assertEqual(
+            statuses,
+            {
+                "a": "FAILED",
+                "b": "SKIPPED",
+                "c": "SKIPPED",
+                "d": "FAILED",
+                "e": "SUCCEEDED",
+            },
+        )
+        self.assertCountEqual(self.calls, ["a", "d", "e"])
+        self.assertEqual(result["status"], "FAILED")
+        self.assertEqual(result["failed_tasks"], ["a", "b", "c", "d"])
+        self.assertEqual(result["retryable_tasks"], ["a", "b", "c"])
+
+    def test_skips_tasks_depending_on_each_other(self):
+        result = self.run_tasks(
+            task("a", self.calls, depends_on=("b",)),
+            task("b", self.calls, depends_on=("a",)),
+        )
+
+        self.assertEqual(self.calls, [])
+        self.assertEqual(result["failed_tasks"], ["a", "b"])
+
+    def test_assumes_unselected_dependencies_succeeded(self):
+        result = self.run_tasks(
+            task("a", self.calls, error=Exception("failed")),
+            task("b", self.calls, depends_on=("a",)),
+            names=["b"],
+        )
+
+        self.assertEqual(self.calls, ["b"])
+        self.assertEqual(result["status"], "SUCCEEDED")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+import throttle
+from throttle import TokenBucket
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 100.0
+        patcher = mock.patch.object(throttle.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(throttle.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def delays(self) -> list:
+        return [call.args[0] for call in self.sleep.call_args_list]
+
+    def test_allows_a_burst_of_rate_requests(self):
+        bucket = TokenBucket(2)
+        bucket.acquire()
+        bucket.acquire()
+        self.sleep.assert_not_called()
+
+    def test_queues_requests_beyond_the_burst(self):
+        bucket = TokenBucket(2)
+        for _ in range(4):
+            bucket.acquire()
+        # each waiting request waits for the token it takes, after those before it
+        self.assertEqual(self.delays(), [0.5, 1.0])
+
+    def test_refills_at_the_rate(self):
+        bucket = TokenBucket(2)
+        bucket.acquire()
+        bucket.acquire()
+        self.now += 0.5
+        bucket.acquire()
+        self.sleep.assert_not_called()
+        bucket.acquire()
+        self.assertEqual(self.delays(), [0.5])
+
+    def test_does_not_store_more_than_a_burst(self):
+        bucket = TokenBucket(2)
+        self.now += 60
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(self.delays(), [0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import unittest
+from unittest import mock
+
+import botocore
+
+from . import ROOT
+import apigw_account_create
+
+
+def account_request(name: str) -> dict:
+    return {
+        "AccountName": name,
+        "AccountEmail": f"{name.lower()}@example.com",
+        "ManagedOrganizationalUnit": "Custom",
+        "SSOUserEmail": "user@example.com",
+        "SSOUserFirstName": "First",
+        "SSOUserLastName": "Last",
+    }
+
+
+class SendMessagesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(apigw_account_create, "get_client")
+        self.sqs = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_returns_accounts_of_failed_entries(self):
+        self.sqs.send_message_batch.return_value = {
+            "Successful": [{"Id": "0"}],
+            "Failed": [{"Id": "1", "Code": "InternalError"}],
+        }
+        bodies = [account_request("Alpha"), account_request("Bravo")]
+        self.assertEqual(apigw_account_create.send_messages(bodies), {"Bravo"})
+
+    def test_returns_every_account_of_a_failed_request(self):
+        self.sqs.send_message_batch.side_effect = [
+            botocore.exceptions.ClientError(
+                {"Error": {"Code": "InternalError", "Message": "failed"}},
+                "SendMessageBatch",
+            ),
+            {"Successful": [{"Id": "0"}]},
+        ]
+        bodies = [account_request(f"Account{index}") for index in range(11)]
+        unsent = apigw_account_create.send_messages(bodies)
+        self.assertEqual(unsent, {f"Account{index}" for index in range(10)})
+
+
+class BatchCreateAccountsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # the schema path is relative to the function directory
+        cwd = os.getcwd()
+        os.chdir(os.path.join(ROOT, "src"))
+        self.addCleanup(os.chdir, cwd)
+
+        patcher = mock.patch.object(apigw_account_create, "status", autospec=True)
+        self.status = patcher.start()
+        self.status.create_many.return_value = ([], [])
+        self.addCleanup(patcher.stop)
+
+    def test_rolls_back_accounts_that_were_not_queued(self):
+        event = {
+            "body": json.dumps(
+                {"Accounts": [account_request("Alpha"), account_request("Bravo")]}
+            )
+        }
+        with mock.patch.object(
+            apigw_account_create, "send_messages", return_value={"Bravo"}
+        ):
+            response = apigw_account_create.batch_create_accounts(event)
+
+        results = {
+            result["AccountName"]: result
+            for result in json.loads(response["body"])["results"]
+        }
+        self.assertEqual(results["Alpha"]["code"], 202)
+        self.assertEqual(results["Bravo"]["code"], 500)
+        (call,) = self.status.delete.call_args_list
+        self.assertEqual(call.args[0].account_name, "Bravo")
+
+
+if __name__ == "__main__":
+    unittest.main()
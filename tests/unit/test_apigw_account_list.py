@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import base64
+import json
+import unittest
+
+from apigw_account_list import decode_cursor, encode_cursor, list_accounts
+
+
+class CursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        key = {"account_name": {"S": "Alpha"}, "status": {"S": "QUEUED"}}
+        self.assertEqual(decode_cursor(encode_cursor(key)), key)
+
+    def test_no_cursor_on_last_page(self):
+        self.assertIsNone(encode_cursor(None))
+        self.assertIsNone(encode_cursor({}))
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor({"account_name": {"S": "???>>>"}})
+        self.assertNotIn("+", cursor)
+        self.assertNotIn("/", cursor)
+
+    def test_invalid_cursors_raise_value_error(self):
+        invalid = [
+            "not base64!",
+            base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+            base64.urlsafe_b64encode(b"not json").decode(),
+            base64.urlsafe_b64encode(b"[1, 2]").decode(),
+            base64.urlsafe_b64encode(json.dumps({"pk": "x"}).encode()).decode(),
+        ]
+        for cursor in invalid:
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+class ListAccountsTest(unittest.TestCase):
+    def assert_bad_request(self, params: dict, message: str) -> None:
+        response = list_accounts({"queryStringParameters": params})
+        self.assertEqual(response["statusCode"], 400)
+        self.assertEqual(json.loads(response["body"])["message"], message)
+
+    def test_rejects_invalid_parameters(self):
+        self.assert_bad_request({"cursor": "not base64!"}, "Invalid cursor")
+        self.assert_bad_request({"status": "DONE"}, 'Unknown status "DONE"')
+        self.assert_bad_request({"limit": "ten"}, "limit must be an integer")
+        self.assert_bad_request({"limit": "0"}, "limit must be between 1 and 100")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone
+import unittest
+from unittest import mock
+
+import apigw_account_status
+from apigw_account_status import compute_etag, etag_matches, get_account
+from controltowerapi.models import AccountModel
+
+QUEUED_AT = datetime(2020, 9, 21, 1, 53, 7, tzinfo=timezone.utc)
+
+
+def account(status: str = "IN_PROGRESS", updated_at: datetime = None) -> AccountModel:
+    return AccountModel(
+        "Alpha",
+        account_email="alpha@example.com",
+        ou_name="Custom",
+        status=status,
+        queued_at=QUEUED_AT,
+        updated_at=updated_at,
+    )
+
+
+class EtagTest(unittest.TestCase):
+    def test_etag_changes_with_status_and_update_time(self):
+        etag = compute_etag(account())
+        self.assertEqual(etag, compute_etag(account()))
+        self.assertNotEqual(etag, compute_etag(account("SUCCEEDED")))
+        self.assertNotEqual(
+            etag, compute_etag(account(updated_at=datetime.now(timezone.utc)))
+        )
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+    def test_if_none_match(self):
+        etag = compute_etag(account())
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(etag, f"W/{etag}"))
+        self.assertTrue(etag_matches(etag, f'"other", {etag}'))
+        self.assertTrue(etag_matches(etag, "*"))
+        self.assertFalse(etag_matches(etag, '"other"'))
+        self.assertFalse(etag_matches(etag, None))
+
+
+class GetAccountTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(AccountModel, "get", return_value=account())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, headers: dict = None, params: dict = None) -> dict:
+        return get_account(
+            {
+                "pathParameters": {"accountName": "Alpha"},
+                "headers": headers or {},
+                "queryStringParameters": params,
+            }
+        )
+
+    def test_returns_etag(self):
+        response = self.request()
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(response["headers"]["ETag"], compute_etag(account()))
+
+    def test_not_modified(self):
+        etag = compute_etag(account())
+        response = self.request({"if-none-match": etag})
+        self.assertEqual(response["statusCode"], 304)
+        self.assertNotIn("body", response)
+        self.assertEqual(response["headers"]["ETag"], etag)
+
+    def test_modified(self):
+        response = self.request({"if-none-match": compute_etag(account("QUEUED"))})
+        self.assertEqual(response["statusCode"], 200)
+
+    def test_wait_returns_once_status_changes(self):
+        statuses = iter(["IN_PROGRESS", "SUCCEEDED"])
+
+        def refresh(item, *args, **kwargs):
+            item.status = next(statuses)
+
+        with mock.patch.object(
+            AccountModel, "refresh", autospec=True, side_effect=refresh
+        ), mock.patch.object(apigw_account_status.time, "sleep") as sleep:
+            response = self.request(params={"wait": "20", "since": "IN_PROGRESS"})
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertIn('"status":"SUCCEEDED"', response["body"])
+        # backoff between re-checks
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.5, 1.0])
+
+    def test_wait_is_bounded(self):
+        response = self.request(params={"wait": "60"})
+        self.assertEqual(response["statusCode"], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import boto3
+from controltowerlib import clients
+
+
+class GetClientTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = boto3.Session(region_name="us-east-1")
+        self.addCleanup(clients.discard_clients, "test")
+
+    def get_client(self, **kwargs) -> object:
+        return clients.get_client(
+            "sqs", session=self.session, identity="test", **kwargs
+        )
+
+    def test_reuses_clients(self):
+        self.assertIs(self.get_client(), self.get_client())
+
+    def test_pool_size_is_part_of_the_key(self):
+        client = self.get_client(max_pool_connections=2)
+        larger = self.get_client(max_pool_connections=10)
+
+        self.assertIsNot(client, larger)
+        self.assertEqual(larger.meta.config.max_pool_connections, 10)
+        self.assertIs(self.get_client(max_pool_connections=2), client)
+
+    def test_discards_clients_of_an_identity(self):
+        client = self.get_client()
+        clients.discard_clients("test")
+        self.assertIsNot(self.get_client(), client)
+
+
+if __name__ == "__main__":
+    unittest.main()
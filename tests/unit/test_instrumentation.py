@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import contextlib
+import io
+import json
+import unittest
+from unittest import mock
+
+from aws_lambda_powertools import Metrics
+import boto3
+import botocore
+from botocore.stub import Stubber
+from controltowerlib.instrumentation import ApiCallRecorder
+
+
+class ApiCallRecorderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.recorder = ApiCallRecorder()
+        self.metrics = Metrics()
+        self.addCleanup(self.metrics.clear_metrics)
+
+    def flush(self) -> list:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.recorder.flush(self.metrics)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_publishes_operations_as_dimensions(self):
+        self.recorder._record("dynamodb", "GetItem", None)
+        self.recorder._record("dynamodb", "GetItem", None, retries=1)
+        self.recorder._record("sqs", "SendMessage", None, error=True)
+
+        # Powertools prints one EMF document per single metric
+        documents = {
+            (doc["AwsService"], doc["Operation"], name): doc[name]
+            for doc in self.flush()
+            for directive in doc["_aws"]["CloudWatchMetrics"]
+            for name in [metric["Name"] for metric in directive["Metrics"]]
+        }
+
+        self.assertEqual(
+            set(documents),
+            {
+                ("dynamodb", "GetItem", "ApiCalls"),
+                ("dynamodb", "GetItem", "ApiCallRetries"),
+                ("sqs", "SendMessage", "ApiCalls"),
+                ("sqs", "SendMessage", "ApiCallErrors"),
+            },
+        )
+        self.assertEqual(documents[("dynamodb", "GetItem", "ApiCalls")], [2.0])
+        self.assertEqual(documents[("dynamodb", "GetItem", "ApiCallRetries")], [1.0])
+
+        # the totals are added to the function's metrics under the same names
+        self.assertEqual(self.metrics.metric_set["ApiCalls"]["Value"], [3.0])
+        self.assertEqual(self.metrics.metric_set["ApiCallErrors"]["Value"], [1.0])
+        self.assertFalse(any("." in name for name in self.metrics.metric_set))
+
+    def test_records_failed_calls_by_service_name(self):
+        client = boto3.client("secretsmanager", region_name="us-east-1")
+        self.recorder.register(client)
+        error = botocore.exceptions.EndpointConnectionError(endpoint_url="x")
+        with mock.patch.object(client._endpoint, "make_request", side_effect=error):
+            with self.assertRaises(botocore.exceptions.EndpointConnectionError):
+                client.get_secret_value(SecretId="secret")
+
+        (key,) = self.recorder.snapshot()
+        self.assertEqual(key, ("secretsmanager", "GetSecretValue"))
+
+    def test_records_calls_by_service_name(self):
+        client = boto3.client("secretsmanager", region_name="us-east-1")
+        self.recorder.register(client)
+        with Stubber(client) as stubber:
+            stubber.add_response("get_secret_value", {"SecretString": "x"})
+            client.get_secret_value(SecretId="secret")
+
+        self.assertEqual(
+            list(self.recorder.snapshot()), [("secretsmanager", "GetSecretValue")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
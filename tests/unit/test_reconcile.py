@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+import unittest
+
+from controltowerapi.models import AccountModel
+from controltowerapi.reconcile import SETTLE_TIME, Correction, plan
+
+NOW = datetime(2021, 6, 1, 12, tzinfo=timezone.utc)
+REQUEUE_AFTER = timedelta(hours=6)
+
+
+def account(
+    name: str, status: str, age: timedelta = timedelta(days=1), **values: Any
+) -> AccountModel:
+    return AccountModel(
+        name,
+        account_email=f"{name}@example.com",
+        ou_name="Custom",
+        status=status,
+        queued_at=NOW - age,
+        **values,
+    )
+
+
+def product(
+    name: str, status: str, age: timedelta = timedelta(days=1)
+) -> Dict[str, Any]:
+    return {
+        "Name": name,
+        "Status": status,
+        "CreatedTime": NOW - age,
+        "LastRecordId": f"rec-{name}",
+    }
+
+
+def member(name: str) -> Dict[str, Any]:
+    return {
+        "Name": name,
+        "Email": f"{name}@example.com",
+        "Id": "123456789012",
+        "OrganizationalUnitName": "Custom",
+        "OrganizationalUnitId": "ou-abcd-12345678",
+    }
+
+
+def complete(name: str, status: str, **values: Any) -> AccountModel:
+    """
+    An account with every attribute the reconciliation fills in
+    """
+    return account(
+        name,
+        status,
+        record_id=f"rec-{name}",
+        created_at=NOW - timedelta(days=1),
+        account_id="123456789012",
+        ou_id="ou-abcd-12345678",
+        **values,
+    )
+
+
+class PlanTest(unittest.TestCase):
+    def plan(self, accounts, products, members=()):
+        return plan(
+            {item.account_name: item for item in accounts},
+            {item["Name"]: item for item in products},
+            {item["Name"]: item for item in members},
+            NOW,
+            REQUEUE_AFTER,
+        )
+
+    def test_imports_products_of_organization_members(self):
+        (correction,) = self.plan(
+            [], [product("a", "AVAILABLE"), product("b", "AVAILABLE")], [member("a")]
+        )
+
+        self.assertEqual(correction.action, Correction.IMPORT)
+        self.assertEqual(correction.account_name, "a")
+        self.assertEqual(correction.status, "SUCCEEDED")
+        self.assertEqual(correction.account.account_email, "a@example.com")
+        self.assertEqual(correction.account.record_id, "rec-a")
+
+    def test_does_not_import_products_with_unknown_status(self):
+        self.assertEqual(self.plan([], [product("a", "NEW")], [member("a")]), [])
+
+    def test_updates_status_of_active_account(self):
+        (correction,) = self.plan(
+            [complete("a", "IN_PROGRESS")], [product("a", "ERROR")], [member("a")]
+        )
+
+        self.assertEqual(correction.action, Correction.UPDATE)
+        self.assertEqual(
+            (correction.previous, correction.status), ("IN_PROGRESS", "FAILED")
+        )
+        self.assertEqual(correction.values, {"updated_at": NOW})
+
+    def test_finished_account_does_not_go_back_to_active_status(self):
+        corrections = self.plan(
+            [complete("a", "SUCCEEDED"), complete("b", "FAILED")],
+            [product("a", "UNDER_CHANGE"), product("b", "PLAN_IN_PROGRESS")],
+            [member("a"), member("b")],
+        )
+        self.assertEqual(corrections, [])
+
+    def test_finished_account_keeps_status_while_missing_values_are_filled(self):
+        (correction,) = self.plan(
+            [account("a", "SUCCEEDED")], [product("a", "UNDER_CHANGE")], [member("a")]
+        )
+
+        self.assertEqual(correction.status, "SUCCEEDED")
+        self.assertEqual(
+            set(correction.values),
+            {"record_id", "created_at", "account_id", "ou_id", "updated_at"},
+        )
+
+    def test_queued_account_waits_for_product_to_settle(self):
+        accounts = [account("a", "QUEUED"), account("b", "QUEUED")]
+        products = [
+            product("a", "UNDER_CHANGE", age=SETTLE_TIME - timedelta(seconds=1)),
+            product("b", "UNDER_CHANGE", age=SETTLE_TIME),
+        ]
+
+        (correction,) = self.plan(accounts, products)
+
+        self.assertEqual(correction.account_name, "b")
+        self.assertEqual(correction.status, "IN_PROGRESS")
+
+    def test_requeues_queued_account_without_product_after_delay(self):
+        accounts = [
+            account("a", "QUEUED", age=REQUEUE_AFTER - timedelta(seconds=1)),
+            account("b", "QUEUED", age=REQUEUE_AFTER),
+            account("c", "QUEUED", age=REQUEUE_AFTER, updated_at=NOW),
+            account("d", "IN_PROGRESS", age=REQUEUE_AFTER),
+        ]
+
+        (correction,) = self.plan(accounts, [])
+
+        self.assertEqual(correction.action, Correction.REQUEUE)
+        self.assertEqual(correction.account_name, "b")
+        self.assertEqual(correction.status, "QUEUED")
+        self.assertEqual(correction.values, {"updated_at": NOW})
+
+    def test_corrections_are_sorted_by_account_name(self):
+        corrections = self.plan(
+            [account("b", "QUEUED", age=REQUEUE_AFTER)],
+            [product("c", "AVAILABLE"), product("a", "AVAILABLE")],
+            [member("a"), member("c")],
+        )
+        self.assertEqual(
+            [correction.account_name for correction in corrections], ["a", "b", "c"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
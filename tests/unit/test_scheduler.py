@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta, timezone
+import unittest
+from unittest import mock
+
+import botocore
+import pynamodb
+
+from . import conditional_check_failed
+from controltowerapi import scheduler
+from controltowerapi.models import AccountModel, LeaseModel
+from controltowerapi.scheduler import LEASE_PK, Scheduler
+
+
+def lease(slot: int, account_name: str = None, expires_in: int = 3600) -> LeaseModel:
+    now = datetime.now(timezone.utc)
+    return LeaseModel(
+        LEASE_PK,
+        Scheduler.slot_key(slot),
+        account_name=account_name,
+        acquired_at=now if account_name else None,
+        expires_at=now + timedelta(seconds=expires_in) if account_name else None,
+    )
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.scheduler = Scheduler(2)
+        patcher = mock.patch.object(LeaseModel, "update", autospec=True)
+        self.update = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def claimed(self):
+        return [call.args[0].sk for call in self.update.call_args_list]
+
+    def test_slots_are_capped_by_control_tower_limit(self):
+        self.assertEqual(Scheduler(10).slots, 5)
+        self.assertEqual(Scheduler(0).slots, 1)
+
+    def test_acquire_free_slot(self):
+        with mock.patch.object(Scheduler, "leases", return_value=[]):
+            self.assertEqual(self.scheduler.acquire("a"), "slot#00")
+        self.assertEqual(self.claimed(), ["slot#00"])
+
+    def test_acquire_skips_slots_held_by_other_accounts(self):
+        with mock.patch.object(Scheduler, "leases", return_value=[lease(0, "b")]):
+            self.assertEqual(self.scheduler.acquire("a"), "slot#01")
+        self.assertEqual(self.claimed(), ["slot#01"])
+
+    def test_acquire_extends_lease_already_held(self):
+        leases = [lease(0, "b"), lease(1, "a")]
+        with mock.patch.object(Scheduler, "leases", return_value=leases):
+            self.assertEqual(self.scheduler.acquire("a"), "slot#01")
+        self.assertEqual(self.claimed(), ["slot#01"])
+
+    def test_acquire_takes_over_expired_lease(self):
+        leases = [lease(0, "b"), lease(1, "c", expires_in=-60)]
+        with mock.patch.object(Scheduler, "leases", return_value=leases):
+            self.assertEqual(self.scheduler.acquire("a"), "slot#01")
+
+    def test_acquire_returns_none_when_every_slot_is_held(self):
+        leases = [lease(0, "b"), lease(1, "c")]
+        with mock.patch.object(Scheduler, "leases", return_value=leases):
+            self.assertIsNone(self.scheduler.acquire("a"))
+        self.update.assert_not_called()
+
+    def test_acquire_tries_next_slot_when_claimed_concurrently(self):
+        self.update.side_effect = [
+            conditional_check_failed(pynamodb.exceptions.UpdateError),
+            None,
+        ]
+        with mock.patch.object(Scheduler, "leases", return_value=[]):
+            self.assertEqual(self.scheduler.acquire("a"), "slot#01")
+        self.assertEqual(self.claimed(), ["slot#00", "slot#01"])
+
+    def test_acquire_raises_other_errors(self):
+        self.update.side_effect = pynamodb.exceptions.UpdateError("failed")
+        with mock.patch.object(Scheduler, "leases", return_value=[]):
+            with self.assertRaises(pynamodb.exceptions.UpdateError):
+                self.scheduler.acquire("a")
+
+    def test_release_only_releases_leases_of_the_account(self):
+        leases = [lease(0, "b"), lease(1, "a")]
+        with mock.patch.object(Scheduler, "leases", return_value=leases):
+            self.scheduler.release("a")
+        self.assertEqual(self.claimed(), ["slot#01"])
+
+    def test_release_ignores_lease_claimed_by_another_account(self):
+        self.update.side_effect = conditional_check_failed(
+            pynamodb.exceptions.UpdateError
+        )
+        with mock.patch.object(Scheduler, "leases", return_value=[lease(0, "a")]):
+            self.scheduler.release("a")
+
+
+class FinalizeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.scheduler = Scheduler(2)
+        patcher = mock.patch.object(LeaseModel, "update", autospec=True)
+        self.update = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(scheduler, "get_client")
+        self.sqs = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_releases_leases_and_deletes_messages(self):
+        accounts = [AccountModel("a", receipt_handle="rh-a"), AccountModel("b")]
+        leases = [lease(0, "b"), lease(1, "a"), lease(2, "c")]
+        with mock.patch.object(Scheduler, "leases", return_value=leases) as query:
+            self.scheduler.finalize(accounts, "queue")
+
+        query.assert_called_once_with()
+        self.assertEqual(
+            [call.args[0].sk for call in self.update.call_args_list],
+            ["slot#01", "slot#00"],
+        )
+        self.sqs.delete_message.assert_called_once_with(
+            QueueUrl="queue", ReceiptHandle="rh-a"
+        )
+
+    def test_ignores_message_received_again(self):
+        self.sqs.delete_message.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "ReceiptHandleIsInvalid"}}, "DeleteMessage"
+        )
+        with mock.patch.object(Scheduler, "leases", return_value=[]):
+            self.scheduler.finalize([AccountModel("a", receipt_handle="rh")], "queue")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta, timezone
+import unittest
+from unittest import mock
+
+from controltowerapi.secretsmanager import SecretCache, SecretsManager
+
+
+class SecretCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(SecretsManager, "get_secret_value", autospec=True)
+        self.get_secret_value = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = SecretCache("secret", "token")
+
+    def values(self, current: str, pending: str = None) -> None:
+        self.get_secret_value.side_effect = lambda _, secret_id, key, version_stage: (
+            current if version_stage == "AWSCURRENT" else pending
+        )
+
+    def test_accepts_current_and_pending_values(self):
+        self.values("old", "new")
+        self.assertEqual(self.cache.get_values(), ("old", "new"))
+        self.assertEqual(self.cache.get_values(), ("old", "new"))
+        self.assertEqual(self.get_secret_value.call_count, 2)
+
+    def test_refreshes_on_the_first_lookup_after_the_ttl(self):
+        self.values("old", "new")
+        self.cache.get_values()
+        self.cache._expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+        self.values("new")
+        self.assertEqual(self.cache.get_values(), ("new",))
+
+    def test_keeps_values_when_refresh_fails(self):
+        self.values("old")
+        self.cache.get_values()
+        self.cache._expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+        self.values(None)
+        self.assertEqual(self.cache.get_values(), ("old",))
+        self.assertEqual(self.get_secret_value.call_count, 4)
+
+    def test_backs_off_after_a_failed_refresh(self):
+        self.values(None)
+        self.assertEqual(self.cache.get_values(), ())
+        self.assertEqual(self.cache.get_values(), ())
+        self.assertEqual(self.get_secret_value.call_count, 2)
+
+        self.cache._expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        self.values("new")
+        self.assertEqual(self.cache.get_values(), ("new",))
+
+
+if __name__ == "__main__":
+    unittest.main()
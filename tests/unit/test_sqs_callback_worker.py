@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import unittest
+from unittest import mock
+
+import sqs_callback_worker
+
+
+class Context:
+    function_name = "sqs_callback_worker"
+    function_version = "$LATEST"
+    invoked_function_arn = (
+        "arn:aws:lambda:us-east-1:123456789012:function:sqs_callback_worker"
+    )
+    memory_limit_in_mb = 256
+    aws_request_id = "00000000-0000-0000-0000-000000000000"
+
+    def __init__(self, remaining_ms: int) -> None:
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self) -> int:
+        return self.remaining_ms
+
+
+def record(index: int) -> dict:
+    return {
+        "messageId": str(index),
+        "receiptHandle": f"handle-{index}",
+        "body": json.dumps(
+            {
+                "account_name": f"Account{index}",
+                "url": "https://example.com/hook",
+                "payload": "{}",
+            }
+        ),
+        "attributes": {"ApproximateReceiveCount": "1"},
+    }
+
+
+class DeliverTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(sqs_callback_worker, "session")
+        self.session = patcher.start()
+        self.session.post.return_value.status_code = 200
+        self.session.post.return_value.ok = True
+        self.addCleanup(patcher.stop)
+
+    def test_delivers_before_the_deadline(self):
+        delivered, _ = sqs_callback_worker.deliver(record(0), time.monotonic() + 60)
+        self.assertTrue(delivered)
+        self.session.post.assert_called_once()
+
+    def test_does_not_start_after_the_deadline(self):
+        delivered, _ = sqs_callback_worker.deliver(record(0), time.monotonic())
+        self.assertIsNone(delivered)
+        self.session.post.assert_not_called()
+
+    def test_reports_deferred_messages_as_failures(self):
+        event = {"Records": [record(0), record(1)]}
+        context = Context(sqs_callback_worker.TIME_MARGIN_MS - 1000)
+        with mock.patch.object(sqs_callback_worker, "get_client"):
+            response = sqs_callback_worker.lambda_handler(event, context)
+
+        self.assertEqual(
+            response["batchItemFailures"],
+            [{"itemIdentifier": "0"}, {"itemIdentifier": "1"}],
+        )
+        self.session.post.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import unittest
+from unittest import mock
+
+import botocore
+import pynamodb
+
+from . import conditional_check_failed
+from controltowerapi import status
+from controltowerapi.models import AccountModel, StatusCounterModel
+
+
+def account(name: str, account_status: str) -> AccountModel:
+    return AccountModel(
+        name,
+        account_email=f"{name}@example.com",
+        ou_name="Custom",
+        status=account_status,
+        queued_at=datetime.now(timezone.utc),
+    )
+
+
+def counter_changes(actions: List[Any]) -> Dict[str, int]:
+    """
+    Return the change of each counter made by ADD actions
+    """
+    return {
+        action.values[0].path[0]: int(action.values[1].value["N"]) for action in actions
+    }
+
+
+class TransactionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(status, "TransactWrite")
+        self.transact_write = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.transaction = self.transact_write.return_value.__enter__.return_value
+
+    def updates(self, model: type) -> List[Any]:
+        return [
+            call
+            for call in self.transaction.update.call_args_list
+            if isinstance(call.args[0], model)
+        ]
+
+
+class TransitionTest(TransactionTest):
+    def test_moves_counters_with_the_status(self):
+        item = account("a", "IN_PROGRESS")
+        status.transition(item, "SUCCEEDED", status_message="done")
+
+        # conditional on the status the account was loaded with
+        (update,) = self.updates(AccountModel)
+        values: Dict[str, Any] = {}
+        update.kwargs["condition"].serialize({}, values)
+        self.assertEqual(list(values.values()), [{"S": "IN_PROGRESS"}])
+        (counter,) = self.updates(StatusCounterModel)
+        self.assertEqual(
+            counter_changes(counter.kwargs["actions"]),
+            {"IN_PROGRESS": -1, "SUCCEEDED": 1},
+        )
+        # applied locally, as transactions do not return the new item
+        self.assertEqual(item.status, "SUCCEEDED")
+        self.assertEqual(item.status_message, "done")
+
+    def test_same_status_does_not_touch_counters(self):
+        item = account("a", "IN_PROGRESS")
+        with mock.patch.object(AccountModel, "update", autospec=True) as update:
+            status.transition(item, "IN_PROGRESS", status_message="still")
+
+        update.assert_called_once()
+        self.transact_write.assert_not_called()
+
+    def test_unknown_status_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            status.transition(account("a", "IN_PROGRESS"), "UNKNOWN")
+        self.transaction.update.assert_not_called()
+
+
+class TransitionManyTest(TransactionTest):
+    def test_counts_every_change_in_one_counter_update(self):
+        changes = [
+            (account("a", "QUEUED"), "IN_PROGRESS", {}),
+            (account("b", "QUEUED"), "SUCCEEDED", {}),
+            (account("c", "IN_PROGRESS"), "SUCCEEDED", {}),
+            (account("d", "FAILED"), "FAILED", {"status_message": "same"}),
+        ]
+        rejected, failed = status.transition_many(changes)
+
+        self.assertEqual((rejected, failed), ([], []))
+        self.assertEqual(len(self.updates(AccountModel)), 4)
+        (counter,) = self.updates(StatusCounterModel)
+        # IN_PROGRESS gains and loses one account, so it is left out
+        self.assertEqual(
+            counter_changes(counter.kwargs["actions"]), {"QUEUED": -2, "SUCCEEDED": 2}
+        )
+        self.assertEqual(
+            [item.status for item, _, _ in changes],
+            ["IN_PROGRESS", "SUCCEEDED", "SUCCEEDED", "FAILED"],
+        )
+
+    def test_retries_without_accounts_changed_concurrently(self):
+        cause = botocore.exceptions.ClientError(
+            {
+                "Error": {
+                    "Code": "TransactionCanceledException",
+                    "Message": "reasons [None, ConditionalCheckFailed, None]",
+                }
+            },
+            "TransactWriteItems",
+        )
+        error = pynamodb.exceptions.TransactWriteError("failed", cause=cause)
+        self.transact_write.return_value.__exit__.side_effect = [error, None]
+
+        changes = [
+            (account("a", "QUEUED"), "IN_PROGRESS", {}),
+            (account("b", "QUEUED"), "IN_PROGRESS", {}),
+        ]
+        rejected, failed = status.transition_many(changes)
+
+        self.assertEqual([item.account_name for item in rejected], ["b"])
+        self.assertEqual(failed, [])
+        self.assertEqual(changes[0][0].status, "IN_PROGRESS")
+        self.assertEqual(changes[1][0].status, "QUEUED")
+
+
+class CreateManyTest(TransactionTest):
+    def test_counts_new_accounts_by_status(self):
+        accounts = [
+            account("a", "QUEUED"),
+            account("b", "QUEUED"),
+            account("c", "SUCCEEDED"),
+        ]
+        rejected, failed = status.create_many(accounts)
+
+        self.assertEqual((rejected, failed), ([], []))
+        (counter,) = self.updates(StatusCounterModel)
+        self.assertEqual(
+            counter_changes(counter.kwargs["actions"]), {"QUEUED": 2, "SUCCEEDED": 1}
+        )
+
+
+class AdvanceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(AccountModel, "_get_connection")
+        self.update_item = patcher.start().return_value.update_item
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(StatusCounterModel, "update", autospec=True)
+        self.counter_update = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def previous(self, account_status: str) -> None:
+        self.update_item.return_value = {
+            "Attributes": {
+                "account_name": {"S": "a"},
+                "account_email": {"S": "a@example.com"},
+                "ou_name": {"S": "Custom"},
+                "status": {"S": account_status},
+                "queued_at": {"S": "2020-09-21T01:53:07.000000+0000"},
+            }
+        }
+
+    def test_accepts_the_same_or_an_earlier_status(self):
+        self.previous("CREATED")
+        item = status.advance("a", "IN_PROGRESS", account_id="123456789012")
+
+        (call,) = self.update_item.call_args_list
+        self.assertEqual(call.kwargs["return_values"], "ALL_OLD")
+        values: Dict[str, Any] = {}
+        call.kwargs["condition"].serialize({}, values)
+        self.assertCountEqual(
+            [value["S"] for value in values.values()],
+            ["IN_PROGRESS", "QUEUED", "CREATED"],
+        )
+        self.assertEqual(item.status, "IN_PROGRESS")
+        self.assertEqual(item.account_id, "123456789012")
+        self.assertEqual(item.account_email, "a@example.com")
+
+    def test_moves_counters_when_the_status_changed(self):
+        self.previous("CREATED")
+        status.advance("a", "IN_PROGRESS")
+
+        (call,) = self.counter_update.call_args_list
+        self.assertEqual(
+            counter_changes(call.kwargs["actions"]), {"CREATED": -1, "IN_PROGRESS": 1}
+        )
+
+    def test_same_status_does_not_touch_counters(self):
+        self.previous("IN_PROGRESS")
+        self.assertIsNotNone(status.advance("a", "IN_PROGRESS"))
+        self.counter_update.assert_not_called()
+
+    def test_returns_none_for_stale_events(self):
+        self.update_item.side_effect = conditional_check_failed(
+            pynamodb.exceptions.UpdateError
+        )
+        self.assertIsNone(status.advance("a", "CREATED"))
+        self.counter_update.assert_not_called()
+
+    def test_returns_account_when_counters_fail(self):
+        self.previous("IN_PROGRESS")
+        self.counter_update.side_effect = pynamodb.exceptions.UpdateError("failed")
+        with mock.patch.object(status.metrics, "add_metric") as add_metric:
+            item = status.advance("a", "SUCCEEDED")
+
+        self.assertEqual(item.status, "SUCCEEDED")
+        add_metric.assert_called_once_with(
+            name="StatusCounterErrors", unit=mock.ANY, value=1
+        )
+
+    def test_unknown_status_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            status.advance("a", "UNKNOWN")
+        self.update_item.assert_not_called()
+
+
+class ResetStatusCountsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(StatusCounterModel, "save", autospec=True)
+        self.save = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_does_not_write_counters_that_are_right(self):
+        self.assertFalse(status.reset_status_counts({"QUEUED": 2}, {"QUEUED": 2}))
+        self.save.assert_not_called()
+
+    def test_rewrites_counters_that_drifted(self):
+        expected = {"QUEUED": -1, "SUCCEEDED": 3}
+        self.assertTrue(status.reset_status_counts({"SUCCEEDED": 4}, expected))
+
+        (call,) = self.save.call_args_list
+        counter = call.args[0]
+        self.assertEqual(counter.queued, 0)
+        self.assertEqual(counter.succeeded, 4)
+
+    def test_only_rewrites_counters_unchanged_since_read(self):
+        status.reset_status_counts({"SUCCEEDED": 4}, {"SUCCEEDED": 3})
+
+        placeholders: Dict[str, str] = {}
+        values: Dict[str, Any] = {}
+        condition = self.save.call_args.kwargs["condition"]
+        expression = condition.serialize(placeholders, values)
+        # counters read as 0 may also not be stored yet
+        for name, placeholder in placeholders.items():
+            value = values[expression.split(f"{placeholder} = ", 1)[1][:2]]
+            self.assertEqual(value, {"N": "3" if name == "SUCCEEDED" else "0"})
+            self.assertEqual(
+                f"attribute_not_exists ({placeholder})" in expression,
+                name != "SUCCEEDED",
+            )
+        self.assertEqual(len(placeholders), len(status.COUNTER_ATTRIBUTES))
+
+    def test_skips_counters_changed_since_read(self):
+        self.save.side_effect = conditional_check_failed(pynamodb.exceptions.PutError)
+
+        self.assertFalse(status.reset_status_counts({"SUCCEEDED": 4}, {"QUEUED": 1}))
+
+    def test_unknown_status_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            status.reset_status_counts({"UNKNOWN": 1}, {})
+
+
+class ConditionalCheckTest(unittest.TestCase):
+    def test_detects_failed_condition(self):
+        self.assertTrue(
+            status.is_conditional_check_failed(
+                conditional_check_failed(pynamodb.exceptions.UpdateError)
+            )
+        )
+        self.assertFalse(
+            status.is_conditional_check_failed(pynamodb.exceptions.UpdateError("x"))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()